@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import os
+import posixpath
+import zipfile
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.storage import ObjectNotFound, StorageBackend
+from app.core.tree import live_subtree
+from app.models.file import File
+
+logger = logging.getLogger(__name__)
+
+# Storage objects opened ahead of the one being written to the archive
+ARCHIVE_PREFETCH = int(os.getenv("ARCHIVE_PREFETCH", 4))
+
+# Chunks buffered per prefetched object (DOWNLOAD_CHUNK_SIZE each)
+ARCHIVE_BUFFER_CHUNKS = int(os.getenv("ARCHIVE_BUFFER_CHUNKS", 2))
+
+# Oldest timestamp a ZIP entry can carry
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class ArchiveEntry(NamedTuple):
+    name: str
+    storage_path: str
+    size: Optional[int]
+    created_at: Optional[datetime]
+
+
+# -------------------------
+# Contents
+# -------------------------
+def _safe_name(name: str) -> str:
+    # One path segment per folder / file, whatever the user named it
+    name = name.replace("/", "_").replace("\\", "_").strip()
+    return "_" if name in ("", ".", "..") else name
+
+
+def _unique(name: str, taken: set) -> str:
+    stem, ext = posixpath.splitext(name)
+    candidate, n = name, 1
+    while candidate in taken:
+        candidate = f"{stem} ({n}){ext}"
+        n += 1
+    taken.add(candidate)
+    return candidate
+
+
+def archive_entries(
+    db: Session,
+    owner_id: int,
+    folder_id: int,
+) -> Tuple[List[str], List[ArchiveEntry]]:
+    """
+    Contents of the live subtree of `folder_id` (assumed visible), in two
+    queries whatever its size: its folders through one recursive CTE that
+    does not descend into trashed ones, then their files. Returns the
+    directory names and the files, with their paths in the archive.
+    """
+    tree = live_subtree(owner_id, folder_id, "archive_tree")
+    folders = db.execute(select(tree.c.id, tree.c.parent_id, tree.c.name)).all()
+
+    # Parents come before their children in a recursive CTE's output
+    taken = set()
+    paths = {}
+    for folder in folders:
+        parent = paths.get(folder.parent_id) if folder.id != folder_id else None
+        name = _safe_name(folder.name)
+        paths[folder.id] = _unique(f"{parent}/{name}" if parent else name, taken)
+
+    files = db.execute(
+        select(File.folder_id, File.name, File.storage_path, File.size, File.created_at)
+        .where(
+            File.folder_id.in_(select(tree.c.id)),
+            File.owner_id == owner_id,
+            File.is_deleted == False,
+            File.is_uploaded == True,
+        )
+        .order_by(File.folder_id, File.name, File.id)
+    ).all()
+
+    entries = [
+        ArchiveEntry(
+            _unique(f"{paths[f.folder_id]}/{_safe_name(f.name)}", taken),
+            f.storage_path,
+            f.size,
+            f.created_at,
+        )
+        for f in files
+    ]
+    return list(paths.values()), entries
+
+
+# -------------------------
+# Streaming
+# -------------------------
+class _Sink:
+    """Write-only file object collecting what ZipFile writes."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+_END = object()
+
+
+class _Prefetch:
+    """
+    Reads one storage object in the background into a queue holding at
+    most ARCHIVE_BUFFER_CHUNKS chunks. Errors are handed to the reader.
+    """
+
+    def __init__(self, storage: StorageBackend, path: str):
+        self._queue = asyncio.Queue(maxsize=ARCHIVE_BUFFER_CHUNKS)
+        self._task = asyncio.create_task(self._fill(storage, path))
+
+    async def _fill(self, storage: StorageBackend, path: str):
+        try:
+            stream = await storage.aopen_stream(path)
+            async for chunk in stream:
+                await self._queue.put(chunk)
+        except Exception as exc:
+            await self._queue.put(exc)
+        else:
+            await self._queue.put(_END)
+
+    async def get(self) -> Optional[bytes]:
+        """Next chunk; None at the end of the object."""
+        item = await self._queue.get()
+        if item is _END:
+            return None
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def cancel(self):
+        self._task.cancel()
+
+
+def _zip_info(name: str, created_at: Optional[datetime]) -> zipfile.ZipInfo:
+    stamp = created_at.timetuple()[:6] if created_at is not None else _ZIP_EPOCH
+    return zipfile.ZipInfo(name, max(stamp, _ZIP_EPOCH))
+
+
+async def stream_archive(
+    storage: StorageBackend,
+    directories: List[str],
+    files: List[ArchiveEntry],
+) -> AsyncIterator[bytes]:
+    """
+    Build a ZIP on the fly, yielding it as it is written. Entries are
+    stored uncompressed (ZIP64 when needed) with trailing data
+    descriptors, so nothing has to be known before an object is read.
+
+    Up to ARCHIVE_PREFETCH upcoming objects are read concurrently while
+    the current one is written; memory stays within
+    ARCHIVE_PREFETCH * ARCHIVE_BUFFER_CHUNKS chunks whatever the size of
+    the folder. Files whose content is missing from storage are skipped.
+    """
+    sink = _Sink()
+    pending = iter(files)
+    ahead = deque()
+    prefetch = None
+
+    def refill():
+        while len(ahead) < ARCHIVE_PREFETCH:
+            entry = next(pending, None)
+            if entry is None:
+                return
+            ahead.append((entry, _Prefetch(storage, entry.storage_path)))
+
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+            refill()
+            for directory in directories:
+                archive.writestr(_zip_info(directory + "/", None), b"")
+            yield sink.take()
+
+            while ahead:
+                entry, prefetch = ahead.popleft()
+                refill()
+                try:
+                    chunk = await prefetch.get()
+                except ObjectNotFound:
+                    logger.warning("Archive: content of %s is missing, skipped", entry.storage_path)
+                    continue
+
+                info = _zip_info(entry.name, entry.created_at)
+                if entry.size is not None:
+                    # Lets ZipFile pick ZIP64 up front for large files
+                    info.file_size = entry.size
+                with archive.open(info, "w", force_zip64=entry.size is None) as out:
+                    while chunk is not None:
+                        out.write(chunk)
+                        yield sink.take()
+                        chunk = await prefetch.get()
+                yield sink.take()
+
+        yield sink.take()
+    finally:
+        # Abandoned (client gone, storage failure): stop the reads in flight
+        if prefetch is not None:
+            prefetch.cancel()
+        for _, upcoming in ahead:
+            upcoming.cancel()
@@ -0,0 +1,170 @@
+import asyncio
+import os
+from collections import Counter
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.blobs import acquire_blobs, blob_key, hash_file, register_blob
+from app.core.listing_versions import bump_listings
+from app.core.purge import enqueue_purge_paths
+from app.core.storage import (
+    UPLOAD_CHUNK_SIZE,
+    InvalidStoragePath,
+    StorageBackend,
+    StorageError,
+    check_path,
+)
+from app.core.usage import adjust_rollups, charge_usage
+from app.models.file import File
+
+# Files hashed / written to storage at the same time within one batch
+BATCH_UPLOAD_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", 8))
+
+# Files accepted in one batch request
+BATCH_UPLOAD_MAX_FILES = int(os.getenv("BATCH_UPLOAD_MAX_FILES", 2000))
+
+
+class BatchItem:
+    """One file of a batch upload and what became of it."""
+
+    def __init__(self, upload: UploadFile):
+        self.upload = upload
+        self.name = upload.filename
+        self.mime_type = upload.content_type
+        self.sha256: Optional[str] = None
+        self.size: Optional[int] = None
+        # Set when this batch wrote the content to storage
+        self.storage_path: Optional[str] = None
+        self.file_id: Optional[int] = None
+        self.error: Optional[str] = None
+
+        # Names used to be part of the storage path; the same rules apply
+        try:
+            check_path(self.name or "")
+        except InvalidStoragePath:
+            self.error = "Invalid file name"
+
+    def result(self) -> dict:
+        if self.error is not None:
+            return {"name": self.name, "error": self.error}
+        return {"name": self.name, "id": self.file_id, "size": self.size}
+
+
+def pending(items: List[BatchItem]) -> List[BatchItem]:
+    return [item for item in items if item.error is None]
+
+
+async def _bounded(items, work: Callable[..., Awaitable[None]]):
+    """Run `work` on every item, at most BATCH_UPLOAD_CONCURRENCY at a time."""
+    semaphore = asyncio.Semaphore(BATCH_UPLOAD_CONCURRENCY)
+
+    async def run(item):
+        async with semaphore:
+            await work(item)
+
+    await asyncio.gather(*(run(item) for item in items))
+
+
+async def hash_items(items: List[BatchItem]):
+    async def work(item: BatchItem):
+        item.sha256, item.size = await run_in_threadpool(hash_file, item.upload.file)
+
+    await _bounded(pending(items), work)
+
+
+async def store_items(storage: StorageBackend, items: List[BatchItem], known: set):
+    """
+    Write the content of `items` that storage does not have yet (not in
+    `known`), once per distinct digest, concurrently. A failed write
+    fails every item with that content.
+    """
+    by_digest = {}
+    for item in pending(items):
+        if item.sha256 not in known:
+            by_digest.setdefault(item.sha256, []).append(item)
+
+    async def work(group: List[BatchItem]):
+        first = group[0]
+        path = blob_key(first.sha256)
+        try:
+            await storage.aupload(path, _chunks(first.upload), first.mime_type)
+        except StorageError:
+            for item in group:
+                item.error = "Storage upload failed"
+            return
+        first.storage_path = path
+
+    await _bounded(list(by_digest.values()), work)
+
+
+async def _chunks(upload: UploadFile):
+    await upload.seek(0)
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def stored_paths(items: List[BatchItem]) -> List[str]:
+    return [item.storage_path for item in items if item.storage_path]
+
+
+def record_batch(db: Session, owner_id: int, folder_id: Optional[int], items: List[BatchItem]):
+    """
+    The batch's single transaction: reference the content (one statement
+    for everything already stored), charge the owner's usage for the
+    whole batch (413 over quota), then insert every File row with one
+    bulk INSERT and update the folder's rollups and listing once.
+    """
+    live = pending(items)
+    refs = Counter(item.sha256 for item in live)
+    blobs = acquire_blobs(db, refs)
+
+    for item in live:
+        if not item.storage_path:
+            continue
+        if item.sha256 in blobs:
+            # Stored concurrently by someone else: ours is a duplicate
+            enqueue_purge_paths(db, owner_id, [item.storage_path])
+        else:
+            blobs[item.sha256] = register_blob(
+                db, owner_id, item.sha256, item.size, item.storage_path, refs[item.sha256],
+            )
+
+    for item in live:
+        if item.sha256 not in blobs:
+            # Was stored when checked, but its last reference went since
+            item.error = "Content changed during the upload, send it again"
+
+    live = pending(items)
+    if not live:
+        return
+
+    charge_usage(db, owner_id, sum(item.size for item in live), len(live))
+
+    file_ids = db.execute(
+        insert(File).returning(File.id, sort_by_parameter_order=True),
+        [
+            {
+                "name": item.name,
+                "owner_id": owner_id,
+                "folder_id": folder_id,
+                "blob_id": blobs[item.sha256].id,
+                "storage_path": blobs[item.sha256].storage_path,
+                "size": blobs[item.sha256].size,
+                "mime_type": item.mime_type,
+                "is_uploaded": True,
+            }
+            for item in live
+        ],
+    ).scalars().all()
+    for item, file_id in zip(live, file_ids):
+        item.file_id = file_id
+
+    bump_listings(db, owner_id, [folder_id])
+    adjust_rollups(db, owner_id, folder_id, sum(item.size for item in live), len(live))
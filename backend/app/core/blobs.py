@@ -0,0 +1,180 @@
+import hashlib
+from typing import BinaryIO, Dict, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.core.purge import enqueue_purge, enqueue_purge_paths
+from app.core.storage import UPLOAD_CHUNK_SIZE
+from app.core.usage import release_usage
+from app.models.blob import Blob
+from app.models.file import File
+
+# Storage prefix of content-addressed objects
+BLOB_PREFIX = "blobs"
+
+# Attempts at registering new content before giving up (lost races with
+# concurrent uploads / deletes of the same content)
+_REGISTER_ATTEMPTS = 3
+
+
+def hash_file(fileobj: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[str, int]:
+    """SHA-256 hex digest and size of a seekable file; rewinds it after."""
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def blob_key(sha256: str) -> str:
+    """
+    Storage path for new content. The suffix makes every blob its own
+    object: content purged after its last reference and uploaded again
+    right after never shares a path with the pending purge.
+    """
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}-{uuid4().hex[:12]}"
+
+
+def acquire_blob(db: Session, sha256: str, refs: int = 1) -> Optional[Row]:
+    """
+    Take `refs` references on the blob holding `sha256`, if there is one.
+    Returns (id, storage_path, size), or None when the content is new.
+    Blobs whose last reference is being dropped (refcount 0) are not
+    revived.
+    """
+    return db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256, Blob.refcount > 0)
+        .values(refcount=Blob.refcount + refs)
+        .returning(Blob.id, Blob.storage_path, Blob.size)
+    ).first()
+
+
+def acquire_blobs(db: Session, refs: Dict[str, int]) -> Dict[str, Row]:
+    """
+    acquire_blob() for many digests in one statement: `refs` maps each
+    SHA-256 to the number of references to take. Returns the blobs found,
+    by digest.
+    """
+    if not refs:
+        return {}
+    rows = db.execute(
+        update(Blob)
+        .where(Blob.sha256.in_(list(refs)), Blob.refcount > 0)
+        .values(refcount=Blob.refcount + case(refs, value=Blob.sha256))
+        .returning(Blob.sha256, Blob.id, Blob.storage_path, Blob.size)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return {row.sha256: row for row in rows}
+
+
+def add_blob_refs(db: Session, refs: Dict[int, int]):
+    """
+    Take more references on blobs that are already referenced (copies of
+    existing files): `refs` maps blob ids to the number of new references.
+    """
+    if refs:
+        db.execute(
+            update(Blob)
+            .where(Blob.id.in_(list(refs)))
+            .values(refcount=Blob.refcount + case(refs, value=Blob.id))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def known_blobs(db: Session, digests) -> set:
+    """Which of `digests` are already stored (read-only)."""
+    return set(db.execute(
+        select(Blob.sha256).where(Blob.sha256.in_(list(digests)), Blob.refcount > 0)
+    ).scalars())
+
+
+def register_blob(
+    db: Session,
+    owner_id: int,
+    sha256: str,
+    size: int,
+    storage_path: str,
+    refs: int = 1,
+) -> Row:
+    """
+    Record content just uploaded to `storage_path` with `refs` references.
+    When the same content was registered concurrently, reference that
+    blob instead and queue the duplicate object for purge.
+    """
+    for _ in range(_REGISTER_ATTEMPTS):
+        created = db.execute(
+            dialect_insert(db, Blob)
+            .values(sha256=sha256, size=size, storage_path=storage_path, refcount=refs)
+            .on_conflict_do_nothing(index_elements=[Blob.sha256])
+            .returning(Blob.id, Blob.storage_path, Blob.size)
+        ).first()
+        if created is not None:
+            return created
+
+        existing = acquire_blob(db, sha256, refs)
+        if existing is not None:
+            enqueue_purge_paths(db, owner_id, [storage_path])
+            return existing
+
+    raise RuntimeError(f"Could not register blob {sha256}")
+
+
+def delete_files(db: Session, owner_id: int, *criteria):
+    """
+    Delete the File rows matching `criteria` together with their storage
+    references, in the caller's transaction:
+
+    - blob refcounts drop by the number of matching files per blob, and
+      blobs left unreferenced are queued for purge and deleted;
+    - files without a blob (uploaded before deduplication) have their
+      own object queued for purge;
+    - their owners' usage is credited back.
+    """
+    release_usage(db, *criteria)
+
+    db.execute(
+        update(Blob)
+        .where(Blob.id.in_(select(File.blob_id).where(*criteria)))
+        .values(refcount=Blob.refcount - (
+            select(func.count(File.id))
+            .where(File.blob_id == Blob.id, *criteria)
+            .scalar_subquery()
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
+    orphans = select(Blob.id).where(
+        Blob.id.in_(select(File.blob_id).where(*criteria)),
+        Blob.refcount <= 0,
+    )
+    orphan_ids = db.execute(orphans).scalars().all()
+
+    enqueue_purge(
+        db,
+        select(File.storage_path, File.owner_id).where(
+            *criteria,
+            File.blob_id.is_(None),
+            File.storage_path.isnot(None),
+        ),
+    )
+    if orphan_ids:
+        enqueue_purge(
+            db,
+            select(Blob.storage_path, literal(owner_id)).where(Blob.id.in_(orphan_ids)),
+        )
+
+    db.query(File).filter(*criteria).delete(synchronize_session=False)
+
+    if orphan_ids:
+        db.query(Blob).filter(Blob.id.in_(orphan_ids)).delete(synchronize_session=False)
@@ -0,0 +1,320 @@
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal, select, union_all, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.blobs import delete_files
+from app.core.listing_versions import bump_listings
+from app.core.tree import (
+    folder_ancestors,
+    is_folder_visible,
+    subtrees_folder_ids,
+    trashed_among,
+)
+from app.core.uploads import discard_uploads
+from app.core.usage import adjust_rollups_many
+from app.models.file import File
+from app.models.folder import Folder
+from app.models.link_share import LinkShare
+from app.models.share import Share
+from app.models.upload_session import UploadSession
+
+# Items (files and folders together) accepted in one bulk request
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 10000))
+
+BULK_ACTIONS = ("move", "trash", "restore", "delete")
+
+# Per-item outcomes
+OK = "ok"
+NOT_FOUND = "not_found"
+CONFLICT = "conflict"
+
+Key = Tuple[str, int]
+
+
+# -------------------------
+# Permanent deletion
+# -------------------------
+def delete_file_rows(db: Session, owner_id: int, *criteria):
+    """
+    Permanently delete the files matching `criteria` with their shares;
+    their storage is purged in the background (app.core.blobs).
+    """
+    db.query(Share).filter(
+        Share.file_id.in_(select(File.id).where(*criteria))
+    ).delete(synchronize_session=False)
+
+    delete_files(db, owner_id, *criteria)
+
+
+def delete_folder_subtrees(db: Session, owner_id: int, root_ids):
+    """
+    Permanently delete the folders `root_ids` (a list or a SELECT) and
+    everything below them, with one set-based statement per table.
+    """
+    subtree = subtrees_folder_ids(owner_id, root_ids)
+
+    db.query(LinkShare).filter(
+        LinkShare.folder_id.in_(subtree)
+    ).delete(synchronize_session=False)
+    db.query(Share).filter(
+        Share.folder_id.in_(subtree)
+    ).delete(synchronize_session=False)
+
+    in_folders = (File.owner_id == owner_id, File.folder_id.in_(subtree))
+
+    # Uploads still in progress into these folders go with them
+    discard_uploads(db, UploadSession.file_id.in_(select(File.id).where(*in_folders)))
+    delete_file_rows(db, owner_id, *in_folders)
+
+    db.query(Folder).filter(
+        Folder.id.in_(subtree)
+    ).delete(synchronize_session=False)
+
+
+# -------------------------
+# Bulk operations
+# -------------------------
+def _resolve(db: Session, owner_id: int, file_ids: List[int], folder_ids: List[int]) -> Dict[Key, Row]:
+    """
+    The requested items that exist and belong to `owner_id`, files and
+    folders alike, in one query: (type, id) -> (parent_id, is_deleted,
+    size, count), size and count being what the item adds to its parent's
+    rollups.
+    """
+    parts = []
+    if file_ids:
+        parts.append(select(
+            literal("file").label("type"),
+            File.id,
+            File.folder_id.label("parent_id"),
+            File.is_deleted,
+            func.coalesce(File.size, 0).label("size"),
+            literal(1).label("count"),
+        ).where(
+            File.id.in_(file_ids),
+            File.owner_id == owner_id,
+            File.is_uploaded == True,
+        ))
+    if folder_ids:
+        parts.append(select(
+            literal("folder").label("type"),
+            Folder.id,
+            Folder.parent_id,
+            Folder.is_deleted,
+            Folder.total_bytes.label("size"),
+            Folder.file_count.label("count"),
+        ).where(
+            Folder.id.in_(folder_ids),
+            Folder.owner_id == owner_id,
+        ))
+    if not parts:
+        return {}
+
+    query = parts[0] if len(parts) == 1 else union_all(*parts)
+    return {(row.type, row.id): row for row in db.execute(query)}
+
+
+def _rollup_deltas(rows: List[Row], sign: int, target: Optional[int] = None) -> dict:
+    """
+    Rollup changes for `rows` leaving their parents (sign -1) or coming
+    back (sign +1); with `target`, also arriving there.
+    """
+    deltas = defaultdict(lambda: (0, 0))
+
+    def add(folder_id, size, count):
+        old = deltas[folder_id]
+        deltas[folder_id] = (old[0] + size, old[1] + count)
+
+    for row in rows:
+        add(row.parent_id, sign * row.size, sign * row.count)
+        if target is not None:
+            add(target, row.size, row.count)
+    return deltas
+
+
+def _mark_trash(db: Session, ids: Dict[str, List[int]], trashed: bool):
+    for model, key in ((File, "file"), (Folder, "folder")):
+        if ids[key]:
+            db.execute(
+                update(model)
+                .where(model.id.in_(ids[key]))
+                .values(is_deleted=trashed, deleted_at=func.now() if trashed else None)
+                .execution_options(synchronize_session=False)
+            )
+
+
+def _ids(rows: List[Row]) -> Dict[str, List[int]]:
+    ids = {"file": [], "folder": []}
+    for row in rows:
+        ids[row.type].append(row.id)
+    return ids
+
+
+def _move(
+    db: Session,
+    owner_id: int,
+    found: Dict[Key, Row],
+    target: Optional[int],
+) -> Tuple[List[Row], Dict[Key, str]]:
+    if target is not None and not is_folder_visible(db, owner_id, target):
+        raise HTTPException(status_code=404, detail="Target folder not found")
+
+    statuses = {}
+    candidates = [row for row in found.values() if not row.is_deleted]
+
+    # Items inside a trashed folder are not movable either
+    parents = {row.parent_id for row in candidates if row.parent_id is not None}
+    hidden = set(db.execute(trashed_among(list(parents))).scalars()) if parents else set()
+
+    # A folder cannot go below itself: the target's ancestor chain (one
+    # recursive query) must not contain any moved folder
+    above = set()
+    if target is not None:
+        chain = folder_ancestors(owner_id, target)
+        above = set(db.execute(select(chain.c.id)).scalars())
+
+    moved = []
+    for row in candidates:
+        if row.parent_id in hidden:
+            continue
+        if row.type == "folder" and row.id in above:
+            statuses[(row.type, row.id)] = CONFLICT
+        elif row.parent_id != target:
+            moved.append(row)
+        else:
+            statuses[(row.type, row.id)] = OK
+
+    ids = _ids(moved)
+    if ids["file"]:
+        db.execute(
+            update(File)
+            .where(File.id.in_(ids["file"]))
+            .values(folder_id=target)
+            .execution_options(synchronize_session=False)
+        )
+    if ids["folder"]:
+        db.execute(
+            update(Folder)
+            .where(Folder.id.in_(ids["folder"]))
+            .values(parent_id=target)
+            .execution_options(synchronize_session=False)
+        )
+
+    if moved:
+        adjust_rollups_many(db, owner_id, _rollup_deltas(moved, -1, target))
+        # Moved folders too: their breadcrumbs changed
+        bump_listings(db, owner_id, [target] + ids["folder"])
+    return moved, statuses
+
+
+# -------------------------
+# Single items (move / rename endpoints)
+# -------------------------
+_MODELS = {"file": File, "folder": Folder}
+
+
+def move_item(db: Session, owner_id: int, kind: str, item_id: int, target: Optional[int]):
+    """
+    Move one live file or folder of `owner_id` under `target` (None: the
+    root), the same way as a bulk move: a fixed number of queries however
+    large the subtree. 404 when the item or target is missing, 409 when
+    a folder would end up below itself.
+    """
+    found = _resolve(
+        db, owner_id,
+        [item_id] if kind == "file" else [],
+        [item_id] if kind == "folder" else [],
+    )
+    moved, statuses = _move(db, owner_id, found, target)
+
+    status = OK if moved else statuses.get((kind, item_id), NOT_FOUND)
+    if status == CONFLICT:
+        raise HTTPException(status_code=409, detail="Cannot move a folder into itself")
+    if status == NOT_FOUND:
+        raise HTTPException(status_code=404, detail=f"{kind.capitalize()} not found")
+    if moved:
+        bump_listings(db, owner_id, [moved[0].parent_id])
+
+
+def rename_item(db: Session, owner_id: int, kind: str, item_id: int, name: str):
+    """Rename one live file or folder of `owner_id`; 404 when there is none."""
+    model = _MODELS[kind]
+    parent = model.folder_id if kind == "file" else model.parent_id
+
+    renamed = db.execute(
+        update(model)
+        .where(model.id == item_id, model.owner_id == owner_id, model.is_deleted == False)
+        .values(name=name)
+        .returning(parent)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if renamed is None:
+        raise HTTPException(status_code=404, detail=f"{kind.capitalize()} not found")
+
+    # A folder's name is also in the breadcrumbs of its whole subtree,
+    # whose listings depend on its version
+    bump_listings(db, owner_id, [renamed[0]] + ([item_id] if kind == "folder" else []))
+
+
+def run_bulk(
+    db: Session,
+    owner_id: int,
+    action: str,
+    file_ids: List[int],
+    folder_ids: List[int],
+    target_folder_id: Optional[int] = None,
+) -> List[dict]:
+    """
+    Apply `action` to many files and folders of `owner_id` within the
+    caller's transaction, with a fixed number of set-based statements
+    whatever the number of items. Items follow the rules of the
+    single-item endpoints; those that don't qualify are reported, not
+    fatal. Returns one {type, id, status} per requested item, files first.
+    """
+    found = _resolve(db, owner_id, file_ids, folder_ids)
+    statuses: Dict[Key, str] = {}
+
+    if action == "move":
+        applied, statuses = _move(db, owner_id, found, target_folder_id)
+
+    elif action in ("trash", "restore"):
+        trashed = action == "trash"
+        applied = [row for row in found.values() if row.is_deleted != trashed]
+        ids = _ids(applied)
+        _mark_trash(db, ids, trashed)
+        adjust_rollups_many(db, owner_id, _rollup_deltas(applied, -1 if trashed else 1))
+        bump_listings(db, owner_id, ids["folder"])
+
+    elif action == "delete":
+        # Like the single endpoints: any file, only folders in the trash
+        applied = [
+            row for row in found.values()
+            if row.type == "file" or row.is_deleted
+        ]
+        ids = _ids(applied)
+        live_files = [row for row in applied if row.type == "file" and not row.is_deleted]
+        adjust_rollups_many(db, owner_id, _rollup_deltas(live_files, -1))
+
+        if ids["folder"]:
+            delete_folder_subtrees(db, owner_id, ids["folder"])
+        if ids["file"]:
+            delete_file_rows(db, owner_id, File.owner_id == owner_id, File.id.in_(ids["file"]))
+        bump_listings(db, owner_id, ids["folder"])
+
+    else:
+        raise ValueError(f"Unknown bulk action {action!r}")
+
+    for row in applied:
+        statuses[(row.type, row.id)] = OK
+    bump_listings(db, owner_id, {row.parent_id for row in applied})
+
+    requested = [("file", i) for i in file_ids] + [("folder", i) for i in folder_ids]
+    return [
+        {"type": kind, "id": item_id, "status": statuses.get((kind, item_id), NOT_FOUND)}
+        for kind, item_id in requested
+    ]
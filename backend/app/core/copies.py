@@ -0,0 +1,422 @@
+import asyncio
+import logging
+import os
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.blobs import add_blob_refs
+from app.core.database import SessionLocal
+from app.core.listing_versions import bump_listings
+from app.core.purge import enqueue_purge_paths, notify_purge_worker
+from app.core.storage import StorageBackend, StorageError
+from app.core.tree import is_folder_visible, live_subtree
+from app.core.usage import adjust_rollups, charge_usage, check_quota
+from app.models.copy_job import CopyJob
+from app.models.file import File
+from app.models.folder import Folder
+
+logger = logging.getLogger(__name__)
+
+# Folder copies of up to this many items (folders and files) are done
+# within the request; larger ones are left to the copy worker
+COPY_INLINE_MAX_ITEMS = int(os.getenv("COPY_INLINE_MAX_ITEMS", 1000))
+
+# Files read and inserted per statement
+COPY_BATCH_SIZE = int(os.getenv("COPY_BATCH_SIZE", 5000))
+
+# Idle poll interval of the worker, in seconds
+COPY_POLL_SECONDS = float(os.getenv("COPY_POLL_SECONDS", 30))
+
+# Running jobs without progress for this long were interrupted (process
+# restart) and are started over
+COPY_STALE_SECONDS = float(os.getenv("COPY_STALE_SECONDS", 600))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+
+# Columns of a source file
+_FILE_COLUMNS = (
+    File.id,
+    File.folder_id,
+    File.name,
+    File.blob_id,
+    File.storage_path,
+    File.size,
+    File.mime_type,
+)
+
+
+# -------------------------
+# Copying rows
+# -------------------------
+@contextmanager
+def _copying(db: Session, owner_id: int):
+    """
+    Yields the list of storage objects a copy writes. When the copy fails
+    its transaction is rolled back and those objects are queued for purge.
+    """
+    written: List[str] = []
+    try:
+        yield written
+    except Exception as exc:
+        db.rollback()
+        if written:
+            enqueue_purge_paths(db, owner_id, written)
+            db.commit()
+            notify_purge_worker()
+        if isinstance(exc, StorageError):
+            raise HTTPException(status_code=502, detail="Storage copy failed") from exc
+        raise
+
+
+def _insert_copies(
+    db: Session,
+    storage: StorageBackend,
+    owner_id: int,
+    rows: List[Row],
+    folders: Dict[Optional[int], Optional[int]],
+    written: List[str],
+    names: Optional[Dict[int, str]] = None,
+) -> List[int]:
+    """
+    Insert copies of the file `rows`, each into folders[its folder], with
+    one statement; returns their ids in order. Content with a blob is
+    shared (one more reference per copy). Files uploaded before
+    deduplication own their object: it is copied within storage.
+    """
+    refs = Counter()
+    values = []
+    for row in rows:
+        path = row.storage_path
+        if row.blob_id is not None:
+            refs[row.blob_id] += 1
+        elif path is not None:
+            path = f"{owner_id}/{uuid4().hex}"
+            storage.copy(row.storage_path, path)
+            written.append(path)
+
+        values.append({
+            "name": (names or {}).get(row.id, row.name),
+            "owner_id": owner_id,
+            "folder_id": folders[row.folder_id],
+            "blob_id": row.blob_id,
+            "storage_path": path,
+            "size": row.size,
+            "mime_type": row.mime_type,
+            "is_uploaded": True,
+        })
+
+    add_blob_refs(db, refs)
+    return db.execute(
+        insert(File).returning(File.id, sort_by_parameter_order=True),
+        values,
+    ).scalars().all()
+
+
+def copy_file(
+    db: Session,
+    storage: StorageBackend,
+    owner_id: int,
+    file: File,
+    target: Optional[int],
+    name: str,
+) -> int:
+    """
+    Copy one live file of `owner_id` into `target` (checked by the
+    caller) as `name`, in the caller's transaction. 413 over quota.
+    Returns the id of the copy.
+    """
+    with _copying(db, owner_id) as written:
+        size = file.size or 0
+        charge_usage(db, owner_id, size, 1)
+
+        [copy_id] = _insert_copies(
+            db, storage, owner_id, [file], {file.folder_id: target}, written, {file.id: name},
+        )
+        adjust_rollups(db, owner_id, target, size, 1)
+        bump_listings(db, owner_id, [target])
+        return copy_id
+
+
+def copy_folder(
+    db: Session,
+    storage: StorageBackend,
+    owner_id: int,
+    folder_id: int,
+    target: Optional[int],
+    name: str,
+    progress: Callable[[int], None] = lambda copied: None,
+) -> int:
+    """
+    Copy the live subtree of `folder_id` (trashed items are left out)
+    into `target` as `name`, in the caller's transaction; returns the id
+    of the copy. `progress` is told how many items were copied so far.
+
+    The work is set-based: one INSERT for all the folders, one per
+    COPY_BATCH_SIZE files, and one bulk UPDATE linking the new folders to
+    their parents with their rollups, which are summed from the copied
+    rows as they go. Content is shared, never transferred.
+    """
+    with _copying(db, owner_id) as written:
+        tree = live_subtree(owner_id, folder_id, "copy_tree")
+        folders = db.execute(select(tree.c.id, tree.c.parent_id, tree.c.name)).all()
+        if not folders:
+            raise HTTPException(status_code=404, detail="Folder not found")
+
+        # Unlinked until the end, so the walk above never sees the copy
+        new_ids = db.execute(
+            insert(Folder).returning(Folder.id, sort_by_parameter_order=True),
+            [
+                {"name": name if f.id == folder_id else f.name, "owner_id": owner_id}
+                for f in folders
+            ],
+        ).scalars().all()
+        new_id = dict(zip((f.id for f in folders), new_ids))
+
+        copied = len(folders)
+        progress(copied)
+
+        # New folder id -> [bytes, files] directly inside it
+        totals = defaultdict(lambda: [0, 0])
+        last_id = 0
+        while True:
+            batch = db.execute(
+                select(*_FILE_COLUMNS)
+                .where(
+                    File.folder_id.in_(select(tree.c.id)),
+                    File.owner_id == owner_id,
+                    File.is_deleted == False,
+                    File.is_uploaded == True,
+                    File.id > last_id,
+                )
+                .order_by(File.id)
+                .limit(COPY_BATCH_SIZE)
+            ).all()
+            if not batch:
+                break
+
+            _insert_copies(db, storage, owner_id, batch, new_id, written)
+            for row in batch:
+                total = totals[new_id[row.folder_id]]
+                total[0] += row.size or 0
+                total[1] += 1
+
+            last_id = batch[-1].id
+            copied += len(batch)
+            progress(copied)
+
+        # Children come after their parents: add them up from the leaves
+        for f in reversed(folders[1:]):
+            child, parent = totals[new_id[f.id]], totals[new_id[f.parent_id]]
+            parent[0] += child[0]
+            parent[1] += child[1]
+
+        db.execute(update(Folder), [
+            {
+                "id": new_id[f.id],
+                "parent_id": target if f.id == folder_id else new_id[f.parent_id],
+                "total_bytes": totals[new_id[f.id]][0],
+                "file_count": totals[new_id[f.id]][1],
+            }
+            for f in folders
+        ])
+
+        size, count = totals[new_id[folder_id]]
+        charge_usage(db, owner_id, size, count)
+        adjust_rollups(db, owner_id, target, size, count)
+        bump_listings(db, owner_id, [target])
+        return new_id[folder_id]
+
+
+# -------------------------
+# Jobs
+# -------------------------
+def _check_copy(db: Session, owner_id: int, folder_id: int, target: Optional[int]):
+    if not is_folder_visible(db, owner_id, folder_id):
+        raise HTTPException(status_code=404, detail="Folder not found")
+    if target is not None and not is_folder_visible(db, owner_id, target):
+        raise HTTPException(status_code=404, detail="Target folder not found")
+
+
+def start_copy(
+    db: Session,
+    storage: StorageBackend,
+    owner_id: int,
+    folder: Folder,
+    target: Optional[int],
+    name: str,
+) -> CopyJob:
+    """
+    Copy a folder of `owner_id` into `target` as `name`: right away when
+    it holds at most COPY_INLINE_MAX_ITEMS items, else as a pending job
+    for the copy worker. Commits; returns the job either way.
+    """
+    _check_copy(db, owner_id, folder.id, target)
+    check_quota(db, owner_id, folder.total_bytes)
+
+    tree = live_subtree(owner_id, folder.id, "copy_tree")
+    folder_count = db.execute(select(func.count()).select_from(tree)).scalar()
+
+    job = CopyJob(
+        owner_id=owner_id,
+        folder_id=folder.id,
+        target_folder_id=target,
+        name=name,
+        total_items=folder_count + folder.file_count,
+    )
+    db.add(job)
+
+    if job.total_items <= COPY_INLINE_MAX_ITEMS:
+        job.result_folder_id = copy_folder(db, storage, owner_id, folder.id, target, name)
+        job.status = "done"
+        job.copied_items = job.total_items
+        db.commit()
+    else:
+        job.status = "pending"
+        db.commit()
+        notify_copy_worker()
+
+    db.refresh(job)
+    return job
+
+
+def _claimable():
+    stale = datetime.now(timezone.utc) - timedelta(seconds=COPY_STALE_SECONDS)
+    return or_(
+        CopyJob.status == "pending",
+        and_(CopyJob.status == "running", CopyJob.updated_at < stale),
+    )
+
+
+def _progress_reporter(db: Session, job_id: int) -> Callable[[int], None]:
+    if db.get_bind().dialect.name == "sqlite":
+        # One writer at a time, and the copy's transaction is it: progress
+        # only shows once the job is done
+        return lambda copied: None
+
+    def report(copied: int):
+        with SessionLocal() as progress_db:
+            progress_db.execute(
+                update(CopyJob)
+                .where(CopyJob.id == job_id)
+                .values(copied_items=copied, updated_at=func.now())
+            )
+            progress_db.commit()
+
+    return report
+
+
+def run_copy_job(storage: StorageBackend, job_id: int) -> bool:
+    """
+    Run a pending (or interrupted) job. The copy and the job's "done"
+    status commit together; a failed job keeps its error. False when the
+    job was not claimable (taken by another worker meanwhile).
+    """
+    db = SessionLocal()
+    try:
+        claimed = db.execute(
+            update(CopyJob)
+            .where(CopyJob.id == job_id, _claimable())
+            .values(status="running", copied_items=0, updated_at=func.now())
+            .returning(CopyJob.owner_id, CopyJob.folder_id, CopyJob.target_folder_id, CopyJob.name)
+        ).first()
+        db.commit()
+        if claimed is None:
+            return False
+
+        try:
+            _check_copy(db, claimed.owner_id, claimed.folder_id, claimed.target_folder_id)
+            result = copy_folder(
+                db,
+                storage,
+                claimed.owner_id,
+                claimed.folder_id,
+                claimed.target_folder_id,
+                claimed.name,
+                _progress_reporter(db, job_id),
+            )
+        except Exception as exc:
+            db.rollback()
+            if isinstance(exc, HTTPException):
+                error = exc.detail
+            else:
+                logger.exception("Copy job %d failed", job_id)
+                error = "Copy failed"
+
+            db.execute(
+                update(CopyJob)
+                .where(CopyJob.id == job_id)
+                .values(status="failed", error=error, updated_at=func.now())
+            )
+            db.commit()
+            return True
+
+        db.execute(
+            update(CopyJob)
+            .where(CopyJob.id == job_id)
+            .values(
+                status="done",
+                result_folder_id=result,
+                copied_items=CopyJob.total_items,
+                updated_at=func.now(),
+            )
+        )
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def run_next_copy_job(storage: StorageBackend) -> bool:
+    """Run the oldest claimable job; False when there is none."""
+    with SessionLocal() as db:
+        job_id = db.execute(
+            select(CopyJob.id).where(_claimable()).order_by(CopyJob.id).limit(1)
+        ).scalar()
+
+    if job_id is None:
+        return False
+    run_copy_job(storage, job_id)
+    return True
+
+
+def notify_copy_worker():
+    """Wake the worker after a commit instead of waiting for the next poll."""
+    if _loop is not None and _wakeup is not None:
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+async def copy_worker(storage: StorageBackend):
+    """
+    Long-running task running copy jobs one after the other. Sleeps for
+    COPY_POLL_SECONDS when idle unless woken by notify_copy_worker().
+    """
+    global _loop, _wakeup
+
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+
+    while True:
+        try:
+            ran = await run_in_threadpool(run_next_copy_job, storage)
+        except Exception:
+            logger.exception("Copy worker iteration failed")
+            ran = False
+
+        if ran:
+            continue
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), COPY_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
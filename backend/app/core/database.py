@@ -1,13 +1,77 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Index, create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.sql import functions
 import os
 from dotenv import load_dotenv
 
+from app.core.pool import engine_options
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Async counterparts of the sync drivers, used when ASYNC_DATABASE_URL is
+# not given explicitly
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str):
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver known for {url.drivername}")
+
+    # libpq's sslmode is spelled ssl for asyncpg
+    query = dict(url.query)
+    if driver.endswith("asyncpg") and "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+
+    return url.set(drivername=driver, query=query)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+# Both engines share the pool settings from app.core.pool. Sessions only
+# check out a connection when their first statement runs.
+engine = create_engine(DATABASE_URL, **engine_options(make_url(DATABASE_URL)))
 SessionLocal = sessionmaker(bind=engine)
 
+# Async engine for routes that are async end to end (streaming uploads and
+# downloads); they never block the event loop on the database. Objects
+# stay usable after commit because async sessions cannot lazy-load.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **engine_options(make_url(ASYNC_DATABASE_URL), is_async=True),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 Base = declarative_base()
+
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # SQLite has no datetime type. Render now() in the same text format
+    # SQLAlchemy uses for DateTime binds, so server-side timestamps compare
+    # correctly against Python datetimes (keyset cursors, retry times).
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
+def dialect_insert(session, table):
+    """INSERT with ON CONFLICT support for the session's database."""
+    insert = {
+        "postgresql": postgresql.insert,
+        "sqlite": sqlite.insert,
+    }[session.get_bind().dialect.name]
+    return insert(table)
+
+
+def partial_index(name: str, *columns, where) -> Index:
+    """Index restricted to rows matching `where` (Postgres and SQLite)."""
+    return Index(name, *columns, postgresql_where=where, sqlite_where=where)
@@ -1,9 +1,12 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.user_cache import user_cache
 from app.models.user import User
 import os
 
@@ -13,6 +16,8 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM")
 
 
+# Sessions are cheap: a pooled connection is only checked out when the
+# first statement runs, so requests rejected before that never hold one.
 def get_db():
     db = SessionLocal()
     try:
@@ -21,10 +26,21 @@ def get_db():
         db.close()
 
 
-def get_current_user(
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    # Fast path: a token verified recently resolves without JWT decoding
+    # or a database round trip
+    user = user_cache.get(token)
+    if user is not None:
+        return user
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
@@ -33,8 +49,11 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
+    # Detached, fully loaded copy: safe to share across requests
+    db.expunge(user)
+    user_cache.put(token, user, payload.get("exp"))
     return user
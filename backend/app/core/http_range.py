@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc, microsecond=0)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_utc(value), usegmt=True)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range: bytes=...` header into an inclusive
+    (start, end) pair. Returns None when the whole object should be served
+    (no header, unknown unit, or a multi-range request we choose to ignore).
+    Raises 416 when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise _unsatisfiable(size)
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise _unsatisfiable(size)
+    if start > end:
+        return None
+
+    return start, min(end, size - 1)
+
+
+def if_range_matches(
+    header: Optional[str],
+    etag: str,
+    last_modified: Optional[datetime],
+) -> bool:
+    """
+    Evaluate `If-Range`. A missing header always matches; otherwise the
+    validator has to match the current representation exactly.
+    """
+    if not header:
+        return True
+
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        # Weak validators never match for If-Range
+        return header == etag
+
+    if last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+
+    return _utc(since) == _utc(last_modified)
+
+
+def if_none_match_matches(header: Optional[str], etag: str) -> bool:
+    """
+    Evaluate `If-None-Match` (weak comparison): True when the client's
+    copy is current and a 304 can be sent.
+    """
+    if not header:
+        return False
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    candidates = [opaque(tag) for tag in header.split(",")]
+    return "*" in candidates or opaque(etag) in candidates
+
+
+def _unsatisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
@@ -0,0 +1,68 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.pagination import Keyset
+from app.models.file import File
+from app.models.folder import Folder
+
+# Columns of a listed folder / file (app.schemas FolderOut / FileOut).
+# Listings select these alone: no ORM objects are built for their rows.
+FOLDER_COLUMNS = (
+    Folder.id,
+    Folder.name,
+    Folder.parent_id,
+    Folder.created_at,
+    Folder.total_bytes,
+    Folder.file_count,
+)
+FILE_COLUMNS = (
+    File.id,
+    File.name,
+    File.folder_id,
+    File.size,
+    File.mime_type,
+    File.created_at,
+)
+
+
+def folder_page(
+    db: Session,
+    owner_id: int,
+    parent_id: Optional[int],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Row], Keyset]:
+    """
+    One page of the live subfolders of `parent_id` (None: the root),
+    newest first. The parent's own visibility is the caller's business.
+    """
+    query = select(*FOLDER_COLUMNS).where(
+        Folder.owner_id == owner_id,
+        Folder.is_deleted == False,
+        Folder.parent_id.is_(None) if parent_id is None else Folder.parent_id == parent_id,
+    )
+
+    page = Keyset([(Folder.id, True)], cursor, limit)
+    return page.finish(db.execute(page.apply(query)), lambda f: (f.id,)), page
+
+
+def file_page(
+    db: Session,
+    owner_id: int,
+    folder_id: Optional[int],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Row], Keyset]:
+    """One page of the live files of `folder_id` (None: the root), newest first."""
+    query = select(*FILE_COLUMNS).where(
+        File.owner_id == owner_id,
+        File.is_deleted == False,
+        File.is_uploaded == True,
+        File.folder_id.is_(None) if folder_id is None else File.folder_id == folder_id,
+    )
+
+    page = Keyset([(File.created_at, True), (File.id, True)], cursor, limit)
+    return page.finish(db.execute(page.apply(query)), lambda f: (f.created_at, f.id)), page
@@ -0,0 +1,101 @@
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Response
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.database import dialect_insert
+from app.core.http_range import http_date, if_none_match_matches
+from app.core.tree import folder_ancestors
+from app.models.listing_version import ListingVersion
+
+# folder_id of an owner's root listing
+ROOT_LISTING = 0
+
+
+def bump_listings(db: Session, owner_id: int, folder_ids: Iterable[Optional[int]]):
+    """
+    Mark the listings of `folder_ids` (None: the root) as changed. Call it
+    in the transaction making the change, for the folder whose subfolders
+    or files changed; when a folder itself is trashed, restored or
+    deleted, bump that folder too since its whole subtree changes with it.
+    """
+    keys = sorted({ROOT_LISTING if f is None else f for f in folder_ids})
+    if not keys:
+        return
+
+    stmt = dialect_insert(db, ListingVersion).values([
+        {"owner_id": owner_id, "folder_id": key, "version": 1}
+        for key in keys
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[ListingVersion.owner_id, ListingVersion.folder_id],
+        set_={
+            "version": ListingVersion.version + 1,
+            "updated_at": func.now(),
+        },
+    ))
+
+
+def _versions(db: Session, owner_id: int, folder_id: Optional[int]):
+    if folder_id is None:
+        return db.execute(
+            select(ListingVersion.folder_id, ListingVersion.version, ListingVersion.updated_at)
+            .where(
+                ListingVersion.owner_id == owner_id,
+                ListingVersion.folder_id == ROOT_LISTING,
+            )
+        ).all()
+
+    # A folder's listing also depends on its ancestors: trashing one hides
+    # everything below it
+    chain = folder_ancestors(owner_id, folder_id)
+    return db.execute(
+        select(chain.c.id, ListingVersion.version, ListingVersion.updated_at)
+        .select_from(chain)
+        .outerjoin(ListingVersion, and_(
+            ListingVersion.owner_id == owner_id,
+            ListingVersion.folder_id == chain.c.id,
+        ))
+        .order_by(chain.c.depth)
+    ).all()
+
+
+def not_modified(
+    db: Session,
+    response: Response,
+    owner_id: int,
+    folder_id: Optional[int],
+    if_none_match: Optional[str],
+    *variant,
+) -> Optional[Response]:
+    """
+    Conditional GET for a listing of `folder_id`. Sets ETag / Last-Modified
+    on `response` and returns a 304 to send instead when the client's copy
+    is current; None when the listing has to be built. Only reads the
+    version counters, never the listed rows.
+
+    `variant` holds whatever else shapes the body (listing kind, cursor,
+    page size).
+    """
+    rows = _versions(db, owner_id, folder_id)
+
+    key = repr((owner_id, folder_id, [(r[0], r[1]) for r in rows], variant))
+    etag = '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+    headers = {
+        "ETag": etag,
+        # Cacheable per user, but always revalidated
+        "Cache-Control": "private, no-cache",
+    }
+    stamps = [r[2] for r in rows if r[2] is not None]
+    if stamps:
+        headers["Last-Modified"] = http_date(max(stamps))
+
+    if if_none_match_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
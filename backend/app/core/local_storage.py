@@ -0,0 +1,165 @@
+import mmap
+import os
+import shutil
+from typing import Iterable, List, Optional
+from uuid import uuid4
+
+from app.core.storage import (
+    DOWNLOAD_CHUNK_SIZE,
+    ObjectExists,
+    ObjectNotFound,
+    ObjectStream,
+    StorageBackend,
+    StorageError,
+    check_path,
+)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects stored as plain files under `root`. Reads are served from an
+    mmap of the file, so chunks are views into the page cache rather than
+    copies; copies use os.sendfile and never pass through Python buffers.
+
+    Objects are written to a temporary file and published with a hard
+    link, which fails if the key already exists, so like Supabase (with
+    upsert off) an existing object is never overwritten.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, path: str) -> str:
+        return os.path.join(self.root, *check_path(path).split("/"))
+
+    def _temp_path(self, full: str) -> str:
+        try:
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+        except OSError as e:
+            raise StorageError(f"Cannot create {os.path.dirname(full)}") from e
+        return f"{full}.{uuid4().hex}.part"
+
+    def _publish(self, temp: str, full: str, path: str):
+        try:
+            os.link(temp, full)
+        except FileExistsError:
+            raise ObjectExists(path)
+        finally:
+            _unlink(temp)
+
+    def upload(self, path: str, chunks: Iterable[bytes], content_type: Optional[str]):
+        full = self._path(path)
+        temp = self._temp_path(full)
+
+        try:
+            with open(temp, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            self._publish(temp, full, path)
+        except OSError as e:
+            _unlink(temp)
+            raise StorageError(f"Upload of {path} failed") from e
+        except BaseException:
+            # The chunks' source failed (e.g. a part read while assembling)
+            _unlink(temp)
+            raise
+
+    def open_stream(
+        self,
+        path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> ObjectStream:
+        f = self._open(path)
+
+        size = os.fstat(f.fileno()).st_size
+        start = start or 0
+        end = size - 1 if end is None else min(end, size - 1)
+
+        if start > end:
+            return ObjectStream(iter(()), f.close)
+
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            f.close()
+            raise StorageError(f"Download of {path} failed") from e
+
+        def chunks():
+            view = memoryview(mapped)
+            for offset in range(start, end + 1, DOWNLOAD_CHUNK_SIZE):
+                yield view[offset:min(offset + DOWNLOAD_CHUNK_SIZE, end + 1)]
+
+        def close():
+            try:
+                mapped.close()
+            except BufferError:
+                # A consumer still holds a view; the map is released
+                # when the last one is garbage collected.
+                pass
+            f.close()
+
+        return ObjectStream(chunks(), close)
+
+    def read_range(self, path: str, start: int, end: int) -> bytes:
+        with self._open(path) as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return mapped[start:end + 1]
+            except OSError as e:
+                raise StorageError(f"Read of {path} failed") from e
+
+    def _open(self, path: str):
+        try:
+            return open(self._path(path), "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(path)
+        except OSError as e:
+            # Directories, permissions, ... are storage faults, not 500s
+            raise StorageError(f"Cannot open {path}") from e
+
+    def remove_many(self, paths: List[str]):
+        for path in paths:
+            _unlink(self._path(path))
+
+    def copy(self, src: str, dst: str):
+        full_dst = self._path(dst)
+        temp = self._temp_path(full_dst)
+
+        try:
+            with open(self._path(src), "rb") as source, open(temp, "wb") as target:
+                _sendfile(source, target)
+            self._publish(temp, full_dst, dst)
+        except FileNotFoundError:
+            _unlink(temp)
+            raise ObjectNotFound(src)
+        except OSError as e:
+            _unlink(temp)
+            raise StorageError(f"Copy of {src} failed") from e
+
+
+def _sendfile(source, target):
+    size = os.fstat(source.fileno()).st_size
+    offset = 0
+
+    try:
+        while offset < size:
+            sent = os.sendfile(target.fileno(), source.fileno(), offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+    except (AttributeError, OSError):
+        # No file-to-file sendfile on this platform
+        source.seek(offset)
+        target.seek(offset)
+        shutil.copyfileobj(source, target)
+
+
+def _unlink(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,201 @@
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+# Applied versions. create_all() only creates missing tables, so any change
+# to an existing table goes through a numbered migration below.
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def _add_column(conn: Connection, table: str, column: Column):
+    """ALTER TABLE ... ADD COLUMN, skipped when the column already exists."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return
+
+    column_type = column.type.compile(dialect=conn.dialect)
+    ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}"
+    if column.server_default is not None:
+        if not column.nullable:
+            ddl += " NOT NULL"
+        ddl += f" DEFAULT {column.server_default.arg}"
+    conn.execute(text(ddl))
+
+
+# -------------------------
+# Migrations
+# -------------------------
+def _trash_tombstones(conn: Connection):
+    """
+    Trash used to cascade is_deleted onto every descendant; now only the
+    trashed root is marked. Add deleted_at and clear the cascaded markers,
+    i.e. legacy rows (no deleted_at) whose parent folder is marked too.
+    """
+    from app.models.file import File
+    from app.models.folder import Folder
+
+    _add_column(conn, "folders", Folder.__table__.c.deleted_at)
+    _add_column(conn, "files", File.__table__.c.deleted_at)
+
+    # Files first: they key off the folder markers cleared below
+    conn.execute(text("""
+        UPDATE files SET is_deleted = :false
+        WHERE is_deleted = :true
+          AND deleted_at IS NULL
+          AND folder_id IN (SELECT id FROM folders WHERE is_deleted = :true)
+    """), {"true": True, "false": False})
+
+    conn.execute(text("""
+        UPDATE folders SET is_deleted = :false
+        WHERE is_deleted = :true
+          AND deleted_at IS NULL
+          AND parent_id IN (SELECT id FROM folders WHERE is_deleted = :true)
+    """), {"true": True, "false": False})
+
+
+def _search_indexes(conn: Connection):
+    """
+    Trigram indexes on folder and file names for substring search.
+    Postgres gets pg_trgm GIN indexes; SQLite gets FTS5 trigram tables
+    kept in sync by triggers (see app.core.search).
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for table in ("folders", "files"):
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_name_trgm "
+                f"ON {table} USING gin (name gin_trgm_ops)"
+            ))
+        return
+
+    if conn.dialect.name != "sqlite":
+        return
+
+    for table in ("folders", "files"):
+        fts = f"{table}_fts"
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"name, content='{table}', content_rowid='id', tokenize='trigram')"
+        ))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, name) VALUES (new.id, new.name);
+            END
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, name) VALUES ('delete', old.id, old.name);
+            END
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF name ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO {fts} (rowid, name) VALUES (new.id, new.name);
+            END
+        """))
+        conn.execute(text(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"))
+
+
+def _create_indexes(conn: Connection, models, skip=()):
+    for model in models:
+        for index in model.__table__.indexes:
+            if index.name not in skip:
+                index.create(conn, checkfirst=True)
+
+
+def _listing_indexes(conn: Connection):
+    """
+    Composite / partial indexes matching the hot query shapes, as declared
+    on the models. Fresh databases get them from create_all already.
+    """
+    from app.models.file import File
+    from app.models.folder import Folder
+    from app.models.link_share import LinkShare
+    from app.models.share import Share
+    from app.models.storage_purge import StoragePurge
+
+    # Indexes on columns added by later migrations are theirs to create
+    _create_indexes(
+        conn,
+        (File, Folder, Share, LinkShare, StoragePurge),
+        skip={"ix_files_blob_id"},
+    )
+
+
+def _blobs(conn: Connection):
+    """
+    Content-addressed storage: files reference a shared, refcounted blob.
+    Existing files keep their own storage object and no blob.
+    """
+    from app.models.blob import Blob
+    from app.models.file import File
+
+    Blob.__table__.create(conn, checkfirst=True)
+    _add_column(conn, "files", File.__table__.c.blob_id)
+    _create_indexes(conn, (File,))
+
+
+def _usage_counters(conn: Connection):
+    """
+    Folder rollups and per-user usage, filled in by a first
+    reconciliation.
+    """
+    from sqlalchemy.orm import Session
+
+    from app.core.usage import reconcile_usage
+    from app.models.folder import Folder
+    from app.models.user_usage import UserUsage
+
+    _add_column(conn, "folders", Folder.__table__.c.total_bytes)
+    _add_column(conn, "folders", Folder.__table__.c.file_count)
+    UserUsage.__table__.create(conn, checkfirst=True)
+
+    with Session(bind=conn) as session:
+        reconcile_usage(session)
+
+
+def _big_file_sizes(conn: Connection):
+    """
+    File sizes past 2 GiB (resumable uploads). SQLite integers are 64-bit
+    already.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE files ALTER COLUMN size TYPE BIGINT"))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "trash_tombstones", _trash_tombstones),
+    (2, "search_indexes", _search_indexes),
+    (3, "listing_indexes", _listing_indexes),
+    (4, "blobs", _blobs),
+    (5, "usage_counters", _usage_counters),
+    (6, "big_file_sizes", _big_file_sizes),
+]
+
+
+def run_migrations(engine: Engine):
+    """
+    Apply pending migrations in version order, each in its own transaction
+    together with its schema_migrations row. Safe to call on every start.
+    """
+    schema_migrations.create(engine, checkfirst=True)
+
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name))
@@ -0,0 +1,116 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+
+# Response header carrying the continuation token of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, types: Sequence[type]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor(). Every value has to be of
+    the matching type in `types`; anything else is a client error (400)
+    rather than a value compared against the wrong column type.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in payload
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if len(values) != len(types) or not all(
+        isinstance(value, expected) and not isinstance(value, bool)
+        for value, expected in zip(values, types)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return values
+
+
+def _python_type(column) -> type:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return object
+
+
+class Keyset:
+    """
+    Keyset (seek) pagination over an ordering such as
+    [(File.created_at, True), (File.id, True)] where True means descending.
+    The last column must be unique so the ordering is total.
+
+    Instead of OFFSET, the next page starts strictly after the last row of
+    the previous one, so every page costs the same index range scan.
+    """
+
+    def __init__(
+        self,
+        order: Sequence[Tuple[Any, bool]],
+        cursor: Optional[str],
+        limit: int,
+        after: Optional[Sequence[Any]] = None,
+    ):
+        self.order = order
+        self.limit = limit
+        types = [_python_type(column) for column, _ in order]
+        self.after = decode_cursor(cursor, types) if cursor else after
+        self.last: Optional[Sequence[Any]] = None
+        self.next_cursor: Optional[str] = None
+
+    def _seek(self):
+        # (a, b) after (x, y)  <=>  a > x OR (a = x AND b > y), per direction
+        clauses = []
+        for i, (column, descending) in enumerate(self.order):
+            value = self.after[i]
+            beyond = column < value if descending else column > value
+            equal = [col == self.after[j] for j, (col, _) in enumerate(self.order[:i])]
+            clauses.append(and_(*equal, beyond))
+        return or_(*clauses)
+
+    def apply(self, query):
+        """Add the seek predicate, ORDER BY and LIMIT to a Query or Select."""
+        if self.after is not None:
+            query = query.where(self._seek())
+
+        return query.order_by(
+            *[column.desc() if descending else column.asc() for column, descending in self.order]
+        ).limit(self.limit + 1)
+
+    def finish(self, rows: Sequence[Any], key: Callable[[Any], Sequence[Any]]) -> List[Any]:
+        """
+        Trim the look-ahead row and remember the cursor of the next page.
+        `key` extracts the ordering values from a row.
+        """
+        rows = list(rows)
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            self.last = key(rows[-1])
+            self.next_cursor = encode_cursor(self.last)
+        return rows
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]):
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
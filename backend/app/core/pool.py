@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Connections kept open per engine, and how many more may be opened under
+# load. Size them so that workers x (size + overflow) stays below the
+# server's max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+
+# Seconds a request may wait for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+
+# Connections older than this are replaced (-1: never); keeps them below
+# server / proxy idle limits
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+# Test connections on checkout so a restarted server costs no requests
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Server-side cap on any single statement (Postgres only, 0: none)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+
+
+class PoolMetrics:
+    """
+    Checkout statistics of one pool: how often a connection was handed
+    out, how long callers waited for it and how often they gave up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_avg": self.wait_seconds_total / attempts if attempts else 0.0,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+class _TimedCheckout:
+    """Mixin timing QueuePool._do_get, i.e. the wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = True
+        try:
+            connection = super()._do_get()
+            timed_out = False
+            return connection
+        finally:
+            self.metrics.record(time.perf_counter() - started, timed_out)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: URL, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine keyword arguments for `url`."""
+    options = dict(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+    if url.get_backend_name() == "postgresql" and DB_STATEMENT_TIMEOUT_MS:
+        if is_async:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)},
+            }
+        else:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+            }
+
+    return options
+
+
+def pool_stats(engine: Engine) -> Optional[dict]:
+    """Current occupancy and checkout metrics of an engine's pool."""
+    pool = engine.pool
+    if not isinstance(pool, _TimedCheckout):
+        return None
+
+    in_use = pool.checkedout()
+    max_overflow = max(pool._max_overflow, 0)
+    capacity = pool.size() + max_overflow
+    return {
+        "size": pool.size(),
+        "max_overflow": max_overflow,
+        "in_use": in_use,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": in_use / capacity if capacity else 1.0,
+        **pool.metrics.snapshot(),
+    }
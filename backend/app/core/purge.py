@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, case, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.storage import StorageBackend
+from app.models.storage_purge import StoragePurge
+
+logger = logging.getLogger(__name__)
+
+# Paths handed to one remove_many call
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", 1000))
+
+# Idle poll interval of the worker, in seconds
+PURGE_POLL_SECONDS = float(os.getenv("PURGE_POLL_SECONDS", 30))
+
+# Retry backoff: doubles per failed attempt, capped
+PURGE_RETRY_BASE_SECONDS = 10
+PURGE_RETRY_MAX_SECONDS = 3600
+
+# Entries still failing after this many attempts are parked (no longer
+# retried) and reported as failed by purge_progress()
+PURGE_MAX_ATTEMPTS = int(os.getenv("PURGE_MAX_ATTEMPTS", 10))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+
+
+def enqueue_purge(db: Session, paths_query):
+    """
+    Queue storage objects for removal. `paths_query` selects
+    (storage_path, owner_id) rows; they are copied into the queue with a
+    single INSERT ... SELECT inside the caller's transaction.
+    """
+    db.execute(
+        insert(StoragePurge).from_select(
+            [StoragePurge.storage_path, StoragePurge.owner_id],
+            paths_query,
+        )
+    )
+
+
+def enqueue_purge_paths(db: Session, owner_id: Optional[int], paths: List[str]):
+    if paths:
+        db.execute(
+            insert(StoragePurge),
+            [{"storage_path": path, "owner_id": owner_id} for path in paths],
+        )
+
+
+def notify_purge_worker():
+    """Wake the worker after a commit instead of waiting for the next poll."""
+    if _loop is not None and _wakeup is not None:
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def _remove(storage: StorageBackend, entries: List[StoragePurge]) -> list:
+    """
+    Remove the entries' objects. When a call fails the entries are split
+    in halves and retried, so one bad path costs O(log n) extra calls and
+    does not hold back the rest. Returns (entry, error) pairs that failed.
+    """
+    try:
+        storage.remove_many(sorted({entry.storage_path for entry in entries}))
+        return []
+    except Exception as e:
+        if len(entries) == 1:
+            return [(entries[0], e)]
+
+    middle = len(entries) // 2
+    return _remove(storage, entries[:middle]) + _remove(storage, entries[middle:])
+
+
+def _record_failure(entry: StoragePurge, error: Exception, now: datetime):
+    entry.attempts += 1
+    entry.last_error = str(error)[:500]
+
+    if entry.attempts >= PURGE_MAX_ATTEMPTS:
+        logger.error("Giving up on storage purge of %s: %s", entry.storage_path, error)
+        entry.next_attempt_at = None
+        return
+
+    entry.next_attempt_at = now + timedelta(
+        seconds=min(
+            PURGE_RETRY_BASE_SECONDS * 2 ** (entry.attempts - 1),
+            PURGE_RETRY_MAX_SECONDS,
+        )
+    )
+
+
+def drain_purge_queue(
+    storage: StorageBackend,
+    batch_size: int = PURGE_BATCH_SIZE,
+) -> int:
+    """
+    Remove one batch of due objects from storage. Returns how many queue
+    entries were processed (0 when nothing is due).
+    """
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+
+    try:
+        # Several workers may drain concurrently; SKIP LOCKED keeps them
+        # on disjoint batches (no-op on SQLite).
+        batch = db.execute(
+            select(StoragePurge)
+            .where(StoragePurge.next_attempt_at <= now)
+            .order_by(StoragePurge.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        if not batch:
+            return 0
+
+        failures = _remove(storage, batch)
+        failed = {entry.id for entry, _ in failures}
+
+        if failures:
+            logger.warning(
+                "Storage purge failed for %d of %d objects", len(failures), len(batch)
+            )
+        for entry, error in failures:
+            _record_failure(entry, error, now)
+
+        for entry in batch:
+            if entry.id not in failed:
+                db.delete(entry)
+
+        db.commit()
+        return len(batch)
+    finally:
+        db.close()
+
+
+def purge_progress(db: Session, owner_id: int) -> dict:
+    pending, retrying, failed = db.execute(
+        select(
+            func.count(StoragePurge.next_attempt_at),
+            func.count(case((
+                and_(StoragePurge.next_attempt_at.isnot(None), StoragePurge.attempts > 0),
+                1,
+            ))),
+            func.count(case((StoragePurge.next_attempt_at.is_(None), 1))),
+        ).where(StoragePurge.owner_id == owner_id)
+    ).one()
+
+    return {"pending": pending, "retrying": retrying, "failed": failed}
+
+
+async def purge_worker(storage: StorageBackend):
+    """
+    Long-running task draining the purge queue in batches. Sleeps for
+    PURGE_POLL_SECONDS when idle unless woken by notify_purge_worker().
+    `storage` is resolved by the caller so misconfiguration fails startup
+    instead of silently killing the task.
+    """
+    global _loop, _wakeup
+
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+
+    while True:
+        try:
+            processed = await run_in_threadpool(drain_purge_queue, storage)
+        except Exception:
+            logger.exception("Storage purge worker iteration failed")
+            processed = 0
+
+        if processed:
+            continue
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), PURGE_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
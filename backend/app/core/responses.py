@@ -0,0 +1,25 @@
+from typing import Any, Iterable, List, Optional
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.engine import Row
+
+
+def row_dicts(rows: Iterable[Row]) -> List[dict]:
+    """Plain dicts of column-only result rows, keyed by column label."""
+    return [row._asdict() for row in rows]
+
+
+def fast_json(content: Any, response: Optional[Response] = None) -> ORJSONResponse:
+    """
+    Render already-shaped data (dicts, lists, datetimes) with orjson.
+
+    Returning a Response skips FastAPI's response_model validation and
+    jsonable_encoder, which walk every object of a large listing; the
+    route's response_model then only documents the shape. Headers set on
+    the injected `response` (cursor, ETag) are carried over.
+    """
+    rendered = ORJSONResponse(content)
+    if response is not None:
+        rendered.headers.raw.extend(response.headers.raw)
+    return rendered
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from sqlalchemy import case, column, func, literal, select, table
+from sqlalchemy.orm import Session
+
+# Rank tiers, best first
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+
+_LIKE_ESCAPE = "\\"
+
+
+def _escape_like(value: str) -> str:
+    return (
+        value.replace(_LIKE_ESCAPE, _LIKE_ESCAPE * 2)
+        .replace("%", _LIKE_ESCAPE + "%")
+        .replace("_", _LIKE_ESCAPE + "_")
+    )
+
+
+def _fts_table(model):
+    # FTS5 shadow of `model`'s table, created by the search_indexes migration
+    return table(f"{model.__tablename__}_fts", column("rowid"), column("name"))
+
+
+def name_matches(db: Session, model, q: str, prefix: bool = False):
+    """
+    Filter clause for rows of `model` (File or Folder) whose name contains
+    `q` case-insensitively, or starts with it when `prefix` is set.
+
+    On Postgres this is an ILIKE served by the pg_trgm GIN index on name.
+    SQLite has no trigram operator class, so the match runs against the
+    table's FTS5 trigram index instead and returns the matching ids.
+    Either way the cost follows the number of matches, not the table.
+    """
+    escaped = _escape_like(q)
+    pattern = f"{escaped}%" if prefix else f"%{escaped}%"
+
+    if db.get_bind().dialect.name != "sqlite":
+        return model.name.ilike(pattern, escape=_LIKE_ESCAPE)
+
+    fts = _fts_table(model)
+    if escaped == q:
+        # FTS5 only uses its index for LIKE without an ESCAPE clause
+        match = fts.c.name.like(pattern)
+    else:
+        match = fts.c.name.like(pattern, escape=_LIKE_ESCAPE)
+
+    return model.id.in_(select(fts.c.rowid).where(match))
+
+
+def name_rank(model, q: str):
+    """
+    Rank expression for a match: exact name first, then names starting
+    with `q`, then any other substring match. Only evaluated on matches.
+    """
+    name = func.lower(model.name)
+    needle = q.lower()
+
+    return case(
+        (name == needle, literal(RANK_EXACT)),
+        (name.startswith(needle, autoescape=True), literal(RANK_PREFIX)),
+        else_=literal(RANK_SUBSTRING),
+    )
+
+
+def mime_type_matches(model, mime_type: Optional[str]):
+    """
+    `mime_type` is either exact ("image/png") or a family ("image/" or
+    "image/*").
+    """
+    if mime_type.endswith("/*"):
+        mime_type = mime_type[:-1]
+    if mime_type.endswith("/"):
+        return model.mime_type.startswith(mime_type, autoescape=True)
+    return model.mime_type == mime_type
@@ -1,6 +1,31 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor. Changing it takes effect for new passwords right
+# away and for existing ones on their owner's next login (rehash).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# Worker processes hashing / verifying passwords. bcrypt is pure CPU, so
+# keeping it out of the API process keeps a login burst from stalling
+# every other request.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+
+# Hash jobs allowed to wait for a worker; beyond that, login and register
+# answer 503 instead of queueing without bound
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+)
 
 
 def hash_password(password: str) -> str:
@@ -9,3 +34,91 @@ def hash_password(password: str) -> str:
 
 def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
+
+
+def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify `password`; when it matches but `hashed` uses outdated
+    settings (e.g. another cost factor), also return a fresh hash.
+    """
+    return pwd_context.verify_and_update(password, hashed)
+
+
+# -------------------------
+# Process pool
+# -------------------------
+class HashPool:
+    """
+    Bounded process pool for the functions above. At most `workers` jobs
+    run at once and at most `max_queue` more wait; further submissions
+    are rejected.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs threads (the event loop,
+            # DB driver threads) is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent sign-ins, retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+            self._max_queued = max(self._max_queued, self._in_flight - self.workers)
+            executor = self._get_executor()
+
+        try:
+            return await asyncio.wrap_future(executor.submit(fn, *args))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": min(self._in_flight, self.workers),
+                "queued": max(self._in_flight - self.workers, 0),
+                "max_queued": self._max_queued,
+                "max_queue": self.max_queue,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+hash_pool = HashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hash_pool.run(hash_password, password)
+
+
+async def verify_and_update_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await hash_pool.run(verify_and_update, password, hashed)
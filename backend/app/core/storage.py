@@ -0,0 +1,212 @@
+import os
+from functools import lru_cache
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+from anyio import from_thread
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+
+STORAGE_BUCKET = os.getenv("STORAGE_BUCKET", "files")
+
+# Chunk size used when piping uploads to storage
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+# Chunk size used when relaying downloads to the client
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 256 * 1024))
+
+
+class StorageError(Exception):
+    pass
+
+
+class ObjectNotFound(StorageError):
+    pass
+
+
+class ObjectExists(StorageError):
+    pass
+
+
+class InvalidStoragePath(StorageError):
+    pass
+
+
+def check_path(path: str) -> str:
+    """
+    Validate a bucket-relative key. Keys are "/"-separated, relative and
+    may not contain empty, "." or ".." segments.
+    """
+    segments = path.split("/")
+    if "\\" in path or "\0" in path or any(s in ("", ".", "..") for s in segments):
+        raise InvalidStoragePath(f"Invalid storage path: {path!r}")
+    return path
+
+
+class ObjectStream:
+    """
+    An open object read. Iterating yields chunks and releases the underlying
+    connection / file handle when the iteration ends for any reason,
+    including the consumer abandoning it (client disconnect). close() is
+    idempotent and must still be called if the stream is never iterated.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], close: Callable[[], None]):
+        self._chunks = chunks
+        self._close = close
+        self._closed = False
+
+    def __iter__(self):
+        try:
+            yield from self._chunks
+        finally:
+            self.close()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._close()
+
+
+class AsyncObjectStream:
+    """
+    ObjectStream for async consumers: iterate with `async for`, close with
+    `await aclose()`. Same closing rules as ObjectStream.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], close: Callable[[], Awaitable[None]]):
+        self._chunks = chunks
+        self._close = close
+        self._closed = False
+
+    @classmethod
+    def from_sync(cls, stream: ObjectStream) -> "AsyncObjectStream":
+        """Relay a blocking stream, reading each chunk in a worker thread."""
+        return cls(
+            iterate_in_threadpool(iter(stream)),
+            lambda: run_in_threadpool(stream.close),
+        )
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._chunks:
+                yield chunk
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            await self._close()
+
+
+class StorageBackend:
+    """
+    Interface for object storage. Paths are bucket-relative keys such as
+    "{user_id}/{uuid}_{filename}".
+    """
+
+    def upload(self, path: str, chunks: Iterable[bytes], content_type: Optional[str]):
+        """
+        Store a new object. Never overwrites: raises ObjectExists when
+        `path` is taken and InvalidStoragePath for a malformed key.
+        """
+        raise NotImplementedError
+
+    def open_stream(
+        self,
+        path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> ObjectStream:
+        """
+        Open a read of the whole object, or of the inclusive byte range
+        [start, end]. Errors surface here, before any byte is returned.
+        """
+        raise NotImplementedError
+
+    def read_range(self, path: str, start: int, end: int) -> bytes:
+        stream = self.open_stream(path, start, end)
+        try:
+            return b"".join(stream)
+        finally:
+            stream.close()
+
+    def remove_many(self, paths: List[str]):
+        """Remove objects; missing paths are ignored."""
+        raise NotImplementedError
+
+    def copy(self, src: str, dst: str):
+        """Copy an object; same overwrite rules as upload()."""
+        raise NotImplementedError
+
+    # -------------------------
+    # Async I/O
+    # -------------------------
+    # Backends with a native async client override these. The defaults run
+    # the blocking calls in worker threads so the event loop never waits
+    # on storage.
+
+    async def aupload(
+        self,
+        path: str,
+        chunks: AsyncIterable[bytes],
+        content_type: Optional[str],
+    ):
+        iterator = chunks.__aiter__()
+
+        async def next_chunk():
+            return await iterator.__anext__()
+
+        def pull():
+            while True:
+                try:
+                    yield from_thread.run(next_chunk)
+                except StopAsyncIteration:
+                    return
+
+        await run_in_threadpool(self.upload, path, pull(), content_type)
+
+    async def aopen_stream(
+        self,
+        path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> AsyncObjectStream:
+        stream = await run_in_threadpool(self.open_stream, path, start, end)
+        return AsyncObjectStream.from_sync(stream)
+
+    async def aclose(self):
+        """Release connections held by the backend (app shutdown)."""
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    """
+    Storage backend selected by STORAGE_BACKEND ("supabase" or "local").
+    Also usable as a FastAPI dependency.
+    """
+    backend = os.getenv("STORAGE_BACKEND", "supabase")
+
+    if backend == "supabase":
+        from app.core.supabase import SupabaseStorage
+
+        return SupabaseStorage(
+            os.getenv("SUPABASE_URL"),
+            os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
+            STORAGE_BUCKET,
+        )
+
+    if backend == "local":
+        from app.core.local_storage import LocalStorage
+
+        return LocalStorage(os.getenv("LOCAL_STORAGE_ROOT", "./storage"))
+
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {backend}")
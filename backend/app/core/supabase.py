@@ -1,13 +1,216 @@
-import os
-from supabase import create_client, Client
+from typing import AsyncIterable, Iterable, List, Optional
+from urllib.parse import quote
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+import httpx
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-    raise RuntimeError("Supabase env vars missing")
-
-supabase: Client = create_client(
-    SUPABASE_URL,
-    SUPABASE_SERVICE_ROLE_KEY,
+from app.core.storage import (
+    DOWNLOAD_CHUNK_SIZE,
+    AsyncObjectStream,
+    ObjectExists,
+    ObjectNotFound,
+    ObjectStream,
+    StorageBackend,
+    StorageError,
+    check_path,
 )
+
+# Supabase accepts at most this many prefixes per remove call
+REMOVE_BATCH_SIZE = 1000
+
+
+class SupabaseStorage(StorageBackend):
+    """
+    Supabase storage, spoken to over its REST API with one pooled HTTP
+    client. storage3's upload() only accepts bytes or real files, so the
+    client library is not used for object I/O.
+
+    Async callers get a second, httpx.AsyncClient based pool with the same
+    settings, created on first use from the running event loop.
+    """
+
+    def __init__(self, url: Optional[str], service_role_key: Optional[str], bucket: str):
+        if not url or not service_role_key:
+            raise RuntimeError("Supabase env vars missing")
+
+        self.bucket = bucket
+        self._client_options = dict(
+            base_url=f"{url.rstrip('/')}/storage/v1",
+            headers={
+                "Authorization": f"Bearer {service_role_key}",
+                "apikey": service_role_key,
+            },
+            timeout=httpx.Timeout(30.0, write=None, read=None),
+        )
+        self.http = httpx.Client(**self._client_options)
+        self._async_http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def async_http(self) -> httpx.AsyncClient:
+        if self._async_http is None:
+            self._async_http = httpx.AsyncClient(**self._client_options)
+        return self._async_http
+
+    def _object_url(self, path: str) -> str:
+        return f"/object/{self.bucket}/{quote(check_path(path))}"
+
+    def upload(self, path: str, chunks: Iterable[bytes], content_type: Optional[str]):
+        # Iterable content is sent with chunked transfer encoding, so
+        # nothing is buffered beyond the chunk currently being sent.
+        url = self._object_url(path)
+        try:
+            response = self.http.post(
+                url,
+                content=chunks,
+                headers={
+                    "Content-Type": content_type or "application/octet-stream",
+                    "x-upsert": "false",
+                },
+            )
+        except httpx.HTTPError as e:
+            raise StorageError(f"Upload of {path} failed") from e
+
+        _check_upload(response, path)
+
+    def open_stream(
+        self,
+        path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> ObjectStream:
+        try:
+            request = self.http.build_request(
+                "GET", self._object_url(path), headers=_range_header(start, end)
+            )
+            response = self.http.send(request, stream=True)
+        except httpx.HTTPError as e:
+            raise StorageError(f"Download of {path} failed") from e
+
+        error = _download_error(response, path, start)
+        if error:
+            response.close()
+            raise error
+
+        return ObjectStream(response.iter_bytes(DOWNLOAD_CHUNK_SIZE), response.close)
+
+    def remove_many(self, paths: List[str]):
+        for i in range(0, len(paths), REMOVE_BATCH_SIZE):
+            try:
+                response = self.http.request(
+                    "DELETE",
+                    f"/object/{self.bucket}",
+                    json={"prefixes": paths[i:i + REMOVE_BATCH_SIZE]},
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                raise StorageError("Remove failed") from e
+
+    def copy(self, src: str, dst: str):
+        check_path(src)
+        check_path(dst)
+        try:
+            response = self.http.post(
+                "/object/copy",
+                json={
+                    "bucketId": self.bucket,
+                    "sourceKey": src,
+                    "destinationKey": dst,
+                },
+            )
+        except httpx.HTTPError as e:
+            raise StorageError(f"Copy of {src} failed") from e
+
+        if _is_duplicate(response):
+            raise ObjectExists(dst)
+        if response.status_code in (400, 404):
+            raise ObjectNotFound(src)
+        if response.is_error:
+            raise StorageError(f"Copy of {src} failed")
+
+
+    # -------------------------
+    # Async I/O
+    # -------------------------
+    async def aupload(
+        self,
+        path: str,
+        chunks: AsyncIterable[bytes],
+        content_type: Optional[str],
+    ):
+        url = self._object_url(path)
+        try:
+            response = await self.async_http.post(
+                url,
+                content=chunks,
+                headers={
+                    "Content-Type": content_type or "application/octet-stream",
+                    "x-upsert": "false",
+                },
+            )
+        except httpx.HTTPError as e:
+            raise StorageError(f"Upload of {path} failed") from e
+
+        _check_upload(response, path)
+
+    async def aopen_stream(
+        self,
+        path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> AsyncObjectStream:
+        try:
+            request = self.async_http.build_request(
+                "GET", self._object_url(path), headers=_range_header(start, end)
+            )
+            response = await self.async_http.send(request, stream=True)
+        except httpx.HTTPError as e:
+            raise StorageError(f"Download of {path} failed") from e
+
+        error = _download_error(response, path, start)
+        if error:
+            await response.aclose()
+            raise error
+
+        return AsyncObjectStream(response.aiter_bytes(DOWNLOAD_CHUNK_SIZE), response.aclose)
+
+    async def aclose(self):
+        self.http.close()
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
+
+
+def _range_header(start: Optional[int], end: Optional[int]) -> dict:
+    if start is None:
+        return {}
+    return {"Range": f"bytes={start}-{'' if end is None else end}"}
+
+
+def _download_error(
+    response: httpx.Response,
+    path: str,
+    start: Optional[int],
+) -> Optional[StorageError]:
+    if response.status_code in (400, 404):
+        return ObjectNotFound(path)
+
+    if response.status_code not in (200, 206) or (
+        start is not None and response.status_code != 206
+    ):
+        return StorageError(f"Unexpected storage status {response.status_code}")
+
+    return None
+
+
+def _check_upload(response: httpx.Response, path: str):
+    if _is_duplicate(response):
+        raise ObjectExists(path)
+    if response.is_error:
+        raise StorageError(f"Upload of {path} failed")
+
+
+def _is_duplicate(response: httpx.Response) -> bool:
+    # Depending on the version, storage reports a taken key either as a
+    # plain 409 or as a 400 whose body carries statusCode "409".
+    if response.status_code == 409:
+        return True
+    return response.status_code == 400 and '"409"' in response.text
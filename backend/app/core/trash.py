@@ -0,0 +1,116 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.pagination import DEFAULT_PAGE_SIZE, Keyset
+from app.core.tree import trashed_among
+from app.models.file import File
+from app.models.folder import Folder
+
+TRASH_TYPES = ("folder", "file")
+
+
+def list_trash_items(
+    db: Session,
+    owner_id: int,
+    types: Sequence[str] = TRASH_TYPES,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Top-level trash entries of a user: trashed folders and files that are
+    not inside another trashed folder. Filtering, sorting (most recently
+    trashed first) and keyset paging all happen in one SQL statement.
+
+    Returns the page and the cursor of the next one.
+    """
+    parts = []
+
+    if "folder" in types:
+        marked_parents = select(Folder.parent_id).where(
+            Folder.owner_id == owner_id,
+            Folder.is_deleted == True,
+            Folder.parent_id.isnot(None),
+        )
+        parts.append(
+            select(
+                literal("folder").label("type"),
+                Folder.id,
+                Folder.name,
+                Folder.parent_id,
+                null().label("size"),
+                null().label("mime_type"),
+                Folder.created_at,
+                Folder.deleted_at,
+            ).where(
+                Folder.owner_id == owner_id,
+                Folder.is_deleted == True,
+                or_(
+                    Folder.parent_id.is_(None),
+                    Folder.parent_id.notin_(trashed_among(marked_parents, "folder_walk")),
+                ),
+            )
+        )
+
+    if "file" in types:
+        marked_folders = select(File.folder_id).where(
+            File.owner_id == owner_id,
+            File.is_deleted == True,
+            File.folder_id.isnot(None),
+        )
+        parts.append(
+            select(
+                literal("file").label("type"),
+                File.id,
+                File.name,
+                File.folder_id.label("parent_id"),
+                File.size,
+                File.mime_type,
+                File.created_at,
+                File.deleted_at,
+            ).where(
+                File.owner_id == owner_id,
+                File.is_deleted == True,
+                or_(
+                    File.folder_id.is_(None),
+                    File.folder_id.notin_(trashed_among(marked_folders, "file_walk")),
+                ),
+            )
+        )
+
+    if not parts:
+        return [], None
+
+    items = union_all(*parts).subquery("trash")
+    # Rows trashed before deleted_at existed sort by creation time
+    trashed_at = func.coalesce(items.c.deleted_at, items.c.created_at)
+
+    page = Keyset(
+        [(trashed_at, True), (items.c.type, False), (items.c.id, True)],
+        cursor,
+        limit,
+    )
+    rows = page.finish(
+        db.execute(page.apply(select(items, trashed_at.label("trashed_at")))).mappings(),
+        lambda row: (row["trashed_at"], row["type"], row["id"]),
+    )
+
+    result = []
+    for row in rows:
+        item = {
+            "type": row["type"],
+            "id": row["id"],
+            "name": row["name"],
+            "created_at": row["created_at"],
+            "deleted_at": row["deleted_at"],
+        }
+        if row["type"] == "folder":
+            item["parent_id"] = row["parent_id"]
+        else:
+            item["folder_id"] = row["parent_id"]
+            item["size"] = row["size"]
+            item["mime_type"] = row["mime_type"]
+        result.append(item)
+
+    return result, page.next_cursor
@@ -0,0 +1,126 @@
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.folder import Folder
+
+
+def subtree_folder_ids(owner_id: int, root_id: int):
+    """
+    SELECT of the ids of `root_id` and every folder below it, resolved by
+    the database with a single recursive CTE.
+
+    Usable directly in `.in_(...)` so the whole subtree can be updated or
+    deleted with one set-based statement.
+    """
+    return subtrees_folder_ids(owner_id, [root_id])
+
+
+def subtrees_folder_ids(owner_id: int, root_ids):
+    """subtree_folder_ids() of several roots (a list or a SELECT) at once."""
+    subtree = (
+        select(Folder.id)
+        .where(Folder.id.in_(root_ids), Folder.owner_id == owner_id)
+        .cte("subtree", recursive=True)
+    )
+    subtree = subtree.union_all(
+        select(Folder.id).where(
+            Folder.parent_id == subtree.c.id,
+            Folder.owner_id == owner_id,
+        )
+    )
+    return select(subtree.c.id)
+
+
+def live_subtree(owner_id: int, folder_id: int, name: str = "live_subtree"):
+    """
+    Recursive CTE of `folder_id` and the folders below it that are not in
+    the trash: it does not descend into trashed ones. Rows carry id,
+    parent_id and name, parents before their children.
+    """
+    tree = (
+        select(Folder.id, Folder.parent_id, Folder.name)
+        .where(Folder.id == folder_id, Folder.owner_id == owner_id)
+        .cte(name, recursive=True)
+    )
+    return tree.union_all(
+        select(Folder.id, Folder.parent_id, Folder.name).where(
+            Folder.parent_id == tree.c.id,
+            Folder.owner_id == owner_id,
+            Folder.is_deleted == False,
+        )
+    )
+
+
+def trashed_among(folder_ids, name: str = "walk"):
+    """
+    SELECT of those ids in `folder_ids` (a SELECT or a list) whose folder is
+    in the trash: marked itself or below a marked ancestor.
+
+    Only the root of a trashed subtree is marked, so this walks upward from
+    each candidate and stops at the first marked folder. The cost follows
+    the candidates' depth, not the size of what sits in the trash.
+    `name` names the CTE and must differ between uses in one statement.
+    """
+    walk = (
+        select(
+            Folder.id.label("origin"),
+            Folder.parent_id,
+            Folder.is_deleted,
+        )
+        .where(Folder.id.in_(folder_ids))
+        .cte(name, recursive=True)
+    )
+    walk = walk.union_all(
+        select(
+            walk.c.origin,
+            Folder.parent_id,
+            Folder.is_deleted,
+        ).where(
+            Folder.id == walk.c.parent_id,
+            walk.c.is_deleted == False,
+        )
+    )
+    return select(walk.c.origin).where(walk.c.is_deleted == True)
+
+
+def folder_ancestors(owner_id: int, folder_id: int):
+    """
+    Recursive CTE walking from `folder_id` up to the root. Rows carry
+    id, name, parent_id, is_deleted and depth (0 for `folder_id` itself).
+    """
+    chain = (
+        select(
+            Folder.id,
+            Folder.name,
+            Folder.parent_id,
+            Folder.is_deleted,
+            literal(0).label("depth"),
+        )
+        .where(Folder.id == folder_id, Folder.owner_id == owner_id)
+        .cte("ancestors", recursive=True)
+    )
+    chain = chain.union_all(
+        select(
+            Folder.id,
+            Folder.name,
+            Folder.parent_id,
+            Folder.is_deleted,
+            (chain.c.depth + 1).label("depth"),
+        ).where(Folder.id == chain.c.parent_id)
+    )
+    return chain
+
+
+def is_folder_visible(db: Session, owner_id: int, folder_id: int) -> bool:
+    """
+    True when the folder exists, belongs to `owner_id` and neither it nor
+    any ancestor is in the trash. One query regardless of depth.
+    """
+    chain = folder_ancestors(owner_id, folder_id)
+    found, trashed = db.execute(
+        select(
+            func.count(chain.c.id),
+            func.count(case((chain.c.is_deleted == True, 1))),
+        )
+    ).one()
+    return found > 0 and trashed == 0
@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterable, List, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.blobs import BLOB_PREFIX, acquire_blob, register_blob
+from app.core.database import SessionLocal, dialect_insert
+from app.core.listing_versions import bump_listings
+from app.core.purge import enqueue_purge, enqueue_purge_paths
+from app.core.storage import StorageBackend
+from app.core.usage import adjust_rollups, charge_usage
+from app.models.file import File
+from app.models.upload_session import UploadPart, UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Part size of a session when the client does not ask for one, and the
+# range it may ask for
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", 8 * 1024 ** 2))
+UPLOAD_MIN_PART_SIZE = int(os.getenv("UPLOAD_MIN_PART_SIZE", 1024 ** 2))
+UPLOAD_MAX_PART_SIZE = int(os.getenv("UPLOAD_MAX_PART_SIZE", 256 * 1024 ** 2))
+UPLOAD_MAX_PARTS = int(os.getenv("UPLOAD_MAX_PARTS", 10000))
+
+# Sessions without activity for this long are discarded, parts and all
+UPLOAD_SESSION_TTL_SECONDS = float(os.getenv("UPLOAD_SESSION_TTL_SECONDS", 24 * 3600))
+
+# Interval of the garbage collection, in seconds
+UPLOAD_GC_SECONDS = float(os.getenv("UPLOAD_GC_SECONDS", 3600))
+
+# Storage prefix of received parts
+UPLOAD_PREFIX = "uploads"
+
+
+# -------------------------
+# Parts
+# -------------------------
+def plan_part_size(size: int, part_size: Optional[int]) -> int:
+    """Part size of a new session of `size` bytes; 400 when unworkable."""
+    part_size = part_size or UPLOAD_PART_SIZE
+    if not UPLOAD_MIN_PART_SIZE <= part_size <= UPLOAD_MAX_PART_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"part_size must be between {UPLOAD_MIN_PART_SIZE} and {UPLOAD_MAX_PART_SIZE}",
+        )
+    if part_count(size, part_size) > UPLOAD_MAX_PARTS:
+        raise HTTPException(status_code=400, detail="Too many parts: use a larger part_size")
+    return part_size
+
+
+def part_count(size: int, part_size: int) -> int:
+    # An empty file is one empty part
+    return max(1, -(-size // part_size))
+
+
+def expected_part_size(size: int, part_size: int, number: int) -> int:
+    """Size part `number` must have: part_size, except for the last one."""
+    if number < part_count(size, part_size):
+        return part_size
+    return size - (number - 1) * part_size
+
+
+def part_key(session_key: str, number: int) -> str:
+    # Unique per attempt: a part sent again never overwrites the previous
+    return f"{UPLOAD_PREFIX}/{session_key}/{number:05d}-{uuid4().hex[:8]}"
+
+
+def assembled_blob_key() -> str:
+    """Storage path of assembled content, whose hash is unknown until written."""
+    return f"{BLOB_PREFIX}/assembled/{uuid4().hex}"
+
+
+class PartBody:
+    """
+    Relays a request body to storage, counting its bytes. Stops reading
+    one byte past `limit`: an oversized part is never stored in full.
+    """
+
+    def __init__(self, chunks: AsyncIterable[bytes], limit: int):
+        self.chunks = chunks
+        self.limit = limit
+        self.size = 0
+
+    async def __aiter__(self):
+        async for chunk in self.chunks:
+            chunk = chunk[:self.limit + 1 - self.size]
+            if not chunk:
+                break
+            self.size += len(chunk)
+            yield chunk
+
+
+def record_part(
+    db: Session,
+    session_id: int,
+    owner_id: int,
+    number: int,
+    storage_path: str,
+    size: int,
+) -> bool:
+    """
+    Record a part stored at `storage_path`, replacing (and purging) any
+    earlier copy. False, with the object queued for purge, when the
+    session stopped accepting parts meanwhile.
+    """
+    touched = db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session_id, UploadSession.status == "open")
+        .values(updated_at=func.now())
+        .returning(UploadSession.id)
+    ).first()
+    if touched is None:
+        enqueue_purge_paths(db, owner_id, [storage_path])
+        return False
+
+    replaced = db.execute(
+        select(UploadPart.storage_path).where(
+            UploadPart.session_id == session_id,
+            UploadPart.part_number == number,
+        )
+    ).scalar()
+
+    db.execute(
+        dialect_insert(db, UploadPart)
+        .values(session_id=session_id, part_number=number, storage_path=storage_path, size=size)
+        .on_conflict_do_update(
+            index_elements=[UploadPart.session_id, UploadPart.part_number],
+            set_={"storage_path": storage_path, "size": size, "created_at": func.now()},
+        )
+    )
+    if replaced is not None:
+        enqueue_purge_paths(db, owner_id, [replaced])
+    return True
+
+
+def received_parts(db: Session, session_id: int) -> List[int]:
+    return [p.part_number for p in session_parts(db, session_id)]
+
+
+def session_parts(db: Session, session_id: int) -> List[Row]:
+    """(part_number, storage_path) of the received parts, in order."""
+    return db.execute(
+        select(UploadPart.part_number, UploadPart.storage_path)
+        .where(UploadPart.session_id == session_id)
+        .order_by(UploadPart.part_number)
+    ).all()
+
+
+# -------------------------
+# Completion
+# -------------------------
+def claim_session(db: Session, session_id: int, owner_id: int) -> UploadSession:
+    """
+    Switch an open session to "completing" so that it takes no more parts
+    and is completed once. 404 when it does not exist, 409 when it is
+    already being completed.
+    """
+    claimed = db.execute(
+        update(UploadSession)
+        .where(
+            UploadSession.id == session_id,
+            UploadSession.owner_id == owner_id,
+            UploadSession.status == "open",
+        )
+        .values(status="completing", updated_at=func.now())
+        .returning(UploadSession.id)
+    ).first()
+
+    session = db.get(UploadSession, session_id)
+    if session is None or session.owner_id != owner_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if claimed is None:
+        raise HTTPException(status_code=409, detail="Upload is already being completed")
+    return session
+
+
+def reopen_session(db: Session, session_id: int):
+    db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session_id)
+        .values(status="open", updated_at=func.now())
+    )
+
+
+async def assemble_parts(
+    storage: StorageBackend,
+    part_paths: List[str],
+    path: str,
+    content_type: Optional[str],
+) -> Tuple[str, int]:
+    """
+    Concatenate the part objects into a new object at `path`, streaming
+    them one after the other. Returns the SHA-256 and size of the result,
+    computed on the way through.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    async def chunks():
+        nonlocal size
+        for part in part_paths:
+            async for chunk in await storage.aopen_stream(part):
+                digest.update(chunk)
+                size += len(chunk)
+                yield chunk
+
+    await storage.aupload(path, chunks(), content_type)
+    return digest.hexdigest(), size
+
+
+def finalize_upload(
+    db: Session,
+    session_id: int,
+    sha256: str,
+    size: int,
+    storage_path: str,
+) -> dict:
+    """
+    Turn a completing session into a live file whose content was
+    assembled at `storage_path`: charge the owner's usage (413 over
+    quota), reference the content's blob, mark the File uploaded and
+    drop the session and its parts.
+    """
+    session = db.get(UploadSession, session_id)
+    file = db.get(File, session.file_id)
+    owner_id = session.owner_id
+
+    charge_usage(db, owner_id, size)
+
+    blob = acquire_blob(db, sha256)
+    if blob is None:
+        blob = register_blob(db, owner_id, sha256, size, storage_path)
+    else:
+        enqueue_purge_paths(db, owner_id, [storage_path])
+
+    file.blob_id = blob.id
+    file.storage_path = blob.storage_path
+    file.size = blob.size
+    file.is_uploaded = True
+    # Listed as new from now on
+    file.created_at = func.now()
+
+    _drop_sessions(db, UploadSession.id == session_id)
+
+    bump_listings(db, owner_id, [file.folder_id])
+    adjust_rollups(db, owner_id, file.folder_id, size, 1)
+    return {"id": file.id, "name": file.name}
+
+
+# -------------------------
+# Cleanup
+# -------------------------
+def _drop_sessions(db: Session, *criteria) -> List[int]:
+    """Delete the matching sessions and their parts; returns their file ids."""
+    sessions = select(UploadSession.id).where(*criteria)
+
+    enqueue_purge(
+        db,
+        select(UploadPart.storage_path, UploadSession.owner_id)
+        .join(UploadSession, UploadSession.id == UploadPart.session_id)
+        .where(UploadPart.session_id.in_(sessions)),
+    )
+    db.query(UploadPart).filter(
+        UploadPart.session_id.in_(sessions)
+    ).delete(synchronize_session=False)
+
+    file_ids = list(db.execute(select(UploadSession.file_id).where(*criteria)).scalars())
+    db.query(UploadSession).filter(*criteria).delete(synchronize_session=False)
+    return file_ids
+
+
+def discard_uploads(db: Session, *criteria):
+    """
+    Abandon the sessions matching `criteria` (WHERE clauses on
+    UploadSession): their parts are queued for purge and their pending
+    File rows deleted. In the caller's transaction.
+    """
+    file_ids = _drop_sessions(db, *criteria)
+    if file_ids:
+        db.query(File).filter(
+            File.id.in_(file_ids),
+            File.is_uploaded == False,
+        ).delete(synchronize_session=False)
+
+
+def expire_upload_sessions(db: Session, now: Optional[datetime] = None) -> int:
+    """Discard sessions idle for UPLOAD_SESSION_TTL_SECONDS; returns how many."""
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+
+    expired = list(db.execute(
+        select(UploadSession.id).where(UploadSession.updated_at < cutoff)
+    ).scalars())
+    if expired:
+        discard_uploads(db, UploadSession.id.in_(expired))
+    return len(expired)
+
+
+def _expire_all() -> int:
+    db = SessionLocal()
+    try:
+        expired = expire_upload_sessions(db)
+        db.commit()
+        return expired
+    finally:
+        db.close()
+
+
+async def upload_gc_worker():
+    """Periodic garbage collection of abandoned upload sessions."""
+    while True:
+        await asyncio.sleep(UPLOAD_GC_SECONDS)
+        try:
+            expired = await run_in_threadpool(_expire_all)
+        except Exception:
+            logger.exception("Upload session garbage collection failed")
+            continue
+
+        if expired:
+            logger.info("Discarded %d abandoned upload sessions", expired)
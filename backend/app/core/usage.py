@@ -0,0 +1,359 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import BigInteger, and_, case, cast, func, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, dialect_insert
+from app.core.listing_versions import bump_listings
+from app.models.file import File
+from app.models.folder import Folder
+from app.models.user import User
+from app.models.user_usage import UserUsage
+
+logger = logging.getLogger(__name__)
+
+# Default per-user quota; 0 means unlimited. UserUsage.quota_bytes
+# overrides it per user.
+USER_QUOTA_BYTES = int(os.getenv("USER_QUOTA_BYTES", 15 * 1024 ** 3))
+
+# Interval of the background reconciliation, in seconds (0: disabled)
+USAGE_RECONCILE_SECONDS = float(os.getenv("USAGE_RECONCILE_SECONDS", 6 * 3600))
+
+
+def _quota():
+    return func.coalesce(UserUsage.quota_bytes, USER_QUOTA_BYTES)
+
+
+def _within_quota(size: int):
+    return or_(_quota() <= 0, UserUsage.total_bytes + size <= _quota())
+
+
+def _quota_exceeded() -> HTTPException:
+    return HTTPException(status_code=413, detail="Storage quota exceeded")
+
+
+# -------------------------
+# Per-user usage
+# -------------------------
+def ensure_usage(db: Session, user_id: int):
+    """Create the user's (empty) usage row if it is missing."""
+    db.execute(
+        dialect_insert(db, UserUsage)
+        .values(user_id=user_id, total_bytes=0, file_count=0)
+        .on_conflict_do_nothing(index_elements=[UserUsage.user_id])
+    )
+
+
+def check_quota(db: Session, user_id: int, size: int):
+    """
+    Early, read-only quota check (one primary-key lookup), so an upload
+    over quota is refused before it is transferred. charge_usage() is the
+    authoritative check.
+    """
+    allowed = db.execute(
+        select(_within_quota(size)).where(UserUsage.user_id == user_id)
+    ).scalar()
+    if allowed is False:
+        raise _quota_exceeded()
+
+
+def charge_usage(db: Session, user_id: int, size: int, count: int = 1):
+    """
+    Add new files to the user's usage, atomically refusing (413) when the
+    result would exceed their quota. A single conditional UPDATE.
+    """
+    for _ in range(2):
+        charged = db.execute(
+            update(UserUsage)
+            .where(UserUsage.user_id == user_id, _within_quota(size))
+            .values(
+                total_bytes=UserUsage.total_bytes + size,
+                file_count=UserUsage.file_count + count,
+                updated_at=func.now(),
+            )
+            .returning(UserUsage.user_id)
+        ).first()
+        if charged is not None:
+            return
+
+        exists = db.execute(
+            select(UserUsage.user_id).where(UserUsage.user_id == user_id)
+        ).first()
+        if exists is not None:
+            raise _quota_exceeded()
+        ensure_usage(db, user_id)
+
+    raise _quota_exceeded()
+
+
+def get_usage(db: Session, user_id: int) -> dict:
+    """The user's usage and effective quota (None: unlimited)."""
+    row = db.execute(
+        select(UserUsage.total_bytes, UserUsage.file_count, _quota().label("quota"))
+        .where(UserUsage.user_id == user_id)
+    ).first()
+    if row is None:
+        return {"total_bytes": 0, "file_count": 0, "quota_bytes": USER_QUOTA_BYTES or None}
+    return {
+        "total_bytes": row.total_bytes,
+        "file_count": row.file_count,
+        "quota_bytes": row.quota if row.quota > 0 else None,
+    }
+
+
+def release_usage(db: Session, *criteria):
+    """
+    Credit back the files matching `criteria` (WHERE clauses on File) to
+    their owners, before those rows are permanently deleted.
+    """
+    files = and_(File.is_uploaded == True, *criteria)
+    db.execute(
+        update(UserUsage)
+        .where(UserUsage.user_id.in_(select(File.owner_id).where(files)))
+        .values(
+            total_bytes=UserUsage.total_bytes - (
+                select(func.coalesce(func.sum(File.size), 0))
+                .where(File.owner_id == UserUsage.user_id, files)
+                .scalar_subquery()
+            ),
+            file_count=UserUsage.file_count - (
+                select(func.count(File.id))
+                .where(File.owner_id == UserUsage.user_id, files)
+                .scalar_subquery()
+            ),
+            updated_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+# -------------------------
+# Folder rollups
+# -------------------------
+def adjust_rollups(
+    db: Session,
+    owner_id: int,
+    folder_id: Optional[int],
+    size: int,
+    count: int,
+):
+    """
+    Add `size` / `count` (negative to subtract) to `folder_id` and the
+    ancestors that include it in their totals: the walk goes up to and
+    including the first trashed folder, since folders above that one no
+    longer count its subtree. Listings showing the changed folders are
+    bumped. Cost follows the depth, one UPDATE whatever the depth.
+    """
+    adjust_rollups_many(db, owner_id, {folder_id: (size, count)})
+
+
+def adjust_rollups_many(
+    db: Session,
+    owner_id: int,
+    deltas: Dict[Optional[int], Tuple[int, int]],
+):
+    """
+    adjust_rollups() from several folders at once: `deltas` maps folder
+    ids (None: the root, ignored) to (size, count). All the chains are
+    walked by one recursive CTE and their sums applied by one UPDATE.
+
+    Call it once the change is applied: the walks see the folders' new
+    parents and trash markers.
+    """
+    deltas = {
+        folder_id: delta for folder_id, delta in deltas.items()
+        if folder_id is not None and (delta[0] or delta[1])
+    }
+    if not deltas:
+        return
+
+    def per_folder(index: int):
+        values = {folder_id: delta[index] for folder_id, delta in deltas.items()}
+        return cast(case(values, value=Folder.id), BigInteger)
+
+    walk = (
+        select(
+            Folder.id,
+            Folder.parent_id,
+            Folder.is_deleted,
+            per_folder(0).label("size"),
+            per_folder(1).label("count"),
+        )
+        .where(Folder.id.in_(list(deltas)), Folder.owner_id == owner_id)
+        .cte("rollup_walk", recursive=True)
+    )
+    walk = walk.union_all(
+        select(
+            Folder.id,
+            Folder.parent_id,
+            Folder.is_deleted,
+            walk.c.size,
+            walk.c.count,
+        ).where(
+            Folder.id == walk.c.parent_id,
+            walk.c.is_deleted == False,
+        )
+    )
+    rows = db.execute(
+        select(
+            walk.c.id,
+            walk.c.parent_id,
+            func.sum(walk.c.size).label("size"),
+            func.sum(walk.c.count).label("count"),
+        ).group_by(walk.c.id, walk.c.parent_id)
+    ).all()
+    rows = [row for row in rows if row.size or row.count]
+    if not rows:
+        return
+
+    db.execute(
+        update(Folder)
+        .where(Folder.id.in_([row.id for row in rows]))
+        .values(
+            total_bytes=Folder.total_bytes + case(
+                {row.id: int(row.size) for row in rows}, value=Folder.id
+            ),
+            file_count=Folder.file_count + case(
+                {row.id: int(row.count) for row in rows}, value=Folder.id
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Each changed folder is shown, with its totals, in its parent
+    bump_listings(db, owner_id, {row.parent_id for row in rows})
+
+
+# -------------------------
+# Reconciliation
+# -------------------------
+def _expected_rollups(owner_id: Optional[int]):
+    """
+    SELECT of (folder id, total_bytes, file_count) computed from scratch:
+    a downward closure from every folder that does not descend into
+    trashed subfolders, joined to the live files of each reached folder.
+    """
+    roots = select(Folder.id.label("ancestor"), Folder.id.label("folder_id"))
+    if owner_id is not None:
+        roots = roots.where(Folder.owner_id == owner_id)
+
+    closure = roots.cte("rollup_closure", recursive=True)
+    closure = closure.union_all(
+        select(closure.c.ancestor, Folder.id).where(
+            Folder.parent_id == closure.c.folder_id,
+            Folder.is_deleted == False,
+        )
+    )
+
+    return (
+        select(
+            closure.c.ancestor.label("id"),
+            func.coalesce(func.sum(File.size), 0).label("total_bytes"),
+            func.count(File.id).label("file_count"),
+        )
+        .select_from(closure)
+        .outerjoin(File, and_(
+            File.folder_id == closure.c.folder_id,
+            File.is_deleted == False,
+            File.is_uploaded == True,
+        ))
+        .group_by(closure.c.ancestor)
+        .subquery("expected_rollups")
+    )
+
+
+def _expected_usage(owner_id: Optional[int]):
+    users = select(User.id)
+    if owner_id is not None:
+        users = users.where(User.id == owner_id)
+    users = users.subquery("usage_users")
+
+    return (
+        select(
+            users.c.id,
+            func.coalesce(func.sum(File.size), 0).label("total_bytes"),
+            func.count(File.id).label("file_count"),
+        )
+        .select_from(users)
+        .outerjoin(File, and_(File.owner_id == users.c.id, File.is_uploaded == True))
+        .group_by(users.c.id)
+        .subquery("expected_usage")
+    )
+
+
+def _reconcile(db: Session, table, key, expected, fix: bool) -> dict:
+    drifted = and_(
+        key == expected.c.id,
+        or_(
+            table.total_bytes != expected.c.total_bytes,
+            table.file_count != expected.c.file_count,
+        ),
+    )
+    rows, byte_drift = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(func.abs(table.total_bytes - expected.c.total_bytes)), 0),
+        ).where(drifted)
+    ).one()
+
+    if fix and rows:
+        db.execute(
+            update(table)
+            .where(drifted)
+            .values(total_bytes=expected.c.total_bytes, file_count=expected.c.file_count)
+            .execution_options(synchronize_session=False)
+        )
+
+    return {"drifted": rows, "bytes": byte_drift}
+
+
+def reconcile_usage(db: Session, owner_id: Optional[int] = None, fix: bool = True) -> dict:
+    """
+    Recompute folder rollups and user usage in bulk (everyone's, or one
+    owner's) and report how far the stored counters had drifted. With
+    `fix`, drifted counters are overwritten. Does not commit.
+    """
+    # The WHERE is required: SQLite cannot parse INSERT ... SELECT ... ON
+    # CONFLICT without one
+    users = select(User.id, literal(0), literal(0)).where(
+        User.id == owner_id if owner_id is not None else User.id.isnot(None)
+    )
+    db.execute(
+        dialect_insert(db, UserUsage)
+        .from_select([UserUsage.user_id, UserUsage.total_bytes, UserUsage.file_count], users)
+        .on_conflict_do_nothing(index_elements=[UserUsage.user_id])
+    )
+
+    report = {
+        "folders": _reconcile(db, Folder, Folder.id, _expected_rollups(owner_id), fix),
+        "users": _reconcile(db, UserUsage, UserUsage.user_id, _expected_usage(owner_id), fix),
+    }
+    return report
+
+
+def _reconcile_all() -> dict:
+    db = SessionLocal()
+    try:
+        report = reconcile_usage(db)
+        db.commit()
+        return report
+    finally:
+        db.close()
+
+
+async def reconcile_worker():
+    """Periodic reconciliation, logging any drift it corrected."""
+    while True:
+        await asyncio.sleep(USAGE_RECONCILE_SECONDS)
+        try:
+            report = await run_in_threadpool(_reconcile_all)
+        except Exception:
+            logger.exception("Usage reconciliation failed")
+            continue
+
+        if report["folders"]["drifted"] or report["users"]["drifted"]:
+            logger.warning("Usage counters drifted and were corrected: %s", report)
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+# Seconds a verified token keeps resolving to its cached user without a
+# database round trip (never beyond the token's own exp)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+
+# Tokens kept; the least recently used one is dropped beyond that
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+
+
+class UserCache:
+    """
+    LRU cache of authenticated principals, keyed by access token.
+
+    A hit skips both the JWT verification and the users lookup. Entries
+    are indexed by user id as well so that every token of a user can be
+    dropped at once when that user changes or is deleted.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._tokens: Dict[int, Set[str]] = {}
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+
+            user, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._drop(token)
+                return None
+
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: User, token_exp: Optional[float] = None):
+        """Cache `user` for `token`; `token_exp` is the token's exp claim."""
+        lifetime = self.ttl
+        if token_exp is not None:
+            lifetime = min(lifetime, token_exp - time.time())
+        if lifetime <= 0 or self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (user, time.monotonic() + lifetime)
+            self._tokens.setdefault(user.id, set()).add(token)
+
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            for token in list(self._tokens.get(user_id, ())):
+                self._drop(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+
+        user_id = entry[0].id
+        tokens = self._tokens.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens[user_id]
+
+
+user_cache = UserCache(USER_CACHE_TTL, USER_CACHE_SIZE)
+
+
+# -------------------------
+# Invalidation
+# -------------------------
+# Users updated or deleted through the ORM are dropped from the cache as
+# soon as they are flushed, and again once the transaction ends, so a
+# concurrent request cannot re-cache the old row in between. Bulk
+# query().update() / delete() on users bypasses these hooks and must call
+# user_cache.invalidate() itself.
+_CHANGED_USERS = "changed_user_ids"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = {
+        obj.id
+        for obj in (*session.dirty, *session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    if not changed:
+        return
+
+    session.info.setdefault(_CHANGED_USERS, set()).update(changed)
+    for user_id in changed:
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        user_cache.invalidate(user_id)
@@ -1,7 +1,19 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.database import engine, Base
+from app.core.database import async_engine, engine, Base
+from app.core.copies import copy_worker
+from app.core.migrations import run_migrations
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.pool import pool_stats
+from app.core.purge import purge_worker
+from app.core.security import hash_pool
+from app.core.storage import get_storage
+from app.core.uploads import upload_gc_worker
+from app.core.usage import USAGE_RECONCILE_SECONDS, reconcile_worker
 
 # Models
 from app.models.user import User
@@ -9,11 +21,42 @@ from app.models.folder import Folder
 from app.models.file import File
 from app.models.share import Share
 from app.models.link_share import LinkShare
+from app.models.storage_purge import StoragePurge
+from app.models.listing_version import ListingVersion
+from app.models.blob import Blob
+from app.models.user_usage import UserUsage
+from app.models.upload_session import UploadSession, UploadPart
+from app.models.copy_job import CopyJob
 
 # Routes
-from app.routes import auth, folders, files, shares, search, trash, shared, public
+from app.routes import auth, browse, folders, files, shares, search, trash, shared, public, usage, uploads, bulk, copies
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    storage = get_storage()
+
+    # Background workers
+    workers = [
+        asyncio.create_task(purge_worker(storage)),
+        asyncio.create_task(upload_gc_worker()),
+        asyncio.create_task(copy_worker(storage)),
+    ]
+    if USAGE_RECONCILE_SECONDS > 0:
+        workers.append(asyncio.create_task(reconcile_worker()))
+
+    yield
+
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
 
-app = FastAPI(title="CloudVault Backend")
+    await storage.aclose()
+    await async_engine.dispose()
+    hash_pool.shutdown()
+
+
+app = FastAPI(title="CloudVault Backend", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -22,13 +65,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # DB
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 # Routers
 app.include_router(auth.router)
+app.include_router(browse.router)
 app.include_router(folders.router)
 app.include_router(files.router)
 app.include_router(shares.router)
@@ -36,8 +82,27 @@ app.include_router(search.router)
 app.include_router(trash.router)
 app.include_router(shared.router)
 app.include_router(public.router)
+app.include_router(usage.router)
+app.include_router(uploads.router)
+app.include_router(bulk.router)
+app.include_router(copies.router)
 
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/health/db")
+def health_db():
+    # Pool occupancy and checkout waits, per engine
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine),
+    }
+
+
+@app.get("/health/auth")
+def health_auth():
+    # Password hash pool load: running / queued jobs and rejections
+    return hash_pool.stats()
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class Blob(Base):
+    """
+    Stored content shared by every File with the same SHA-256. refcount
+    counts those File rows (trashed ones included); the object is purged
+    from storage when the last of them is permanently deleted.
+    """
+
+    __tablename__ = "blobs"
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    storage_path = Column(String, nullable=False)
+
+    refcount = Column(Integer, nullable=False, default=1)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class CopyJob(Base):
+    """
+    A folder copy. Small ones are done within the request; larger ones
+    are left pending for the copy worker (app.core.copies). The copy is
+    committed as a whole together with the job's "done" status: nothing
+    of it is visible before.
+    """
+
+    __tablename__ = "copy_jobs"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    # Source and destination (None: the root), and the name of the copy.
+    # Not foreign keys: a job outlives the folders it names.
+    folder_id = Column(Integer, nullable=False)
+    target_folder_id = Column(Integer, nullable=True)
+    name = Column(String, nullable=False)
+
+    # pending / running / done / failed
+    status = Column(String, nullable=False, default="pending")
+
+    # Folders and files to copy, and copied so far
+    total_items = Column(Integer, nullable=False, default=0)
+    copied_items = Column(Integer, nullable=False, default=0)
+
+    result_folder_id = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Last progress; running jobs that stop moving were interrupted
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_copy_jobs_status", status, updated_at),
+    )
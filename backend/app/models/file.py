@@ -1,14 +1,16 @@
 from sqlalchemy import (
     Column,
     Integer,
+    BigInteger,
     String,
     Boolean,
     ForeignKey,
     DateTime,
+    Index,
 )
 from sqlalchemy.sql import func
 
-from app.core.database import Base
+from app.core.database import Base, partial_index
 
 
 class File(Base):
@@ -20,15 +22,35 @@ class File(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     folder_id = Column(Integer, ForeignKey("folders.id"), nullable=True)
 
+    # Content, shared with identical files. storage_path repeats the
+    # blob's path; files uploaded before deduplication have no blob.
+    blob_id = Column(Integer, ForeignKey("blobs.id"), nullable=True)
     storage_path = Column(String, nullable=True)
 
-    size = Column(Integer, nullable=True)
+    size = Column(BigInteger, nullable=True)
     mime_type = Column(String, nullable=True)
 
     is_uploaded = Column(Boolean, default=False)
+    # Set only on the file itself when it is trashed; files inside a
+    # trashed folder stay unmarked (see app.core.tree.trashed_among)
     is_deleted = Column(Boolean, default=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
     )
+
+    __table_args__ = (
+        # Drive listing: one folder's live files, newest first
+        partial_index(
+            "ix_files_listing",
+            owner_id, folder_id, created_at, id,
+            where=(is_deleted == False) & (is_uploaded == True),
+        ),
+        partial_index("ix_files_trash", owner_id, where=is_deleted == True),
+        # Subtree deletes and moves
+        Index("ix_files_folder_id", folder_id),
+        # Reference counting on permanent deletes
+        Index("ix_files_blob_id", blob_id),
+    )
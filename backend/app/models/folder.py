@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, partial_index
 
 
 class Folder(Base):
@@ -12,6 +12,26 @@ class Folder(Base):
     parent_id = Column(Integer, ForeignKey("folders.id"), nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+    # Trash tombstone: only the root of a trashed subtree is marked
     is_deleted = Column(Boolean, default=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Rolled-up live content of the subtree: files not trashed and not
+    # below a trashed subfolder. A trashed folder keeps its own totals.
+    # Maintained incrementally (app.core.usage).
+    total_bytes = Column(BigInteger, nullable=False, default=0, server_default="0")
+    file_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Drive listing: one folder's live subfolders
+        partial_index(
+            "ix_folders_listing",
+            owner_id, parent_id, id,
+            where=is_deleted == False,
+        ),
+        partial_index("ix_folders_trash", owner_id, where=is_deleted == True),
+        # Recursive subtree walks
+        Index("ix_folders_parent_id", parent_id),
+    )
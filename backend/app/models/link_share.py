@@ -7,7 +7,7 @@ class LinkShare(Base):
     __tablename__ = "link_shares"
 
     id = Column(Integer, primary_key=True)
-    folder_id = Column(Integer, ForeignKey("folders.id"))
+    folder_id = Column(Integer, ForeignKey("folders.id"), index=True)
     token = Column(String, unique=True)
     expires_at = Column(DateTime)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
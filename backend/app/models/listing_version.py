@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ListingVersion(Base):
+    """
+    Change counter of one folder's listing (its subfolders and files),
+    bumped in the same transaction as every change to that listing.
+    folder_id 0 stands for the owner's root.
+    """
+
+    __tablename__ = "listing_versions"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    folder_id = Column(Integer, primary_key=True)
+
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
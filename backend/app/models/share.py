@@ -6,8 +6,8 @@ class Share(Base):
     __tablename__ = "shares"
 
     id = Column(Integer, primary_key=True)
-    file_id = Column(Integer, ForeignKey("files.id"), nullable=True)
-    folder_id = Column(Integer, ForeignKey("folders.id"), nullable=True)
+    file_id = Column(Integer, ForeignKey("files.id"), nullable=True, index=True)
+    folder_id = Column(Integer, ForeignKey("folders.id"), nullable=True, index=True)
 
-    shared_with_user_id = Column(Integer, ForeignKey("users.id"))
+    shared_with_user_id = Column(Integer, ForeignKey("users.id"), index=True)
     role = Column(String)  # owner / editor / viewer
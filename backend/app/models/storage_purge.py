@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class StoragePurge(Base):
+    """
+    A storage object waiting to be removed. Rows are written in the same
+    transaction that deletes the owning File rows and removed once the
+    object is gone from storage.
+    """
+
+    __tablename__ = "storage_purges"
+
+    id = Column(Integer, primary_key=True)
+    storage_path = Column(String, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    # NULL once the entry has been given up on (PURGE_MAX_ATTEMPTS)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class UploadSession(Base):
+    """
+    A resumable upload in progress. Its File row exists from the start
+    with is_uploaded=False and is finalized when the session completes;
+    parts are stored as separate objects until then.
+    """
+
+    __tablename__ = "upload_sessions"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    file_id = Column(Integer, ForeignKey("files.id"), nullable=False, unique=True)
+
+    # Storage prefix of the parts
+    key = Column(String, nullable=False, unique=True)
+
+    size = Column(BigInteger, nullable=False)
+    part_size = Column(Integer, nullable=False)
+
+    # open / completing
+    status = Column(String, nullable=False, default="open")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Last activity; idle sessions are garbage-collected
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_upload_sessions_updated_at", updated_at),
+    )
+
+
+class UploadPart(Base):
+    """One received part of an upload session (numbered from 1)."""
+
+    __tablename__ = "upload_parts"
+
+    session_id = Column(Integer, ForeignKey("upload_sessions.id"), primary_key=True)
+    part_number = Column(Integer, primary_key=True)
+
+    storage_path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class UserUsage(Base):
+    """
+    Storage a user is charged for: every uploaded file they own, trashed
+    ones included, at its full size (deduplication is not credited).
+    Maintained incrementally; see app.core.usage.
+    """
+
+    __tablename__ = "user_usage"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    total_bytes = Column(BigInteger, nullable=False, default=0, server_default="0")
+    file_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # NULL: USER_QUOTA_BYTES applies
+    quota_bytes = Column(BigInteger, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
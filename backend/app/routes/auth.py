@@ -1,44 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.deps import get_async_db
 from app.models.user import User
 from app.schemas.auth import RegisterRequest, LoginRequest
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password_async, verify_and_update_async
 from app.core.jwt import create_access_token
+from app.core.usage import ensure_usage
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
+# Async so that the event loop is free while bcrypt runs in the hash pool
+# (app.core.security)
 @router.post("/register")
-def register(data: RegisterRequest, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == data.email).first()
+async def register(data: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    existing = (await db.execute(select(User.id).where(User.email == data.email))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     user = User(
         email=data.email,
-        password_hash=hash_password(data.password)
+        password_hash=await hash_password_async(data.password)
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.flush()
+    await db.run_sync(ensure_usage, user.id)
+    await db.commit()
 
     return {"message": "User registered successfully"}
 
 
 @router.post("/login")
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.password_hash):
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).where(User.email == data.email))).scalar_one_or_none()
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    valid, new_hash = await verify_and_update_async(data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Hashed with an old cost factor: upgrade it now that we have the password
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
     token = create_access_token({"user_id": user.id})
     return {"access_token": token, "token_type": "bearer"}
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.deps import get_current_user, get_db
+from app.core.listing import file_page, folder_page
+from app.core.listing_versions import not_modified
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
+from app.core.responses import fast_json, row_dicts
+from app.core.tree import folder_ancestors
+from app.models.user import User
+from app.schemas.folder import BrowseOut
+
+router = APIRouter(prefix="/browse", tags=["Browse"])
+
+# A browse page lists subfolders first, then files. Its cursor names the
+# list it continues ("d." / "f.") followed by that list's own cursor; a
+# bare "f." starts the files.
+_FOLDERS = "d."
+_FILES = "f."
+
+
+def _split_cursor(cursor: Optional[str]):
+    if not cursor:
+        return _FOLDERS, None
+    for phase in (_FOLDERS, _FILES):
+        if cursor.startswith(phase):
+            return phase, cursor[len(phase):] or None
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _path(db: Session, owner_id: int, folder_id: int):
+    """Root-first chain down to `folder_id`; 404 unless it is visible."""
+    chain = folder_ancestors(owner_id, folder_id)
+    rows = db.execute(
+        select(chain.c.id, chain.c.name, chain.c.parent_id, chain.c.is_deleted)
+        .order_by(chain.c.depth.desc())
+    ).all()
+
+    if not rows or any(row.is_deleted for row in rows):
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    return [{"id": row.id, "name": row.name, "parent_id": row.parent_id} for row in rows]
+
+
+def _has_files(db: Session, owner_id: int, folder_id: Optional[int]) -> bool:
+    files, _ = file_page(db, owner_id, folder_id, 1)
+    return bool(files)
+
+
+# -------------------------
+# BROWSE a folder (Drive view in one request)
+# -------------------------
+@router.get("", response_model=BrowseOut)
+@router.get("/{folder_id}", response_model=BrowseOut)
+def browse(
+    response: Response,
+    folder_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Everything the Drive view of a folder (none: the root) needs: the
+    path from the root down to it for breadcrumbs, its subfolders and its
+    files. A constant number of queries whatever the depth.
+
+    Up to `limit` entries per page, subfolders first; X-Next-Cursor
+    continues. Cacheable like /folders and /files (ETag, If-None-Match).
+    """
+    cached = not_modified(
+        db, response, current_user.id, folder_id, if_none_match,
+        "browse", cursor, limit,
+    )
+    if cached is not None:
+        return cached
+
+    phase, inner = _split_cursor(cursor)
+    path = [] if folder_id is None else _path(db, current_user.id, folder_id)
+
+    folders, files, next_cursor = [], [], None
+
+    if phase == _FOLDERS:
+        folders, page = folder_page(db, current_user.id, folder_id, limit, inner)
+        if page.next_cursor:
+            next_cursor = _FOLDERS + page.next_cursor
+        elif len(folders) == limit:
+            # Page filled by folders alone; only continue if files follow
+            if _has_files(db, current_user.id, folder_id):
+                next_cursor = _FILES
+        else:
+            inner = None
+            phase = _FILES
+
+    if phase == _FILES and next_cursor is None:
+        files, page = file_page(db, current_user.id, folder_id, limit - len(folders), inner)
+        if page.next_cursor:
+            next_cursor = _FILES + page.next_cursor
+
+    set_next_cursor(response, next_cursor)
+
+    return fast_json({
+        "folder": path[-1] if path else None,
+        "path": path,
+        "folders": row_dicts(folders),
+        "files": row_dicts(files),
+    }, response)
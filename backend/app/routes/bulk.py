@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.bulk import BULK_MAX_ITEMS, run_bulk
+from app.core.deps import get_db, get_current_user
+from app.core.purge import notify_purge_worker
+from app.core.responses import fast_json
+from app.models.user import User
+from app.schemas.bulk import BulkRequest, BulkResult
+
+router = APIRouter(prefix="/bulk", tags=["Bulk"])
+
+
+@router.post("", response_model=BulkResult)
+def bulk_operation(
+    data: BulkRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Move, trash, restore or permanently delete many files and folders at
+    once, in one transaction. Each item gets its own status: "ok",
+    "not_found" (missing, not the caller's, or not in a state the action
+    applies to) or "conflict" (a folder moved into its own subtree).
+    """
+    if len(data.files) + len(data.folders) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+    results = run_bulk(
+        db,
+        current_user.id,
+        data.action,
+        data.files,
+        data.folders,
+        data.target_folder_id,
+    )
+    db.commit()
+
+    if data.action == "delete":
+        notify_purge_worker()
+
+    return fast_json({"results": results})
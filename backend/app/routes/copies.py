@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db, get_current_user
+from app.models.copy_job import CopyJob
+from app.models.user import User
+from app.schemas.copy import CopyJobOut
+
+router = APIRouter(prefix="/copies", tags=["Copies"])
+
+
+@router.get("/{job_id}", response_model=CopyJobOut)
+def get_copy_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Status and progress of a folder copy (POST /folders/{id}/copy)."""
+    job = db.query(CopyJob).filter(
+        CopyJob.id == job_id,
+        CopyJob.owner_id == current_user.id,
+    ).first()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Copy not found")
+    return job
@@ -1,75 +1,130 @@
-from fastapi import APIRouter, Depends, UploadFile, File as FastFile, HTTPException
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, UploadFile, File as FastFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
-from uuid import uuid4
-import os
-import io
 
-from supabase import create_client
-
-from app.core.database import SessionLocal
-from app.core.deps import get_current_user
+from app.core.batch_uploads import (
+    BATCH_UPLOAD_MAX_FILES,
+    BatchItem,
+    hash_items,
+    pending,
+    record_batch,
+    store_items,
+    stored_paths,
+)
+from app.core.blobs import (
+    acquire_blob,
+    blob_key,
+    hash_file,
+    known_blobs,
+    register_blob,
+)
+from app.core.bulk import delete_file_rows, move_item, rename_item
+from app.core.copies import copy_file
+from app.core.deps import get_async_db, get_current_user, get_db
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    set_next_cursor,
+)
+from app.core.http_range import http_date, if_range_matches, parse_range
+from app.core.listing import file_page
+from app.core.listing_versions import bump_listings, not_modified
+from app.core.purge import enqueue_purge_paths, notify_purge_worker
+from app.core.responses import fast_json, row_dicts
+from app.core.storage import (
+    UPLOAD_CHUNK_SIZE,
+    InvalidStoragePath,
+    ObjectNotFound,
+    StorageBackend,
+    StorageError,
+    check_path,
+    get_storage,
+)
+from app.core.trash import list_trash_items
+from app.core.tree import is_folder_visible
+from app.core.usage import adjust_rollups, charge_usage, check_quota
 from app.models.file import File
 from app.models.user import User
-from app.schemas.file import FileOut
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+from app.schemas.copy import CopyRequest
+from app.schemas.file import FileOut, FileUpdate
+from app.schemas.trash import TrashItemOut
 
 router = APIRouter(prefix="/files", tags=["Files"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # --------------------
 # GET FILES
 # --------------------
 @router.get("", response_model=List[FileOut])
 def get_files(
+    response: Response,
     folder_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = db.query(File).filter(
-        File.owner_id == current_user.id,
-        File.is_deleted == False,
-        File.is_uploaded == True,
+    cached = not_modified(
+        db, response, current_user.id, folder_id, if_none_match,
+        "files", cursor, limit,
     )
+    if cached is not None:
+        return cached
 
-    if folder_id is not None:
-        query = query.filter(File.folder_id == folder_id)
-    else:
-        query = query.filter(File.folder_id.is_(None))
+    if folder_id is not None and not is_folder_visible(db, current_user.id, folder_id):
+        return []
 
-    return query.order_by(File.created_at.desc()).all()
+    files, page = file_page(db, current_user.id, folder_id, limit, cursor)
+    set_next_cursor(response, page.next_cursor)
+
+    return fast_json(row_dicts(files), response)
 
 
 # --------------------
 # GET TRASH FILES
 # --------------------
-@router.get("/trash", response_model=List[FileOut])
+@router.get("/trash", response_model=List[TrashItemOut])
 def get_trash_files(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return (
-        db.query(File)
-        .filter(
-            File.owner_id == current_user.id,
-            File.is_deleted == True,
-        )
-        .order_by(File.created_at.desc())
-        .all()
-    )
+    items, next_cursor = list_trash_items(db, current_user.id, ("file",), limit, cursor)
+    set_next_cursor(response, next_cursor)
+
+    return fast_json(items, response)
+
+
+# --------------------
+# Helper: read an upload in fixed-size chunks
+# --------------------
+class ChunkedUpload:
+    """
+    Iterates over an UploadFile in UPLOAD_CHUNK_SIZE pieces and counts the
+    bytes that went through, so the size is known once the stream is consumed.
+    """
+
+    def __init__(self, file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.size = 0
+
+    async def __aiter__(self):
+        await self.file.seek(0)
+        while True:
+            chunk = await self.file.read(self.chunk_size)
+            if not chunk:
+                break
+            self.size += len(chunk)
+            yield chunk
 
 
 # --------------------
@@ -79,62 +134,260 @@ def get_trash_files(
 async def upload_file(
     file: UploadFile = FastFile(...),
     folder_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
 ):
-    storage_path = f"{current_user.id}/{uuid4()}_{file.filename}"
-    data = await file.read()
-
-    supabase.storage.from_("files").upload(
-        path=storage_path,
-        file=data,
-        file_options={"content-type": file.content_type},
-    )
+    # Names used to be part of the storage path; the same rules still apply
+    try:
+        check_path(file.filename)
+    except InvalidStoragePath:
+        raise HTTPException(status_code=400, detail="Invalid file name")
+
+    # The body is already spooled locally; hash it before deciding
+    # whether storage needs to see it at all
+    digest, size = await run_in_threadpool(hash_file, file.file)
+    await db.run_sync(check_quota, current_user.id, size)
+
+    blob = await db.run_sync(acquire_blob, digest)
+    if blob is None:
+        # New content. Don't hold a connection during the transfer.
+        await db.rollback()
+
+        storage_path = blob_key(digest)
+        try:
+            await storage.aupload(storage_path, ChunkedUpload(file), file.content_type)
+        except StorageError:
+            raise HTTPException(status_code=502, detail="Storage upload failed")
+
+        try:
+            await db.run_sync(charge_usage, current_user.id, size)
+        except HTTPException:
+            # Quota used up meanwhile: the object just stored is unwanted
+            await db.rollback()
+            await db.run_sync(enqueue_purge_paths, current_user.id, [storage_path])
+            await db.commit()
+            raise
+
+        blob = await db.run_sync(register_blob, current_user.id, digest, size, storage_path)
+    else:
+        await db.run_sync(charge_usage, current_user.id, size)
 
     db_file = File(
         name=file.filename,
         owner_id=current_user.id,
         folder_id=folder_id,
-        storage_path=storage_path,
-        size=len(data),
+        blob_id=blob.id,
+        storage_path=blob.storage_path,
+        size=blob.size,
         mime_type=file.content_type,
         is_uploaded=True,
     )
 
     db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    await db.run_sync(bump_listings, current_user.id, [folder_id])
+    await db.run_sync(adjust_rollups, current_user.id, folder_id, size, 1)
+    await db.commit()
 
     return {"id": db_file.id, "name": db_file.name}
 
 
 # --------------------
-# DOWNLOAD
+# BATCH UPLOAD (many files in one multipart request)
+# --------------------
+@router.post("/upload/batch")
+async def upload_files_batch(
+    request: Request,
+    folder_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
+):
+    """
+    Upload every "files" part of the request into one folder. Content is
+    written to storage concurrently and all File rows are inserted in one
+    transaction. Returns one result per file, in request order: its id,
+    or the error that kept it out.
+    """
+    # Parsed here rather than declared: Starlette's default caps a form
+    # at 1000 files
+    form = await request.form(max_files=BATCH_UPLOAD_MAX_FILES)
+    try:
+        uploads = [value for value in form.getlist("files") if not isinstance(value, str)]
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No files")
+
+        if folder_id is not None and not await db.run_sync(
+            is_folder_visible, current_user.id, folder_id
+        ):
+            raise HTTPException(status_code=404, detail="Folder not found")
+
+        items = [BatchItem(upload) for upload in uploads]
+        await hash_items(items)
+        await db.run_sync(check_quota, current_user.id, sum(i.size for i in pending(items)))
+
+        known = await db.run_sync(known_blobs, {i.sha256 for i in pending(items)})
+        # Don't hold a connection during the transfers
+        await db.rollback()
+        await store_items(storage, items, known)
+
+        try:
+            await db.run_sync(record_batch, current_user.id, folder_id, items)
+        except HTTPException:
+            # Over quota: nothing was recorded, the content just stored is unwanted
+            await db.rollback()
+            await db.run_sync(enqueue_purge_paths, current_user.id, stored_paths(items))
+            await db.commit()
+            notify_purge_worker()
+            raise
+        await db.commit()
+    finally:
+        await form.close()
+
+    return [item.result() for item in items]
+
+
+# --------------------
+# DOWNLOAD (streamed, supports Range / If-Range)
 # --------------------
 @router.get("/{file_id}/download")
-def download_file(
+async def download_file(
     file_id: int,
-    db: Session = Depends(get_db),
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
 ):
-    file = db.query(File).filter(
+    file = (await db.execute(select(File).where(
         File.id == file_id,
         File.owner_id == current_user.id,
         File.is_deleted == False,
-    ).first()
+    ))).scalar_one_or_none()
 
-    if not file:
+    if not file or (
+        file.folder_id is not None
+        and not await db.run_sync(is_folder_visible, current_user.id, file.folder_id)
+    ):
         raise HTTPException(status_code=404, detail="File not found")
 
-    data = supabase.storage.from_("files").download(file.storage_path)
+    # Done with the database: don't hold a connection while streaming
+    await db.close()
+
+    etag = f'"{file.id}-{file.size}"'
+    headers = {
+        "Content-Disposition": f'inline; filename="{file.name}"',
+        "ETag": etag,
+    }
+    if file.created_at is not None:
+        headers["Last-Modified"] = http_date(file.created_at)
+
+    byte_range = None
+    if file.size is not None:
+        headers["Accept-Ranges"] = "bytes"
+        if if_range_matches(if_range, etag, file.created_at):
+            byte_range = parse_range(range, file.size)
+
+    try:
+        if byte_range:
+            start, end = byte_range
+            stream = await storage.aopen_stream(file.storage_path, start, end)
+        else:
+            stream = await storage.aopen_stream(file.storage_path)
+    except ObjectNotFound:
+        raise HTTPException(status_code=404, detail="File content not found")
+    except StorageError:
+        raise HTTPException(status_code=502, detail="Storage download failed")
+
+    status_code = 200
+    if byte_range:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{file.size}"
+        headers["Content-Length"] = str(end - start + 1)
+    elif file.size is not None:
+        headers["Content-Length"] = str(file.size)
 
     return StreamingResponse(
-        io.BytesIO(data),
+        stream,
+        status_code=status_code,
         media_type=file.mime_type,
-        headers={"Content-Disposition": f'inline; filename="{file.name}"'},
+        headers=headers,
+        # Iteration closes the stream itself, even on client disconnect;
+        # this covers a response that never started sending its body.
+        background=BackgroundTask(stream.aclose),
     )
 
 
+# --------------------
+# UPDATE (rename / move)
+# --------------------
+@router.patch("/{file_id}", response_model=FileOut)
+def update_file(
+    file_id: int,
+    data: FileUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if "name" in data.model_fields_set:
+        try:
+            check_path(data.name or "")
+        except InvalidStoragePath:
+            raise HTTPException(status_code=400, detail="Invalid file name")
+
+    if "folder_id" in data.model_fields_set:
+        move_item(db, current_user.id, "file", file_id, data.folder_id)
+    if data.name is not None:
+        rename_item(db, current_user.id, "file", file_id, data.name)
+    db.commit()
+
+    file = db.query(File).filter(
+        File.id == file_id,
+        File.owner_id == current_user.id,
+        File.is_deleted == False,
+        File.is_uploaded == True,
+    ).first()
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+    return file
+
+
+# --------------------
+# COPY (shares the content: no bytes transferred)
+# --------------------
+@router.post("/{file_id}/copy", response_model=FileOut, status_code=201)
+def duplicate_file(
+    file_id: int,
+    data: CopyRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
+):
+    file = db.query(File).filter(
+        File.id == file_id,
+        File.owner_id == current_user.id,
+        File.is_deleted == False,
+        File.is_uploaded == True,
+    ).first()
+
+    if not file or (file.folder_id is not None and not is_folder_visible(db, current_user.id, file.folder_id)):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if "name" in data.model_fields_set:
+        try:
+            check_path(data.name or "")
+        except InvalidStoragePath:
+            raise HTTPException(status_code=400, detail="Invalid file name")
+
+    target = data.target_folder_id if "target_folder_id" in data.model_fields_set else file.folder_id
+    if target is not None and not is_folder_visible(db, current_user.id, target):
+        raise HTTPException(status_code=404, detail="Target folder not found")
+
+    copy_id = copy_file(db, storage, current_user.id, file, target, data.name or file.name)
+    db.commit()
+
+    return db.query(File).filter(File.id == copy_id).first()
+
+
 # --------------------
 # SOFT DELETE
 # --------------------
@@ -154,6 +407,9 @@ def delete_file(
         raise HTTPException(status_code=404, detail="File not found")
 
     file.is_deleted = True
+    file.deleted_at = func.now()
+    bump_listings(db, current_user.id, [file.folder_id])
+    adjust_rollups(db, current_user.id, file.folder_id, -(file.size or 0), -1)
     db.commit()
 
     return {"message": "File moved to trash"}
@@ -178,6 +434,9 @@ def restore_file(
         raise HTTPException(status_code=404, detail="File not found")
 
     file.is_deleted = False
+    file.deleted_at = None
+    bump_listings(db, current_user.id, [file.folder_id])
+    adjust_rollups(db, current_user.id, file.folder_id, file.size or 0, 1)
     db.commit()
 
     return {"message": "File restored"}
@@ -200,12 +459,14 @@ def permanent_delete_file(
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
 
-    # 1️⃣ Delete from Supabase storage (safe even if already missing)
-    if file.storage_path:
-        supabase.storage.from_("files").remove([file.storage_path])
+    if not file.is_deleted:
+        adjust_rollups(db, current_user.id, file.folder_id, -(file.size or 0), -1)
 
-    # 2️⃣ Delete from DB explicitly
-    db.delete(file)
+    # Drops its blob reference; storage is purged with the last one
+    delete_file_rows(db, current_user.id, File.id == file.id)
+    bump_listings(db, current_user.id, [file.folder_id])
     db.commit()
 
+    notify_purge_worker()
+
     return {"message": "File permanently deleted"}
@@ -1,134 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional, List
-import os
-
-from supabase import create_client
-
-from app.core.database import SessionLocal
-from app.core.deps import get_current_user
+from typing import List, Optional
+
+from app.core.archive import archive_entries, stream_archive
+from app.core.bulk import delete_folder_subtrees, move_item, rename_item
+from app.core.copies import start_copy
+from app.core.deps import get_async_db, get_current_user, get_db
+from app.core.listing import folder_page
+from app.core.listing_versions import bump_listings, not_modified
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    set_next_cursor,
+)
+from app.core.purge import notify_purge_worker
+from app.core.responses import fast_json, row_dicts
+from app.core.storage import StorageBackend, get_storage
+from app.core.trash import list_trash_items
+from app.core.tree import is_folder_visible
+from app.core.usage import adjust_rollups
 from app.models.folder import Folder
-from app.models.file import File
 from app.models.user import User
-from app.models.link_share import LinkShare  # ✅ NEW
-from app.schemas.folder import FolderCreate
+from app.schemas.copy import CopyJobOut, CopyRequest
+from app.schemas.folder import FolderCreate, FolderOut, FolderUpdate
+from app.schemas.trash import TrashItemOut
 
 router = APIRouter(prefix="/folders", tags=["Folders"])
 
 
-# -------------------------
-# Supabase client (shared)
-# -------------------------
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-supabase = create_client(
-    SUPABASE_URL,
-    SUPABASE_SERVICE_ROLE_KEY,
-)
-
-
-# -------------------------
-# Database dependency
-# -------------------------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-# -------------------------
-# Helper: get subfolders recursively
-# -------------------------
-def get_subfolders(db: Session, owner_id: int, parent_id: int) -> List[Folder]:
-    children = db.query(Folder).filter(
-        Folder.owner_id == owner_id,
-        Folder.parent_id == parent_id,
-    ).all()
-
-    result = []
-    for child in children:
-        result.append(child)
-        result.extend(get_subfolders(db, owner_id, child.id))
-
-    return result
-
-
-# -------------------------
-# Helper: permanently delete files in a folder
-# -------------------------
-def permanently_delete_files(db: Session, owner_id: int, folder_id: int):
-    files = db.query(File).filter(
-        File.owner_id == owner_id,
-        File.folder_id == folder_id,
-    ).all()
-
-    for file in files:
-        if file.storage_path:
-            supabase.storage.from_("files").remove([file.storage_path])
-        db.delete(file)
-
-
-# -------------------------
-# Helper: permanently delete folder shares ✅ NEW
-# -------------------------
-def permanently_delete_folder_shares(db: Session, folder_id: int):
-    db.query(LinkShare).filter(
-        LinkShare.folder_id == folder_id
-    ).delete(synchronize_session=False)
-
-
 # -------------------------
 # LIST folders (Drive)
 # -------------------------
-@router.get("")
+@router.get("", response_model=List[FolderOut])
 def list_folders(
+    response: Response,
     parent_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = db.query(Folder).filter(
-        Folder.owner_id == current_user.id,
-        Folder.is_deleted == False,
+    cached = not_modified(
+        db, response, current_user.id, parent_id, if_none_match,
+        "folders", cursor, limit,
     )
+    if cached is not None:
+        return cached
+
+    if parent_id is not None and not is_folder_visible(db, current_user.id, parent_id):
+        return []
 
-    if parent_id is None:
-        query = query.filter(Folder.parent_id.is_(None))
-    else:
-        query = query.filter(Folder.parent_id == parent_id)
+    folders, page = folder_page(db, current_user.id, parent_id, limit, cursor)
+    set_next_cursor(response, page.next_cursor)
 
-    return query.order_by(Folder.id.desc()).all()
+    return fast_json(row_dicts(folders), response)
 
 
 # -------------------------
 # LIST folders in Trash
 # -------------------------
-@router.get("/trash")
+@router.get("/trash", response_model=List[TrashItemOut])
 def list_trash_folders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    deleted_folders = db.query(Folder).filter(
-        Folder.owner_id == current_user.id,
-        Folder.is_deleted == True,
-    ).all()
-
-    visible_in_trash = []
-
-    for folder in deleted_folders:
-        if folder.parent_id is None:
-            visible_in_trash.append(folder)
-        else:
-            parent = db.query(Folder).filter(
-                Folder.id == folder.parent_id
-            ).first()
+    items, next_cursor = list_trash_items(db, current_user.id, ("folder",), limit, cursor)
+    set_next_cursor(response, next_cursor)
 
-            if parent and parent.is_deleted is False:
-                visible_in_trash.append(folder)
-
-    return sorted(visible_in_trash, key=lambda f: f.created_at, reverse=True)
+    return fast_json(items, response)
 
 
 # -------------------------
@@ -146,6 +92,7 @@ def create_folder(
         owner_id=current_user.id,
     )
     db.add(folder)
+    bump_listings(db, current_user.id, [data.parent_id])
     db.commit()
     db.refresh(folder)
     return folder
@@ -160,27 +107,58 @@ def get_folder(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    if not is_folder_visible(db, current_user.id, folder_id):
+        return None
+
+    return db.query(Folder).filter(Folder.id == folder_id).first()
+
+
+# -------------------------
+# UPDATE folder (rename / move; the subtree follows without being rewritten)
+# -------------------------
+@router.patch("/{folder_id}", response_model=FolderOut)
+def update_folder(
+    folder_id: int,
+    data: FolderUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if "name" in data.model_fields_set and not (data.name or "").strip():
+        raise HTTPException(status_code=400, detail="Invalid folder name")
+
+    if "parent_id" in data.model_fields_set:
+        move_item(db, current_user.id, "folder", folder_id, data.parent_id)
+    if data.name is not None:
+        rename_item(db, current_user.id, "folder", folder_id, data.name)
+    db.commit()
+
     folder = db.query(Folder).filter(
         Folder.id == folder_id,
         Folder.owner_id == current_user.id,
         Folder.is_deleted == False,
     ).first()
-
     if not folder:
-        return None
-
+        raise HTTPException(status_code=404, detail="Folder not found")
     return folder
 
 
 # -------------------------
-# DELETE folder (soft, recursive)
+# COPY folder (content is shared, not transferred; large ones in background)
 # -------------------------
-@router.delete("/{folder_id}")
-def delete_folder(
+@router.post("/{folder_id}/copy", response_model=CopyJobOut, status_code=201)
+def duplicate_folder(
     folder_id: int,
+    data: CopyRequest,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
 ):
+    """
+    Copy the folder with its live content. Small folders are copied
+    right away (201, the job is "done"); larger ones are copied in the
+    background (202): follow the job at GET /copies/{id}.
+    """
     folder = db.query(Folder).filter(
         Folder.id == folder_id,
         Folder.owner_id == current_user.id,
@@ -189,29 +167,72 @@ def delete_folder(
 
     if not folder:
         raise HTTPException(status_code=404, detail="Folder not found")
+    if "name" in data.model_fields_set and not (data.name or "").strip():
+        raise HTTPException(status_code=400, detail="Invalid folder name")
+
+    target = data.target_folder_id if "target_folder_id" in data.model_fields_set else folder.parent_id
+    job = start_copy(db, storage, current_user.id, folder, target, data.name or folder.name)
+
+    if job.status != "done":
+        response.status_code = 202
+    return job
+
+
+# -------------------------
+# ARCHIVE (the whole folder as a ZIP, streamed)
+# -------------------------
+@router.get("/{folder_id}/archive")
+async def download_folder_archive(
+    folder_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
+):
+    if not await db.run_sync(is_folder_visible, current_user.id, folder_id):
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    directories, files = await db.run_sync(archive_entries, current_user.id, folder_id)
+
+    # Done with the database: don't hold a connection while streaming
+    await db.close()
+
+    return StreamingResponse(
+        stream_archive(storage, directories, files),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{directories[0]}.zip"'},
+    )
 
-    subfolders = get_subfolders(db, current_user.id, folder.id)
 
-    db.query(File).filter(
-        File.owner_id == current_user.id,
-        File.folder_id == folder.id,
-    ).update({File.is_deleted: True})
+# -------------------------
+# DELETE folder (soft: tombstone on the root only)
+# -------------------------
+@router.delete("/{folder_id}")
+def delete_folder(
+    folder_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    folder = db.query(Folder).filter(
+        Folder.id == folder_id,
+        Folder.owner_id == current_user.id,
+        Folder.is_deleted == False,
+    ).first()
 
-    for sub in subfolders:
-        sub.is_deleted = True
-        db.query(File).filter(
-            File.owner_id == current_user.id,
-            File.folder_id == sub.id,
-        ).update({File.is_deleted: True})
+    if not folder:
+        raise HTTPException(status_code=404, detail="Folder not found")
 
+    # Descendants are hidden through the tree, not rewritten
     folder.is_deleted = True
+    folder.deleted_at = func.now()
+    bump_listings(db, current_user.id, [folder.parent_id, folder.id])
+    adjust_rollups(db, current_user.id, folder.parent_id, -folder.total_bytes, -folder.file_count)
     db.commit()
 
     return {"message": "Folder moved to trash"}
 
 
 # -------------------------
-# RESTORE folder (recursive)
+# RESTORE folder
 # -------------------------
 @router.post("/{folder_id}/restore")
 def restore_folder(
@@ -228,27 +249,18 @@ def restore_folder(
     if not folder:
         raise HTTPException(status_code=404, detail="Folder not found")
 
-    subfolders = get_subfolders(db, current_user.id, folder.id)
-
+    # Items trashed on their own before the folder keep their markers
     folder.is_deleted = False
-    db.query(File).filter(
-        File.owner_id == current_user.id,
-        File.folder_id == folder.id,
-    ).update({File.is_deleted: False})
-
-    for sub in subfolders:
-        sub.is_deleted = False
-        db.query(File).filter(
-            File.owner_id == current_user.id,
-            File.folder_id == sub.id,
-        ).update({File.is_deleted: False})
-
+    folder.deleted_at = None
+    bump_listings(db, current_user.id, [folder.parent_id, folder.id])
+    adjust_rollups(db, current_user.id, folder.parent_id, folder.total_bytes, folder.file_count)
     db.commit()
+
     return {"message": "Folder restored"}
 
 
 # -------------------------
-# PERMANENT DELETE folder (recursive, DB + storage)
+# PERMANENT DELETE folder (recursive; storage purged in background)
 # -------------------------
 @router.delete("/{folder_id}/permanent")
 def permanently_delete_folder(
@@ -268,22 +280,11 @@ def permanently_delete_folder(
             detail="Folder not found in trash",
         )
 
-    subfolders = get_subfolders(db, current_user.id, folder.id)
-
-    # 🔥 DELETE SUBFOLDERS FIRST
-    for sub in subfolders:
-        permanently_delete_folder_shares(db, sub.id)
-        permanently_delete_files(db, current_user.id, sub.id)
-        db.delete(sub)
-
-    # 🔥 DELETE ROOT FOLDER SHARES
-    permanently_delete_folder_shares(db, folder.id)
-
-    # 🔥 DELETE ROOT FOLDER FILES
-    permanently_delete_files(db, current_user.id, folder.id)
-
-    # 🔥 DELETE ROOT FOLDER
-    db.delete(folder)
+    # 🔥 DELETE THE WHOLE SUBTREE: shares, files, folders
+    delete_folder_subtrees(db, current_user.id, [folder.id])
 
+    bump_listings(db, current_user.id, [folder.parent_id, folder.id])
     db.commit()
+    notify_purge_worker()
+
     return {"message": "Folder permanently deleted"}
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 import uuid
 
 from app.core.deps import get_db, get_current_user
+from app.core.tree import is_folder_visible
 from app.models.link_share import LinkShare
 from app.models.folder import Folder
 from app.models.user import User
@@ -52,8 +53,10 @@ def access_public_folder(
         raise HTTPException(status_code=404, detail="Invalid link")
 
     folder = db.query(Folder).filter(
-        Folder.id == link.folder_id,
-        Folder.is_deleted == False
+        Folder.id == link.folder_id
     ).first()
 
+    if not folder or not is_folder_visible(db, folder.owner_id, folder.id):
+        return None
+
     return folder
@@ -1,38 +1,135 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select
+from typing import Optional
 
 from app.core.deps import get_db, get_current_user
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Keyset,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
+from app.core.listing import FILE_COLUMNS, FOLDER_COLUMNS
+from app.core.responses import fast_json
+from app.core.search import mime_type_matches, name_matches, name_rank
+from app.core.tree import trashed_among
 from app.models.folder import Folder
 from app.models.file import File
 from app.models.user import User
+from app.schemas.search import SearchOut
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
 
-@router.get("")
+def _ranked_page(db: Session, model, columns, criteria, rank, after, limit):
+    """
+    One page of `model` rows matching `criteria`, best rank first, as
+    dicts of `columns`. `after` is (rank, id) of the last row already
+    returned, or None.
+    """
+    page = Keyset([(rank, False), (model.id, True)], None, limit, after=after)
+    rows = page.finish(
+        db.execute(page.apply(select(*columns, rank.label("rank")).where(*criteria))),
+        lambda row: (row.rank, row.id),
+    )
+
+    items = []
+    for row in rows:
+        item = row._asdict()
+        del item["rank"]
+        items.append(item)
+    return items, page.last
+
+
+@router.get("", response_model=SearchOut)
 def search(
-    q: str,
+    response: Response,
+    q: str = Query(..., min_length=1),
+    prefix: bool = False,
+    mime_type: Optional[str] = None,
+    min_size: Optional[int] = Query(None, ge=0),
+    max_size: Optional[int] = Query(None, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Search folders and files by name (owned only).
+    Search folders and files by name (owned only), through the trigram
+    index on names. Exact names rank first, then prefix matches, then
+    other substring matches; `prefix=true` keeps prefix matches only.
+
+    mime_type / min_size / max_size filter files; when any of them is
+    given, folders are not returned.
+
+    Both lists are paged together: the cursor holds (rank, id) of the last
+    folder and of the last file, with id 0 marking an exhausted list.
     """
 
-    folders = db.query(Folder).filter(
-        Folder.owner_id == current_user.id,
-        Folder.is_deleted == False,
-        Folder.name.ilike(f"%{q}%")
-    ).all()
+    after = decode_cursor(cursor, (int, int, int, int)) if cursor else None
+    file_filters = []
+    if mime_type:
+        file_filters.append(mime_type_matches(File, mime_type))
+    if min_size is not None:
+        file_filters.append(File.size >= min_size)
+    if max_size is not None:
+        file_filters.append(File.size <= max_size)
 
-    files = db.query(File).filter(
+    folder_match = (
+        Folder.owner_id == current_user.id,
+        name_matches(db, Folder, q, prefix),
+    )
+    file_match = (
         File.owner_id == current_user.id,
         File.is_deleted == False,
-        File.name.ilike(f"%{q}%")
-    ).all()
+        name_matches(db, File, q, prefix),
+        *file_filters,
+    )
+
+    folders, folders_last = [], None
+    if not file_filters and (not after or after[1]):
+        # Only the matches' own ancestor chains are checked against the trash
+        folders, folders_last = _ranked_page(
+            db,
+            Folder,
+            FOLDER_COLUMNS,
+            (
+                *folder_match,
+                Folder.id.notin_(trashed_among(select(Folder.id).where(*folder_match))),
+            ),
+            name_rank(Folder, q),
+            after and after[:2],
+            limit,
+        )
+
+    files, files_last = [], None
+    if not after or after[3]:
+        files, files_last = _ranked_page(
+            db,
+            File,
+            FILE_COLUMNS,
+            (
+                *file_match,
+                or_(
+                    File.folder_id.is_(None),
+                    File.folder_id.notin_(trashed_among(select(File.folder_id).where(*file_match))),
+                ),
+            ),
+            name_rank(File, q),
+            after and after[2:],
+            limit,
+        )
+
+    if folders_last or files_last:
+        set_next_cursor(response, encode_cursor([
+            *(folders_last or (0, 0)),
+            *(files_last or (0, 0)),
+        ]))
 
-    return {
+    return fast_json({
         "folders": folders,
         "files": files
-    }
+    }, response)
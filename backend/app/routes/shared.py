@@ -1,28 +1,46 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from typing import List, Optional
 
 from app.core.deps import get_db, get_current_user
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Keyset,
+    set_next_cursor,
+)
+from app.core.listing import FOLDER_COLUMNS
+from app.core.responses import fast_json, row_dicts
+from app.core.tree import trashed_among
 from app.models.share import Share
 from app.models.folder import Folder
 from app.models.user import User
+from app.schemas.folder import FolderOut
 
 router = APIRouter(prefix="/shared", tags=["Shared"])
 
 
-@router.get("")
+@router.get("", response_model=List[FolderOut])
 def list_shared_with_me(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    shares = db.query(Share).filter(
-        Share.shared_with_user_id == current_user.id
-    ).all()
+    folder_ids = select(Share.folder_id).where(
+        Share.shared_with_user_id == current_user.id,
+        Share.folder_id.isnot(None)
+    )
 
-    folder_ids = [s.folder_id for s in shares if s.folder_id]
-
-    folders = db.query(Folder).filter(
+    query = select(*FOLDER_COLUMNS).where(
         Folder.id.in_(folder_ids),
-        Folder.is_deleted == False
-    ).all()
+        Folder.id.notin_(trashed_among(folder_ids))
+    )
+
+    page = Keyset([(Folder.id, True)], cursor, limit)
+    folders = page.finish(db.execute(page.apply(query)), lambda f: (f.id,))
+    set_next_cursor(response, page.next_cursor)
 
-    return folders
+    return fast_json(row_dicts(folders), response)
@@ -1,28 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
+from typing import List, Optional
 
 from app.core.deps import get_db, get_current_user
+from app.core.listing_versions import bump_listings
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
+from app.core.purge import purge_progress
+from app.core.responses import fast_json
+from app.core.trash import TRASH_TYPES, list_trash_items
+from app.core.usage import adjust_rollups
 from app.models.folder import Folder
 from app.models.user import User
+from app.schemas.trash import TrashItemOut
 
 router = APIRouter(prefix="/trash", tags=["Trash"])
 
 
-@router.get("")
+@router.get("", response_model=List[TrashItemOut])
 def list_trash(
+    response: Response,
+    type: Optional[str] = Query(None, pattern="^(folder|file)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List deleted folders for the logged-in user.
+    List top-level trashed folders and files for the logged-in user,
+    most recently trashed first.
     """
 
-    folders = db.query(Folder).filter(
-        Folder.owner_id == current_user.id,
-        Folder.is_deleted == True
-    ).all()
+    types = (type,) if type else TRASH_TYPES
+
+    items, next_cursor = list_trash_items(db, current_user.id, types, limit, cursor)
+    set_next_cursor(response, next_cursor)
 
-    return folders
+    return fast_json(items, response)
 
 
 @router.post("/restore/{folder_id}")
@@ -42,6 +55,21 @@ def restore_folder(
             status_code=404, detail="Folder not found in trash")
 
     folder.is_deleted = False
+    folder.deleted_at = None
+    bump_listings(db, current_user.id, [folder.parent_id, folder.id])
+    adjust_rollups(db, current_user.id, folder.parent_id, folder.total_bytes, folder.file_count)
     db.commit()
 
     return {"message": "Folder restored"}
+
+
+@router.get("/purge")
+def get_purge_progress(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Storage objects of permanently deleted items still waiting for removal.
+    """
+
+    return purge_progress(db, current_user.id)
@@ -0,0 +1,259 @@
+from datetime import timedelta
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import get_async_db, get_current_user
+from app.core.purge import enqueue_purge_paths, notify_purge_worker
+from app.core.storage import (
+    InvalidStoragePath,
+    StorageBackend,
+    StorageError,
+    check_path,
+    get_storage,
+)
+from app.core.tree import is_folder_visible
+from app.core.uploads import (
+    UPLOAD_SESSION_TTL_SECONDS,
+    PartBody,
+    assemble_parts,
+    assembled_blob_key,
+    claim_session,
+    discard_uploads,
+    expected_part_size,
+    finalize_upload,
+    part_count,
+    part_key,
+    plan_part_size,
+    received_parts,
+    record_part,
+    reopen_session,
+    session_parts,
+)
+from app.core.usage import check_quota
+from app.models.file import File
+from app.models.upload_session import UploadSession
+from app.models.user import User
+from app.schemas.upload import UploadSessionCreate, UploadSessionOut
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+
+# --------------------
+# Helpers
+# --------------------
+async def _get_session(db: AsyncSession, upload_id: int, owner_id: int) -> UploadSession:
+    session = await db.get(UploadSession, upload_id)
+    if session is None or session.owner_id != owner_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+async def _describe(db: AsyncSession, session: UploadSession) -> dict:
+    file = await db.get(File, session.file_id)
+    return {
+        "id": session.id,
+        "name": file.name,
+        "folder_id": file.folder_id,
+        "size": session.size,
+        "part_size": session.part_size,
+        "part_count": part_count(session.size, session.part_size),
+        "status": session.status,
+        "parts": await db.run_sync(received_parts, session.id),
+        "expires_at": session.updated_at + timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS),
+    }
+
+
+# --------------------
+# INITIATE
+# --------------------
+@router.post("", response_model=UploadSessionOut)
+async def create_upload(
+    data: UploadSessionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Start a resumable upload of `size` bytes. The file is then sent as
+    numbered parts of `part_size` bytes (the last one shorter), in any
+    order and concurrently, and assembled by POST /uploads/{id}/complete.
+    """
+    try:
+        check_path(data.name)
+    except InvalidStoragePath:
+        raise HTTPException(status_code=400, detail="Invalid file name")
+
+    if data.folder_id is not None and not await db.run_sync(
+        is_folder_visible, current_user.id, data.folder_id
+    ):
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    part_size = plan_part_size(data.size, data.part_size)
+    await db.run_sync(check_quota, current_user.id, data.size)
+
+    # Invisible until completed (is_uploaded stays False)
+    file = File(
+        name=data.name,
+        owner_id=current_user.id,
+        folder_id=data.folder_id,
+        mime_type=data.mime_type,
+        is_uploaded=False,
+    )
+    db.add(file)
+    await db.flush()
+
+    session = UploadSession(
+        owner_id=current_user.id,
+        file_id=file.id,
+        key=uuid4().hex,
+        size=data.size,
+        part_size=part_size,
+        status="open",
+    )
+    db.add(session)
+    await db.commit()
+    await db.refresh(session)
+
+    return await _describe(db, session)
+
+
+# --------------------
+# STATUS (received parts, to resume)
+# --------------------
+@router.get("/{upload_id}", response_model=UploadSessionOut)
+async def get_upload(
+    upload_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    session = await _get_session(db, upload_id, current_user.id)
+    return await _describe(db, session)
+
+
+# --------------------
+# PUT PART (raw request body)
+# --------------------
+@router.put("/{upload_id}/parts/{part_number}")
+async def put_part(
+    request: Request,
+    upload_id: int,
+    part_number: int = Path(ge=1),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
+):
+    session = await _get_session(db, upload_id, current_user.id)
+    if session.status != "open":
+        raise HTTPException(status_code=409, detail="Upload is being completed")
+    if part_number > part_count(session.size, session.part_size):
+        raise HTTPException(status_code=400, detail="Part number out of range")
+
+    expected = expected_part_size(session.size, session.part_size, part_number)
+    storage_path = part_key(session.key, part_number)
+
+    # Don't hold a connection during the transfer
+    await db.rollback()
+
+    body = PartBody(request.stream(), expected)
+    try:
+        await storage.aupload(storage_path, body, "application/octet-stream")
+    except StorageError:
+        raise HTTPException(status_code=502, detail="Storage upload failed")
+
+    if body.size != expected:
+        await db.run_sync(enqueue_purge_paths, current_user.id, [storage_path])
+        await db.commit()
+        notify_purge_worker()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Part {part_number} must be {expected} bytes",
+        )
+
+    recorded = await db.run_sync(
+        record_part, upload_id, current_user.id, part_number, storage_path, expected,
+    )
+    await db.commit()
+    if not recorded:
+        notify_purge_worker()
+        raise HTTPException(status_code=409, detail="Upload is no longer accepting parts")
+
+    return {"part_number": part_number, "size": expected}
+
+
+# --------------------
+# COMPLETE
+# --------------------
+@router.post("/{upload_id}/complete")
+async def complete_upload(
+    upload_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    storage: StorageBackend = Depends(get_storage),
+):
+    """
+    Assemble the received parts into the file, which then appears in its
+    folder. 409 while parts are missing; they can still be sent after.
+    """
+    session = await db.run_sync(claim_session, upload_id, current_user.id)
+    file = await db.get(File, session.file_id)
+    mime_type = file.mime_type
+
+    parts = await db.run_sync(session_parts, upload_id)
+    missing = sorted(
+        set(range(1, part_count(session.size, session.part_size) + 1))
+        - {p.part_number for p in parts}
+    )
+    if missing:
+        await db.run_sync(reopen_session, upload_id)
+        await db.commit()
+        shown = ", ".join(map(str, missing[:20])) + (", ..." if len(missing) > 20 else "")
+        raise HTTPException(status_code=409, detail=f"Missing parts: {shown}")
+
+    await db.commit()
+
+    # No connection is held while the parts are copied
+    storage_path = assembled_blob_key()
+    try:
+        digest, size = await assemble_parts(
+            storage, [p.storage_path for p in parts], storage_path, mime_type,
+        )
+    except StorageError:
+        await db.run_sync(reopen_session, upload_id)
+        await db.commit()
+        raise HTTPException(status_code=502, detail="Storage assembly failed")
+
+    try:
+        created = await db.run_sync(finalize_upload, upload_id, digest, size, storage_path)
+    except HTTPException:
+        # Over quota: keep the parts so the upload can be completed later
+        await db.rollback()
+        await db.run_sync(enqueue_purge_paths, current_user.id, [storage_path])
+        await db.run_sync(reopen_session, upload_id)
+        await db.commit()
+        notify_purge_worker()
+        raise
+
+    await db.commit()
+    notify_purge_worker()
+    return created
+
+
+# --------------------
+# ABORT
+# --------------------
+@router.delete("/{upload_id}")
+async def abort_upload(
+    upload_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    session = await _get_session(db, upload_id, current_user.id)
+    if session.status != "open":
+        raise HTTPException(status_code=409, detail="Upload is being completed")
+
+    await db.run_sync(discard_uploads, UploadSession.id == upload_id)
+    await db.commit()
+    notify_purge_worker()
+
+    return {"message": "Upload aborted"}
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db, get_current_user
+from app.core.usage import get_usage
+from app.models.user import User
+from app.schemas.usage import UsageOut
+
+router = APIRouter(prefix="/usage", tags=["Usage"])
+
+
+@router.get("", response_model=UsageOut)
+def read_usage(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Storage used by the logged-in user (trashed files included) and their
+    quota. Read from the maintained counters: no scan of their files.
+    """
+    return get_usage(db, current_user.id)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+
+class BulkRequest(BaseModel):
+    action: Literal["move", "trash", "restore", "delete"]
+    files: List[int] = []
+    folders: List[int] = []
+    # move only; None: the root
+    target_folder_id: Optional[int] = None
+
+
+class BulkItemResult(BaseModel):
+    type: str  # folder / file
+    id: int
+    status: str  # ok / not_found / conflict
+
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
@@ -0,0 +1,25 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class CopyRequest(BaseModel):
+    # Defaults to the source's own folder when omitted; None: the root
+    target_folder_id: Optional[int] = None
+    # Defaults to the source's name
+    name: Optional[str] = None
+
+
+class CopyJobOut(BaseModel):
+    id: int
+    status: str  # pending / running / done / failed
+    folder_id: int
+    target_folder_id: Optional[int]
+    name: str
+    total_items: int
+    copied_items: int
+    # The copy, once done
+    result_folder_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
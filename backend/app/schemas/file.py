@@ -1,11 +1,22 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
 
 
+class FileUpdate(BaseModel):
+    """Rename and / or move: only the fields sent are changed."""
+    name: Optional[str] = None
+    # None moves the file to the root
+    folder_id: Optional[int] = None
+
+
 class FileOut(BaseModel):
     id: int
     name: str
     folder_id: Optional[int]
+    size: Optional[int] = None
+    mime_type: Optional[str] = None
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
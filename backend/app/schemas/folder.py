@@ -1,7 +1,40 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+
+from app.schemas.file import FileOut
 
 
 class FolderCreate(BaseModel):
     name: str
     parent_id: Optional[int] = None
+
+
+class FolderUpdate(BaseModel):
+    """Rename and / or move: only the fields sent are changed."""
+    name: Optional[str] = None
+    # None moves the folder to the root
+    parent_id: Optional[int] = None
+
+
+class FolderOut(BaseModel):
+    id: int
+    name: str
+    parent_id: Optional[int]
+    created_at: Optional[datetime] = None
+    # Live content of the whole subtree
+    total_bytes: int = 0
+    file_count: int = 0
+
+
+class PathEntry(BaseModel):
+    id: int
+    name: str
+    parent_id: Optional[int]
+
+
+class BrowseOut(BaseModel):
+    folder: Optional[PathEntry]
+    path: List[PathEntry]
+    folders: List[FolderOut]
+    files: List[FileOut]
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.file import FileOut
+from app.schemas.folder import FolderOut
+
+
+class SearchOut(BaseModel):
+    folders: List[FolderOut]
+    files: List[FileOut]
@@ -0,0 +1,17 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class TrashItemOut(BaseModel):
+    type: str  # folder / file
+    id: int
+    name: str
+    created_at: Optional[datetime]
+    deleted_at: Optional[datetime]
+    # Folders
+    parent_id: Optional[int] = None
+    # Files
+    folder_id: Optional[int] = None
+    size: Optional[int] = None
+    mime_type: Optional[str] = None
@@ -0,0 +1,26 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class UploadSessionCreate(BaseModel):
+    name: str
+    size: int = Field(ge=0)
+    folder_id: Optional[int] = None
+    mime_type: Optional[str] = None
+    # Server default (UPLOAD_PART_SIZE) when omitted
+    part_size: Optional[int] = None
+
+
+class UploadSessionOut(BaseModel):
+    id: int
+    name: str
+    folder_id: Optional[int]
+    size: int
+    part_size: int
+    part_count: int
+    status: str
+    # Part numbers received so far
+    parts: List[int]
+    # When the session is discarded unless more parts arrive
+    expires_at: datetime
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class UsageOut(BaseModel):
+    total_bytes: int
+    file_count: int
+    # None: unlimited
+    quota_bytes: Optional[int]
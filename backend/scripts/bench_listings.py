@@ -0,0 +1,127 @@
+"""
+Listing serialization benchmark: rows/sec of a large file listing built
+the old way (ORM objects validated through FileOut / reflected by
+jsonable_encoder) against column-only rows rendered by orjson, plus the
+/files endpoint end to end.
+
+    cd backend && python scripts/bench_listings.py [rows]
+
+Runs against a throwaway SQLite database; nothing else is touched.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="cloudvault-bench-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp, 'bench.db')}",
+    JWT_SECRET_KEY="bench-secret",
+    JWT_ALGORITHM="HS256",
+    ACCESS_TOKEN_EXPIRE_MINUTES="60",
+    STORAGE_BACKEND="local",
+    LOCAL_STORAGE_ROOT=os.path.join(_tmp, "storage"),
+    MAX_PAGE_SIZE="100000",
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal
+from app.core.jwt import create_access_token
+from app.core.listing import file_page
+from app.core.responses import row_dicts
+from app.main import app
+from app.models.file import File
+from app.models.user import User
+from app.schemas.file import FileOut
+
+ROUNDS = 5
+
+
+def seed(rows: int) -> int:
+    with SessionLocal() as db:
+        user = User(email="bench@example.com", password_hash="-")
+        db.add(user)
+        db.flush()
+        db.execute(insert(File), [
+            {
+                "name": f"file-{i}.txt",
+                "owner_id": user.id,
+                "storage_path": f"{user.id}/file-{i}",
+                "size": i,
+                "mime_type": "text/plain",
+                "is_uploaded": True,
+            }
+            for i in range(rows)
+        ])
+        db.commit()
+        return user.id
+
+
+def orm_pydantic(owner_id: int, rows: int) -> bytes:
+    with SessionLocal() as db:
+        files = (
+            db.query(File)
+            .filter(File.owner_id == owner_id, File.is_deleted == False, File.is_uploaded == True)
+            .order_by(File.created_at.desc(), File.id.desc())
+            .limit(rows)
+            .all()
+        )
+        out = [FileOut.model_validate(f) for f in files]
+        return json.dumps(jsonable_encoder(out)).encode()
+
+
+def orm_reflected(owner_id: int, rows: int) -> bytes:
+    # What list_folders / search did: raw ORM objects through jsonable_encoder
+    with SessionLocal() as db:
+        files = (
+            db.query(File)
+            .filter(File.owner_id == owner_id, File.is_deleted == False, File.is_uploaded == True)
+            .order_by(File.created_at.desc(), File.id.desc())
+            .limit(rows)
+            .all()
+        )
+        return json.dumps(jsonable_encoder(files)).encode()
+
+
+def columns_orjson(owner_id: int, rows: int) -> bytes:
+    with SessionLocal() as db:
+        files, _ = file_page(db, owner_id, None, rows)
+        return orjson.dumps(row_dicts(files))
+
+
+def measure(label: str, fn, rows: int):
+    fn()  # warm up
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {best * 1000:8.1f} ms   {rows / best:12,.0f} rows/s")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    with TestClient(app) as client:
+        owner_id = seed(rows)
+        headers = {"Authorization": f"Bearer {create_access_token({'user_id': owner_id})}"}
+
+        print(f"{rows:,} files, best of {ROUNDS}")
+        measure("ORM + FileOut + encoder", lambda: orm_pydantic(owner_id, rows), rows)
+        measure("ORM + jsonable_encoder", lambda: orm_reflected(owner_id, rows), rows)
+        measure("columns + orjson", lambda: columns_orjson(owner_id, rows), rows)
+        measure(
+            "GET /files (end to end)",
+            lambda: client.get("/files", params={"limit": rows}, headers=headers),
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Recompute folder rollups and user usage from scratch and report how far
+the maintained counters drifted (app.core.usage.reconcile_usage).
+
+    cd backend && python scripts/reconcile_usage.py [--fix] [--user ID]
+
+Without --fix nothing is written.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.core.usage import reconcile_usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fix", action="store_true", help="overwrite drifted counters")
+    parser.add_argument("--user", type=int, help="only this user's folders and usage")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = reconcile_usage(db, owner_id=args.user, fix=args.fix)
+        if args.fix:
+            db.commit()
+        else:
+            db.rollback()
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import tempfile
+
+# The app reads its configuration at import time, so point it at a
+# throwaway SQLite database and local storage before importing it.
+_tmp = tempfile.mkdtemp(prefix="cloudvault-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    JWT_SECRET_KEY="test-secret",
+    JWT_ALGORITHM="HS256",
+    ACCESS_TOKEN_EXPIRE_MINUTES="60",
+    STORAGE_BACKEND="local",
+    LOCAL_STORAGE_ROOT=os.path.join(_tmp, "storage"),
+    BCRYPT_ROUNDS="4",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import Base, SessionLocal, async_engine, engine
+from app.core.migrations import run_migrations
+from app.core.security import hash_pool
+from app.core.storage import get_storage
+from app.core.user_cache import user_cache
+from app.main import app
+
+
+@pytest.fixture(autouse=True, scope="session")
+def shutdown_workers():
+    yield
+    # Pooled aiosqlite connections run on non-daemon threads
+    asyncio.run(async_engine.dispose())
+    hash_pool.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    # Ids are reused once the tables are recreated
+    user_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def storage():
+    return get_storage()
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager: background workers stay off in tests
+    return TestClient(app)
+
+
+def _login(client, email):
+    client.post("/auth/register", json={"email": email, "password": "secret123"})
+    response = client.post("/auth/login", json={"email": email, "password": "secret123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def auth(client):
+    return _login(client, "owner@example.com")
+
+
+@pytest.fixture
+def other_auth(client):
+    return _login(client, "other@example.com")
+
+
+@pytest.fixture
+def upload(client, auth):
+    def upload(name="a.txt", content=b"hello", folder_id=None, headers=None):
+        response = client.post(
+            "/files/upload",
+            headers=headers or auth,
+            params={} if folder_id is None else {"folder_id": folder_id},
+            files={"file": (name, content, "text/plain")},
+        )
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    return upload
@@ -0,0 +1,123 @@
+import asyncio
+import io
+import zipfile
+
+from app.core import archive as archive_module
+from app.core.archive import ArchiveEntry, stream_archive
+from app.core.storage import AsyncObjectStream, ObjectNotFound
+from app.models.file import File
+
+
+def _folder(client, auth, name, parent_id=None):
+    r = client.post("/folders", headers=auth, json={"name": name, "parent_id": parent_id})
+    return r.json()["id"]
+
+
+def _archive(client, auth, folder_id):
+    r = client.get(f"/folders/{folder_id}/archive", headers=auth)
+    assert r.status_code == 200, r.text
+    return r, zipfile.ZipFile(io.BytesIO(r.content))
+
+
+def test_archive_holds_the_live_subtree(client, auth, upload):
+    docs = _folder(client, auth, "docs")
+    sub = _folder(client, auth, "sub", docs)
+    _folder(client, auth, "empty", docs)
+    trashed = _folder(client, auth, "old", docs)
+
+    upload("a.txt", content=b"top level", folder_id=docs)
+    upload("b.txt", content=b"nested", folder_id=sub)
+    upload("a.txt", content=b"same name", folder_id=docs)
+    upload("gone.txt", content=b"x", folder_id=trashed)
+    binned = upload("binned.txt", content=b"x", folder_id=docs)
+    client.delete(f"/files/{binned}", headers=auth)
+    client.delete(f"/folders/{trashed}", headers=auth)
+
+    r, zf = _archive(client, auth, docs)
+    assert r.headers["content-type"] == "application/zip"
+    assert r.headers["content-disposition"] == 'attachment; filename="docs.zip"'
+    assert zf.testzip() is None
+
+    assert sorted(zf.namelist()) == [
+        "docs/", "docs/a (1).txt", "docs/a.txt", "docs/empty/", "docs/sub/", "docs/sub/b.txt",
+    ]
+    contents = {zf.read(n) for n in ("docs/a.txt", "docs/a (1).txt")}
+    assert contents == {b"top level", b"same name"}
+    assert zf.read("docs/sub/b.txt") == b"nested"
+
+
+def test_archive_skips_missing_content(client, auth, upload, db, storage):
+    docs = _folder(client, auth, "docs")
+    lost = upload("lost.txt", content=b"lost", folder_id=docs)
+    upload("kept.txt", content=b"kept", folder_id=docs)
+    storage.remove_many([db.get(File, lost).storage_path])
+
+    _, zf = _archive(client, auth, docs)
+    assert zf.namelist() == ["docs/", "docs/kept.txt"]
+    assert zf.read("docs/kept.txt") == b"kept"
+
+
+def test_archive_requires_a_visible_folder(client, auth, other_auth):
+    docs = _folder(client, auth, "docs")
+    assert client.get(f"/folders/{docs}/archive", headers=other_auth).status_code == 404
+
+    client.delete(f"/folders/{docs}", headers=auth)
+    assert client.get(f"/folders/{docs}/archive", headers=auth).status_code == 404
+
+
+class _CountingStorage:
+    """Serves generated objects, tracking how many are open at once."""
+
+    def __init__(self):
+        self.open = 0
+        self.peak = 0
+
+    async def aopen_stream(self, path):
+        if path == "missing":
+            raise ObjectNotFound(path)
+        self.open += 1
+        self.peak = max(self.peak, self.open)
+
+        async def chunks():
+            for _ in range(3):
+                await asyncio.sleep(0)
+                yield path.encode() * 10
+
+        async def close():
+            self.open -= 1
+
+        return AsyncObjectStream(chunks(), close)
+
+
+def test_prefetch_window_is_bounded(monkeypatch):
+    monkeypatch.setattr(archive_module, "ARCHIVE_PREFETCH", 2)
+    storage = _CountingStorage()
+    files = [ArchiveEntry(f"f/{i}", str(i), 30 * len(str(i)), None) for i in range(12)]
+    files.insert(5, ArchiveEntry("f/missing", "missing", 1, None))
+
+    async def collect():
+        return b"".join([chunk async for chunk in stream_archive(storage, ["f"], files)])
+
+    zf = zipfile.ZipFile(io.BytesIO(asyncio.run(collect())))
+    assert len(zf.namelist()) == 13
+    assert zf.read("f/11") == b"11" * 30
+    # The object being written plus the window ahead of it
+    assert storage.peak <= 3
+    assert storage.open == 0
+
+
+def test_abandoned_archive_stops_prefetching():
+    storage = _CountingStorage()
+    files = [ArchiveEntry(f"f/{i}", str(i), 30, None) for i in range(10)]
+
+    async def abandon():
+        stream = stream_archive(storage, ["f"], files)
+        await stream.__anext__()
+        await stream.__anext__()
+        await stream.aclose()
+        # Let the cancelled reads unwind
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return storage.open
+
+    assert asyncio.run(abandon()) == 0
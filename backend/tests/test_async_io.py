@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.storage import AsyncObjectStream, StorageBackend, get_storage
+from app.main import app
+
+CLIENTS = 200
+STREAM_SECONDS = 0.5
+
+
+class SlowStorage(StorageBackend):
+    """Every download takes STREAM_SECONDS to produce its single chunk."""
+
+    async def aopen_stream(self, path, start=None, end=None):
+        async def chunks():
+            await asyncio.sleep(STREAM_SECONDS)
+            yield b"hello"
+
+        async def close():
+            pass
+
+        return AsyncObjectStream(chunks(), close)
+
+
+@pytest.fixture
+def slow_storage():
+    yield lambda: app.dependency_overrides.update({get_storage: SlowStorage})
+    app.dependency_overrides.pop(get_storage, None)
+
+
+def test_slow_downloads_do_not_queue_behind_each_other(auth, upload, slow_storage):
+    file_id = upload(content=b"hello")
+    slow_storage()
+
+    async def download_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.get(f"/files/{file_id}/download", headers=auth)
+                for _ in range(CLIENTS)
+            ])
+
+    started = time.monotonic()
+    responses = asyncio.run(download_all())
+    elapsed = time.monotonic() - started
+
+    assert all(r.status_code == 200 and r.content == b"hello" for r in responses)
+    # A 40-thread pool would need CLIENTS / 40 * STREAM_SECONDS = 2.5 s
+    assert elapsed < 2.0
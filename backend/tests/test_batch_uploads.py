@@ -0,0 +1,105 @@
+import asyncio
+
+from sqlalchemy import select, update
+
+from app.core import batch_uploads
+from app.core.storage import StorageError
+from app.models.blob import Blob
+from app.models.file import File
+from app.models.folder import Folder
+from app.models.storage_purge import StoragePurge
+from app.models.user import User
+from app.models.user_usage import UserUsage
+
+
+def _batch(client, auth, files, folder_id=None):
+    return client.post(
+        "/files/upload/batch",
+        headers=auth,
+        params={} if folder_id is None else {"folder_id": folder_id},
+        files=[("files", (name, content, "text/plain")) for name, content in files],
+    )
+
+
+def test_batch_records_every_file_in_one_go(client, auth, db):
+    folder = client.post("/folders", headers=auth, json={"name": "docs"}).json()["id"]
+    r = _batch(client, auth, [
+        ("a.txt", b"alpha"),
+        ("b.txt", b"beta"),
+        ("../bad", b"nope"),
+        ("a copy.txt", b"alpha"),
+    ], folder)
+    assert r.status_code == 200, r.text
+
+    results = r.json()
+    assert [x["name"] for x in results] == ["a.txt", "b.txt", "../bad", "a copy.txt"]
+    assert results[2] == {"name": "../bad", "error": "Invalid file name"}
+    ids = [x["id"] for x in results if "id" in x]
+
+    listed = client.get("/files", headers=auth, params={"folder_id": folder}).json()
+    assert sorted(f["id"] for f in listed) == sorted(ids)
+    assert client.get(f"/files/{ids[2]}/download", headers=auth).content == b"alpha"
+
+    # Identical content within the batch is stored once
+    assert sorted(b.refcount for b in db.query(Blob)) == [1, 2]
+    assert db.get(Folder, folder).file_count == 3
+    assert db.get(Folder, folder).total_bytes == 14
+
+
+def test_storage_writes_are_concurrent_and_bounded(client, auth, storage, monkeypatch):
+    monkeypatch.setattr(batch_uploads, "BATCH_UPLOAD_CONCURRENCY", 3)
+    state = {"running": 0, "peak": 0}
+    original = storage.aupload
+
+    async def aupload(path, chunks, content_type):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(0.01)
+            return await original(path, chunks, content_type)
+        finally:
+            state["running"] -= 1
+
+    monkeypatch.setattr(storage, "aupload", aupload)
+    r = _batch(client, auth, [(f"{i}.txt", f"content {i}".encode()) for i in range(10)])
+    assert all("id" in x for x in r.json())
+    assert state["peak"] == 3
+
+
+def test_failed_write_only_fails_its_files(client, auth, storage, monkeypatch):
+    original = storage.aupload
+
+    async def aupload(path, chunks, content_type):
+        if "bad" in content_type:
+            raise StorageError("down")
+        return await original(path, chunks, content_type)
+
+    monkeypatch.setattr(storage, "aupload", aupload)
+    r = client.post("/files/upload/batch", headers=auth, files=[
+        ("files", ("ok.txt", b"fine", "text/plain")),
+        ("files", ("ko.txt", b"broken", "text/bad")),
+    ])
+    assert r.json()[1] == {"name": "ko.txt", "error": "Storage upload failed"}
+    assert "id" in r.json()[0]
+
+
+def test_batch_over_quota_records_nothing(client, auth, upload, db):
+    upload("seed.txt", content=b"12345")
+    user_id = db.query(User.id).filter(User.email == "owner@example.com").scalar()
+    db.execute(update(UserUsage).where(UserUsage.user_id == user_id).values(quota_bytes=12))
+    db.commit()
+
+    r = _batch(client, auth, [("a.txt", b"1234"), ("b.txt", b"5678")])
+    assert r.status_code == 413
+    assert db.query(File).count() == 1
+    # Refused before any content was written
+    assert db.query(Blob).count() == 1
+    assert db.query(StoragePurge).count() == 0
+
+
+def test_batch_accepts_more_than_a_thousand_files(client, auth, db):
+    r = _batch(client, auth, [(f"{i}.txt", b"same") for i in range(1001)])
+    assert r.status_code == 200, r.text
+    assert db.query(File).count() == 1001
+    assert db.query(Blob).one().refcount == 1001
+    assert db.execute(select(StoragePurge)).first() is None
@@ -0,0 +1,115 @@
+from sqlalchemy import select
+
+from app.core.blobs import register_blob
+from app.core.storage import ObjectNotFound
+from app.models.blob import Blob
+from app.models.file import File
+from app.models.storage_purge import StoragePurge
+from app.models.user import User
+
+
+def _exists(storage, path):
+    try:
+        storage.open_stream(path).close()
+        return True
+    except ObjectNotFound:
+        return False
+
+
+def _purged(db):
+    return set(db.execute(select(StoragePurge.storage_path)).scalars())
+
+
+def test_identical_uploads_share_one_blob(client, auth, other_auth, upload, db, storage):
+    first = upload("a.txt", content=b"same bytes")
+    second = upload("copy.txt", content=b"same bytes", headers=other_auth)
+    upload("b.txt", content=b"other bytes")
+
+    blobs = db.query(Blob).order_by(Blob.id).all()
+    assert [b.refcount for b in blobs] == [2, 1]
+    assert blobs[0].storage_path.startswith(f"blobs/{blobs[0].sha256[:2]}/{blobs[0].sha256}")
+
+    a, b = db.get(File, first), db.get(File, second)
+    assert a.blob_id == b.blob_id == blobs[0].id
+    assert a.storage_path == b.storage_path
+    assert a.size == 10
+
+    # Both names download the shared content
+    r = client.get(f"/files/{second}/download", headers=other_auth)
+    assert r.content == b"same bytes"
+
+
+def test_blob_is_purged_with_its_last_reference(client, auth, other_auth, upload, db, storage):
+    mine = upload("a.txt", content=b"shared")
+    theirs = upload("b.txt", content=b"shared", headers=other_auth)
+    path = db.get(File, mine).storage_path
+
+    client.delete(f"/files/{mine}/permanent", headers=auth)
+    db.expire_all()
+    assert db.query(Blob).one().refcount == 1
+    assert path not in _purged(db)
+    assert client.get(f"/files/{theirs}/download", headers=other_auth).content == b"shared"
+
+    client.delete(f"/files/{theirs}/permanent", headers=other_auth)
+    db.expire_all()
+    assert db.query(Blob).count() == 0
+    assert path in _purged(db)
+    # The object itself goes once the purge worker runs
+    assert _exists(storage, path)
+
+
+def test_folder_delete_releases_every_reference(client, auth, upload, db):
+    folder = client.post("/folders", headers=auth, json={"name": "f"}).json()["id"]
+    upload("1.txt", content=b"dup", folder_id=folder)
+    upload("2.txt", content=b"dup", folder_id=folder)
+    kept = upload("3.txt", content=b"dup")
+
+    client.delete(f"/folders/{folder}", headers=auth)
+    client.delete(f"/folders/{folder}/permanent", headers=auth)
+
+    db.expire_all()
+    assert db.query(Blob).one().refcount == 1
+    assert _purged(db) == set()
+    assert client.get(f"/files/{kept}/download", headers=auth).content == b"dup"
+
+
+def test_reupload_after_purge_gets_a_fresh_object(client, auth, upload, db):
+    first = upload("a.txt", content=b"again")
+    old_path = db.get(File, first).storage_path
+    client.delete(f"/files/{first}/permanent", headers=auth)
+
+    second = upload("a.txt", content=b"again")
+    new_path = db.get(File, second).storage_path
+    assert new_path != old_path
+    assert client.get(f"/files/{second}/download", headers=auth).content == b"again"
+
+
+def test_legacy_files_keep_their_own_object(client, auth, db, storage):
+    # Uploaded before deduplication: own object, no blob
+    owner_id = db.query(User).filter(User.email == "owner@example.com").one().id
+    storage.upload(f"{owner_id}/legacy.txt", [b"old"], "text/plain")
+    legacy = File(
+        name="legacy.txt",
+        owner_id=owner_id,
+        storage_path=f"{owner_id}/legacy.txt",
+        size=3,
+        is_uploaded=True,
+    )
+    db.add(legacy)
+    db.commit()
+
+    client.delete(f"/files/{legacy.id}/permanent", headers=auth)
+    db.expire_all()
+    assert _purged(db) == {f"{owner_id}/legacy.txt"}
+
+
+def test_concurrent_registration_keeps_one_blob(auth, db):
+    sha = "ab" * 32
+    first = register_blob(db, 1, sha, 3, "blobs/ab/first")
+    second = register_blob(db, 1, sha, 3, "blobs/ab/second")
+    db.commit()
+
+    assert first.id == second.id
+    assert db.query(Blob).one().refcount == 2
+    # The losing upload's object is cleaned up
+    assert _purged(db) == {"blobs/ab/second"}
@@ -0,0 +1,96 @@
+from sqlalchemy import event
+
+from app.core.database import engine
+
+
+def _folder(client, auth, name, parent_id=None):
+    r = client.post("/folders", headers=auth, json={"name": name, "parent_id": parent_id})
+    return r.json()["id"]
+
+
+def test_browse_returns_path_folders_and_files(client, auth, upload):
+    top = _folder(client, auth, "top")
+    mid = _folder(client, auth, "mid", top)
+    leaf = _folder(client, auth, "leaf", mid)
+    file_id = upload("a.txt", folder_id=mid)
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        r = client.get(f"/browse/{mid}", headers=auth)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert r.status_code == 200
+    body = r.json()
+    assert [p["name"] for p in body["path"]] == ["top", "mid"]
+    assert body["folder"]["id"] == mid
+    assert [f["id"] for f in body["folders"]] == [leaf]
+    assert [f["id"] for f in body["files"]] == [file_id]
+    # Version check, path, folders, files
+    assert len(statements) == 4
+
+    root = client.get("/browse", headers=auth).json()
+    assert root["folder"] is None and root["path"] == []
+    assert [f["id"] for f in root["folders"]] == [top]
+
+
+def test_browse_pages_folders_then_files(client, auth, upload):
+    parent = _folder(client, auth, "p")
+    folders = [_folder(client, auth, f"d{i}", parent) for i in range(3)]
+    files = [upload(f"{i}.txt", folder_id=parent) for i in range(3)]
+
+    seen_folders, seen_files, cursor, pages = [], [], None, 0
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        r = client.get(f"/browse/{parent}", headers=auth, params=params)
+        body = r.json()
+        assert len(body["folders"]) + len(body["files"]) <= 2
+        seen_folders += [f["id"] for f in body["folders"]]
+        seen_files += [f["id"] for f in body["files"]]
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert sorted(seen_folders) == sorted(folders)
+    assert sorted(seen_files) == sorted(files)
+
+
+def test_browse_without_files_stops_after_a_full_folder_page(client, auth):
+    parent = _folder(client, auth, "p")
+    for i in range(2):
+        _folder(client, auth, f"d{i}", parent)
+
+    r = client.get(f"/browse/{parent}", headers=auth, params={"limit": 2})
+    assert len(r.json()["folders"]) == 2
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_browse_hidden_folders_and_caching(client, auth, other_auth):
+    top = _folder(client, auth, "top")
+    mid = _folder(client, auth, "mid", top)
+
+    assert client.get(f"/browse/{mid}", headers=other_auth).status_code == 404
+
+    first = client.get(f"/browse/{mid}", headers=auth)
+    cached = client.get(
+        f"/browse/{mid}",
+        headers={**auth, "If-None-Match": first.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+
+    client.delete(f"/folders/{top}", headers=auth)
+    r = client.get(
+        f"/browse/{mid}",
+        headers={**auth, "If-None-Match": first.headers["ETag"]},
+    )
+    assert r.status_code == 404
+
+    bad = client.get("/browse", headers=auth, params={"cursor": "x.1"})
+    assert bad.status_code == 400
@@ -0,0 +1,136 @@
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.core.usage import reconcile_usage
+from app.models.file import File
+from app.models.folder import Folder
+from app.models.share import Share
+from app.models.user import User
+
+
+def _folder(client, auth, name, parent_id=None):
+    r = client.post("/folders", headers=auth, json={"name": name, "parent_id": parent_id})
+    return r.json()["id"]
+
+
+def _bulk(client, auth, action, files=(), folders=(), **extra):
+    r = client.post("/bulk", headers=auth, json={
+        "action": action, "files": list(files), "folders": list(folders), **extra,
+    })
+    assert r.status_code == 200, r.text
+    return {(x["type"], x["id"]): x["status"] for x in r.json()["results"]}
+
+
+def _no_drift(db):
+    report = reconcile_usage(db, fix=False)
+    db.rollback()
+    assert report["folders"]["drifted"] == report["users"]["drifted"] == 0
+
+
+def test_trash_and_restore_mixed_items(client, auth, other_auth, upload, db):
+    docs = _folder(client, auth, "docs")
+    sub = _folder(client, auth, "sub", docs)
+    inner = upload("inner.txt", content=b"12345", folder_id=sub)
+    loose = upload("loose.txt", content=b"123", folder_id=docs)
+    theirs = upload("theirs.txt", headers=other_auth)
+
+    statuses = _bulk(client, auth, "trash", files=[inner, loose, theirs, 999], folders=[sub])
+    assert statuses == {
+        ("file", inner): "ok", ("file", loose): "ok", ("file", theirs): "not_found",
+        ("file", 999): "not_found", ("folder", sub): "ok",
+    }
+    db.expire_all()
+    assert db.get(File, loose).is_deleted and db.get(Folder, sub).is_deleted
+    assert db.get(File, theirs).is_deleted is False
+    assert db.get(Folder, docs).total_bytes == 0
+    _no_drift(db)
+
+    # Already trashed: nothing to do
+    assert _bulk(client, auth, "trash", files=[loose]) == {("file", loose): "not_found"}
+
+    _bulk(client, auth, "restore", files=[inner, loose], folders=[sub])
+    db.expire_all()
+    assert db.get(Folder, docs).total_bytes == 8
+    _no_drift(db)
+
+
+def test_move_updates_rollups_and_rejects_cycles(client, auth, upload, db):
+    a = _folder(client, auth, "a")
+    b = _folder(client, auth, "b", a)
+    c = _folder(client, auth, "c", b)
+    target = _folder(client, auth, "target")
+    f = upload("f.txt", content=b"1234", folder_id=c)
+    g = upload("g.txt", content=b"12", folder_id=b)
+
+    statuses = _bulk(client, auth, "move", files=[g], folders=[c, a], target_folder_id=c)
+    # a contains c; c can't go into itself either
+    assert statuses == {("file", g): "ok", ("folder", c): "conflict", ("folder", a): "conflict"}
+
+    statuses = _bulk(client, auth, "move", files=[f], folders=[b], target_folder_id=target)
+    assert set(statuses.values()) == {"ok"}
+    db.expire_all()
+    assert db.get(Folder, b).parent_id == target
+    assert db.get(File, f).folder_id == target
+    assert (db.get(Folder, a).total_bytes, db.get(Folder, target).total_bytes) == (0, 6)
+    _no_drift(db)
+
+    # Back to the root
+    _bulk(client, auth, "move", folders=[b], target_folder_id=None)
+    db.expire_all()
+    assert db.get(Folder, b).parent_id is None
+    assert db.get(Folder, target).total_bytes == 4
+    _no_drift(db)
+
+
+def test_move_into_missing_target_is_refused(client, auth, other_auth, upload):
+    f = upload("f.txt")
+    theirs = _folder(client, other_auth, "theirs")
+    r = client.post("/bulk", headers=auth, json={
+        "action": "move", "files": [f], "target_folder_id": theirs,
+    })
+    assert r.status_code == 404
+
+
+def test_permanent_delete(client, auth, upload, db):
+    docs = _folder(client, auth, "docs")
+    sub = _folder(client, auth, "sub", docs)
+    live = _folder(client, auth, "live")
+    in_sub = upload("in_sub.txt", content=b"x", folder_id=sub)
+    shared = upload("shared.txt", content=b"yy", folder_id=live)
+    other_id = db.query(User.id).filter(User.id != db.get(File, shared).owner_id).scalar()
+    db.add(Share(file_id=shared, shared_with_user_id=other_id, role="viewer"))
+    db.commit()
+    client.delete(f"/folders/{docs}", headers=auth)
+
+    statuses = _bulk(client, auth, "delete", files=[shared], folders=[docs, live])
+    # Folders must be in the trash first; files need not be
+    assert statuses == {("file", shared): "ok", ("folder", docs): "ok", ("folder", live): "not_found"}
+
+    db.expire_all()
+    assert db.get(Folder, sub) is None and db.get(File, in_sub) is None
+    assert db.get(File, shared) is None
+    assert db.query(Share).count() == 0
+    _no_drift(db)
+
+
+def test_statement_count_does_not_grow_with_the_selection(client, auth, db):
+    folders = [_folder(client, auth, f"f{i}") for i in range(60)]
+    target = _folder(client, auth, "target")
+    statements = []
+
+    def count(*args):
+        statements.append(args)
+
+    def run(ids, action, **extra):
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            _bulk(client, auth, action, folders=ids, **extra)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        return len(statements)
+
+    few = run(folders[:2], "move", target_folder_id=target)
+    many = run(folders[2:], "move", target_folder_id=target)
+    assert few == many
+    assert run(folders[:2], "trash") == run(folders[2:], "trash")
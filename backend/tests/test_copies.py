@@ -0,0 +1,147 @@
+from sqlalchemy import update
+
+from app.core import copies
+from app.core.copies import run_next_copy_job
+from app.core.usage import reconcile_usage
+from app.models.blob import Blob
+from app.models.copy_job import CopyJob
+from app.models.file import File
+from app.models.folder import Folder
+from app.models.user import User
+from app.models.user_usage import UserUsage
+
+
+def _folder(client, auth, name, parent_id=None):
+    r = client.post("/folders", headers=auth, json={"name": name, "parent_id": parent_id})
+    return r.json()["id"]
+
+
+def _no_drift(db):
+    report = reconcile_usage(db, fix=False)
+    db.rollback()
+    assert report["folders"]["drifted"] == report["users"]["drifted"] == 0
+
+
+def _names(client, auth, folder_id):
+    body = client.get("/browse", headers=auth, params={"folder_id": folder_id}).json()
+    return sorted(f["name"] for f in body["folders"]), sorted(f["name"] for f in body["files"])
+
+
+def test_copy_file_shares_its_content(client, auth, upload, db):
+    dst = _folder(client, auth, "dst")
+    original = upload("a.txt", content=b"shared bytes")
+
+    r = client.post(f"/files/{original}/copy", headers=auth, json={"target_folder_id": dst, "name": "b.txt"})
+    assert r.status_code == 201
+    copy = r.json()
+    assert (copy["name"], copy["folder_id"], copy["size"]) == ("b.txt", dst, 12)
+
+    assert db.query(Blob).one().refcount == 2
+    assert client.get(f"/files/{copy['id']}/download", headers=auth).content == b"shared bytes"
+    assert db.get(Folder, dst).file_count == 1
+    _no_drift(db)
+
+    # Without a target: next to the original
+    r = client.post(f"/files/{original}/copy", headers=auth, json={})
+    assert r.json()["folder_id"] is None and r.json()["name"] == "a.txt"
+
+    client.delete(f"/files/{original}/permanent", headers=auth)
+    db.expire_all()
+    assert db.query(Blob).one().refcount == 2
+
+
+def test_copy_legacy_file_copies_its_object(client, auth, db, storage):
+    owner_id = db.query(User.id).filter(User.email == "owner@example.com").scalar()
+    path = f"{owner_id}/legacy-copy-source.txt"
+    storage.upload(path, [b"old"], "text/plain")
+    legacy = File(name="legacy.txt", owner_id=owner_id, storage_path=path, size=3, is_uploaded=True)
+    db.add(legacy)
+    db.commit()
+
+    r = client.post(f"/files/{legacy.id}/copy", headers=auth, json={})
+    assert r.status_code == 201
+    copy = db.get(File, r.json()["id"])
+    assert copy.blob_id is None and copy.storage_path != legacy.storage_path
+    assert storage.read_range(copy.storage_path, 0, 2) == b"old"
+
+
+def test_copy_file_refusals(client, auth, other_auth, upload, db):
+    mine = upload("a.txt", content=b"12345")
+    theirs = _folder(client, other_auth, "theirs")
+
+    assert client.post(f"/files/{mine}/copy", headers=auth, json={"target_folder_id": theirs}).status_code == 404
+    assert client.post(f"/files/{mine}/copy", headers=other_auth, json={}).status_code == 404
+    assert client.post(f"/files/{mine}/copy", headers=auth, json={"name": ".."}).status_code == 400
+
+    user_id = db.query(User.id).filter(User.email == "owner@example.com").scalar()
+    db.execute(update(UserUsage).where(UserUsage.user_id == user_id).values(quota_bytes=8))
+    db.commit()
+    assert client.post(f"/files/{mine}/copy", headers=auth, json={}).status_code == 413
+    assert db.query(File).count() == 1
+    assert db.query(Blob).one().refcount == 1
+
+
+def test_copy_folder_copies_the_live_subtree(client, auth, upload, db):
+    top = _folder(client, auth, "top")
+    docs = _folder(client, auth, "docs", top)
+    gone = _folder(client, auth, "gone", top)
+    upload("a.txt", content=b"123", folder_id=top)
+    upload("b.txt", content=b"4567", folder_id=docs)
+    upload("hidden.txt", content=b"x", folder_id=gone)
+    trashed = upload("trashed.txt", content=b"yy", folder_id=docs)
+    client.delete(f"/files/{trashed}", headers=auth)
+    client.delete(f"/folders/{gone}", headers=auth)
+
+    r = client.post(f"/folders/{top}/copy", headers=auth, json={"target_folder_id": docs, "name": "top copy"})
+    assert r.status_code == 201
+    job = r.json()
+    assert job["status"] == "done" and job["copied_items"] == job["total_items"] == 4
+
+    copy = db.get(Folder, job["result_folder_id"])
+    assert (copy.name, copy.parent_id, copy.total_bytes, copy.file_count) == ("top copy", docs, 7, 2)
+    assert _names(client, auth, copy.id) == (["docs"], ["a.txt"])
+    copied_docs = db.query(Folder).filter(Folder.parent_id == copy.id).one()
+    assert _names(client, auth, copied_docs.id) == ([], ["b.txt"])
+
+    db.expire_all()
+    # Copied into its own subtree: counted there and above
+    assert db.get(Folder, top).total_bytes == 14
+    assert db.query(Blob).filter(Blob.refcount == 2).count() == 2
+    _no_drift(db)
+
+
+def test_large_copy_runs_as_a_job(client, auth, other_auth, upload, db, storage, monkeypatch):
+    monkeypatch.setattr(copies, "COPY_INLINE_MAX_ITEMS", 1)
+    monkeypatch.setattr(copies, "COPY_BATCH_SIZE", 2)
+    src = _folder(client, auth, "src")
+    for i in range(5):
+        upload(f"{i}.txt", content=str(i).encode(), folder_id=src)
+
+    r = client.post(f"/folders/{src}/copy", headers=auth, json={"target_folder_id": None})
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+    assert r.json()["status"] == "pending" and r.json()["total_items"] == 6
+    assert client.get(f"/copies/{job_id}", headers=other_auth).status_code == 404
+
+    assert run_next_copy_job(storage) is True
+    assert run_next_copy_job(storage) is False
+
+    job = client.get(f"/copies/{job_id}", headers=auth).json()
+    assert job["status"] == "done" and job["copied_items"] == 6
+    assert _names(client, auth, job["result_folder_id"]) == ([], [f"{i}.txt" for i in range(5)])
+    _no_drift(db)
+
+
+def test_copy_job_failure_is_reported(client, auth, upload, db, storage, monkeypatch):
+    monkeypatch.setattr(copies, "COPY_INLINE_MAX_ITEMS", 0)
+    src = _folder(client, auth, "src")
+    upload("a.txt", folder_id=src)
+
+    job_id = client.post(f"/folders/{src}/copy", headers=auth, json={}).json()["id"]
+    client.delete(f"/folders/{src}", headers=auth)
+    run_next_copy_job(storage)
+
+    job = client.get(f"/copies/{job_id}", headers=auth).json()
+    assert (job["status"], job["error"]) == ("failed", "Folder not found")
+    assert db.query(Folder).count() == 1
+    assert db.query(CopyJob).one().result_folder_id is None
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.http_range import http_date, if_range_matches, parse_range
+from app.core.storage import ObjectStream
+
+
+# -------------------------
+# parse_range
+# -------------------------
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-9", (0, 9)),
+        ("bytes=10-", (10, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-500", (0, 99)),
+        ("bytes=90-500", (90, 99)),
+        ("bytes=9-3", None),
+        ("bytes=0-1,5-9", None),
+        ("items=0-9", None),
+        ("bytes=a-b", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(HTTPException) as exc:
+        parse_range(header, 100)
+
+    assert exc.value.status_code == 416
+    assert exc.value.headers["Content-Range"] == "bytes */100"
+
+
+# -------------------------
+# if_range_matches
+# -------------------------
+MODIFIED = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def test_if_range_missing_header_matches():
+    assert if_range_matches(None, '"1-5"', MODIFIED)
+
+
+def test_if_range_etag():
+    assert if_range_matches('"1-5"', '"1-5"', MODIFIED)
+    assert not if_range_matches('"1-6"', '"1-5"', MODIFIED)
+    assert not if_range_matches('W/"1-5"', '"1-5"', MODIFIED)
+
+
+def test_if_range_date():
+    # HTTP dates have second precision, naive values are UTC
+    assert if_range_matches(http_date(MODIFIED), '"1-5"', MODIFIED)
+    assert if_range_matches(http_date(MODIFIED), '"1-5"', MODIFIED.replace(tzinfo=None))
+    assert not if_range_matches(
+        http_date(MODIFIED - timedelta(seconds=1)), '"1-5"', MODIFIED
+    )
+    assert not if_range_matches("not a date", '"1-5"', MODIFIED)
+    assert not if_range_matches(http_date(MODIFIED), '"1-5"', None)
+
+
+# -------------------------
+# Downloads
+# -------------------------
+CONTENT = bytes(range(256)) * 4
+
+
+def test_download_whole_file(client, auth, upload):
+    file_id = upload(content=CONTENT)
+
+    response = client.get(f"/files/{file_id}/download", headers=auth)
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == str(len(CONTENT))
+
+
+def test_download_range(client, auth, upload):
+    file_id = upload(content=CONTENT)
+
+    response = client.get(
+        f"/files/{file_id}/download", headers={**auth, "Range": "bytes=-24"}
+    )
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[-24:]
+    assert response.headers["content-range"] == f"bytes 1000-1023/{len(CONTENT)}"
+
+
+def test_download_range_unsatisfiable(client, auth, upload):
+    file_id = upload(content=CONTENT)
+
+    response = client.get(
+        f"/files/{file_id}/download", headers={**auth, "Range": "bytes=5000-"}
+    )
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_download_stale_if_range_serves_whole_file(client, auth, upload):
+    file_id = upload(content=CONTENT)
+    headers = {**auth, "Range": "bytes=0-9"}
+
+    fresh = client.get(f"/files/{file_id}/download", headers=headers)
+    etag = fresh.headers["etag"]
+    matching = client.get(
+        f"/files/{file_id}/download", headers={**headers, "If-Range": etag}
+    )
+    stale = client.get(
+        f"/files/{file_id}/download", headers={**headers, "If-Range": '"stale"'}
+    )
+
+    assert matching.status_code == 206
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
+
+
+# -------------------------
+# ObjectStream
+# -------------------------
+def test_object_stream_closes_when_abandoned():
+    closed = []
+    stream = ObjectStream(iter([b"a", b"b", b"c"]), lambda: closed.append(True))
+
+    chunks = iter(stream)
+    next(chunks)
+    chunks.close()  # what happens when the client goes away mid-body
+    stream.close()
+
+    assert closed == [True]
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+from sqlalchemy import event, text
+
+from app.core.database import engine
+
+TABLES = ("files", "folders", "shares", "link_shares", "storage_purges")
+
+
+@pytest.fixture
+def statements():
+    """SELECT statements (with parameters) issued while the test runs."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+def full_scans(db, statement, parameters):
+    """Plan steps reading one of TABLES without an index."""
+    plan = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    return [
+        detail for *_, detail in plan
+        if re.fullmatch(rf"SCAN ({'|'.join(TABLES)})( AS \w+)?", detail)
+    ]
+
+
+def test_endpoint_queries_use_indexes(client, auth, other_auth, upload, db, statements):
+    folder = client.post("/folders", headers=auth, json={"name": "docs"}).json()["id"]
+    sub = client.post("/folders", headers=auth, json={"name": "sub", "parent_id": folder}).json()["id"]
+    file_id = upload("report.txt", folder_id=folder)
+    upload("root.txt")
+    other = db.execute(text("SELECT id FROM users WHERE email = 'other@example.com'")).scalar()
+    client.post("/shares", headers=auth, json={"folder_id": folder, "user_id": other, "role": "viewer"})
+    client.post(f"/public/create/{folder}", headers=auth)
+    client.delete(f"/folders/{sub}", headers=auth)
+    client.delete(f"/files/{file_id}", headers=auth)
+    statements.clear()
+
+    client.get("/folders", headers=auth)
+    client.get("/folders", headers=auth, params={"parent_id": folder})
+    client.get("/files", headers=auth)
+    client.get("/files", headers=auth, params={"folder_id": folder})
+    client.get("/trash", headers=auth)
+    client.get("/search", headers=auth, params={"q": "report"})
+    client.get("/shared", headers=other_auth)
+
+    assert statements
+    for statement, parameters in statements:
+        assert full_scans(db, statement, parameters) == [], statement
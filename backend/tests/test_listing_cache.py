@@ -0,0 +1,100 @@
+from sqlalchemy import event
+
+from app.core.database import engine
+
+
+def _get(client, auth, path, params=None, etag=None):
+    headers = dict(auth)
+    if etag:
+        headers["If-None-Match"] = etag
+    return client.get(path, headers=headers, params=params or {})
+
+
+def test_unchanged_listings_answer_304_without_loading_rows(client, auth, upload):
+    upload("a.txt")
+    first = _get(client, auth, "/files")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert "Last-Modified" in first.headers
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        again = _get(client, auth, "/files", etag=etag)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert not again.content
+    assert not any("FROM files" in s for s in statements)
+
+    # Different page shape, different representation
+    assert _get(client, auth, "/files", {"limit": 5}, etag).status_code == 200
+
+
+def test_changes_in_a_folder_invalidate_its_listings(client, auth, upload):
+    parent = client.post("/folders", headers=auth, json={"name": "p"}).json()["id"]
+
+    def etags():
+        return (
+            _get(client, auth, "/folders", {"parent_id": parent}).headers["ETag"],
+            _get(client, auth, "/files", {"folder_id": parent}).headers["ETag"],
+        )
+
+    seen = [etags()]
+
+    child = client.post("/folders", headers=auth, json={"name": "c", "parent_id": parent}).json()["id"]
+    seen.append(etags())
+
+    file_id = upload("a.txt", folder_id=parent)
+    seen.append(etags())
+
+    client.delete(f"/files/{file_id}", headers=auth)
+    seen.append(etags())
+
+    client.post(f"/files/{file_id}/restore", headers=auth)
+    seen.append(etags())
+
+    client.delete(f"/folders/{child}", headers=auth)
+    seen.append(etags())
+
+    assert len(set(seen)) == len(seen)
+
+    # Untouched siblings keep theirs
+    other = client.post("/folders", headers=auth, json={"name": "o"}).json()["id"]
+    before = _get(client, auth, "/files", {"folder_id": other}).headers["ETag"]
+    upload("b.txt", folder_id=parent)
+    after = _get(client, auth, "/files", {"folder_id": other})
+    assert after.headers["ETag"] == before
+
+
+def test_trashing_an_ancestor_invalidates_nested_listings(client, auth, upload):
+    top = client.post("/folders", headers=auth, json={"name": "top"}).json()["id"]
+    mid = client.post("/folders", headers=auth, json={"name": "mid", "parent_id": top}).json()["id"]
+    upload("a.txt", folder_id=mid)
+
+    listed = _get(client, auth, "/files", {"folder_id": mid})
+    assert len(listed.json()) == 1
+
+    client.delete(f"/folders/{top}", headers=auth)
+
+    again = _get(client, auth, "/files", {"folder_id": mid}, listed.headers["ETag"])
+    assert again.status_code == 200
+    assert again.json() == []
+
+    client.post(f"/trash/restore/{top}", headers=auth)
+    restored = _get(client, auth, "/files", {"folder_id": mid}, again.headers["ETag"])
+    assert restored.status_code == 200
+    assert len(restored.json()) == 1
+
+
+def test_etags_are_per_user(client, auth, other_auth):
+    mine = _get(client, auth, "/folders")
+    theirs = _get(client, other_auth, "/folders", etag=mine.headers["ETag"])
+    assert theirs.status_code == 200
@@ -0,0 +1,52 @@
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.schemas.file import FileOut
+from app.schemas.folder import BrowseOut, FolderOut
+from app.schemas.search import SearchOut
+from app.schemas.trash import TrashItemOut
+
+
+def _check(response, schema):
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    return TypeAdapter(schema).validate_python(response.json())
+
+
+def test_listings_match_their_response_models(client, auth, upload):
+    folder = client.post("/folders", headers=auth, json={"name": "docs"}).json()["id"]
+    upload("report.txt", content=b"12345", folder_id=folder)
+    gone = upload("old.txt")
+    client.delete(f"/files/{gone}", headers=auth)
+
+    files = _check(client.get("/files", headers=auth, params={"folder_id": folder}), List[FileOut])
+    assert files[0].name == "report.txt"
+    assert files[0].size == 5
+    assert files[0].created_at is not None
+
+    folders = client.get("/folders", headers=auth).json()
+    _check(client.get("/folders", headers=auth), List[FolderOut])
+    # Only the declared columns go out
+    assert set(folders[0]) == set(FolderOut.model_fields)
+
+    found = _check(client.get("/search", headers=auth, params={"q": "re"}), SearchOut)
+    assert [f.name for f in found.files] == ["report.txt"]
+    assert "storage_path" not in client.get("/search", headers=auth, params={"q": "re"}).json()["files"][0]
+
+    browse = _check(client.get(f"/browse/{folder}", headers=auth), BrowseOut)
+    assert browse.folder.name == "docs"
+
+    trash = _check(client.get("/trash", headers=auth), List[TrashItemOut])
+    assert [(t.type, t.name) for t in trash] == [("file", "old.txt")]
+    _check(client.get("/files/trash", headers=auth), List[TrashItemOut])
+
+
+def test_listing_headers_survive_fast_rendering(client, auth):
+    for i in range(3):
+        client.post("/folders", headers=auth, json={"name": f"f{i}"})
+
+    r = client.get("/folders", headers=auth, params={"limit": 2})
+    assert len(r.json()) == 2
+    assert r.headers["X-Next-Cursor"]
+    assert r.headers["ETag"]
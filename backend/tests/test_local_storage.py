@@ -0,0 +1,76 @@
+import pytest
+
+from app.core.local_storage import LocalStorage
+from app.core.storage import (
+    InvalidStoragePath,
+    ObjectExists,
+    ObjectNotFound,
+    StorageError,
+)
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(str(tmp_path / "bucket"))
+
+
+def test_upload_and_read(local):
+    local.upload("1/a.txt", [b"hello ", b"world"], "text/plain")
+
+    assert local.read_range("1/a.txt", 0, 4) == b"hello"
+    assert b"".join(local.open_stream("1/a.txt", 6)) == b"world"
+
+
+def test_upload_refuses_existing_key(local):
+    local.upload("1/a.txt", [b"first"], None)
+
+    with pytest.raises(ObjectExists):
+        local.upload("1/a.txt", [b"second"], None)
+
+    assert local.read_range("1/a.txt", 0, 10) == b"first"
+
+
+def test_copy_refuses_existing_key(local):
+    local.upload("1/a.txt", [b"a"], None)
+    local.upload("1/b.txt", [b"b"], None)
+
+    with pytest.raises(ObjectExists):
+        local.copy("1/a.txt", "1/b.txt")
+
+    local.copy("1/a.txt", "1/c.txt")
+    assert local.read_range("1/c.txt", 0, 10) == b"a"
+
+
+@pytest.mark.parametrize("key", ["", "/abs", "1/../x", "../x", "1//x", "1/./x", "a\\b"])
+def test_invalid_keys(local, key):
+    with pytest.raises(InvalidStoragePath):
+        local.upload(key, [b"x"], None)
+
+
+def test_missing_and_unreadable_objects(local, tmp_path):
+    (tmp_path / "bucket" / "1" / "dir").mkdir(parents=True)
+
+    with pytest.raises(ObjectNotFound):
+        local.open_stream("1/missing")
+    # A directory is a storage fault, not a missing object
+    with pytest.raises(StorageError) as exc:
+        local.open_stream("1/dir")
+    assert not isinstance(exc.value, ObjectNotFound)
+
+
+def test_no_temp_files_left_behind(local, tmp_path):
+    local.upload("1/a.txt", [b"a"], None)
+    with pytest.raises(ObjectExists):
+        local.upload("1/a.txt", [b"b"], None)
+
+    assert sorted(p.name for p in (tmp_path / "bucket" / "1").iterdir()) == ["a.txt"]
+
+
+def test_upload_rejects_bad_file_name(client, auth):
+    response = client.post(
+        "/files/upload",
+        headers=auth,
+        files={"file": ("x/../y.txt", b"x", "text/plain")},
+    )
+
+    assert response.status_code == 400
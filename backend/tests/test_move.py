@@ -0,0 +1,125 @@
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.core.usage import reconcile_usage
+from app.models.file import File
+from app.models.folder import Folder
+
+
+def _folder(client, auth, name, parent_id=None):
+    r = client.post("/folders", headers=auth, json={"name": name, "parent_id": parent_id})
+    return r.json()["id"]
+
+
+def _etag(client, auth, folder_id):
+    params = {} if folder_id is None else {"parent_id": folder_id}
+    return client.get("/folders", headers=auth, params=params).headers["ETag"]
+
+
+def _no_drift(db):
+    report = reconcile_usage(db, fix=False)
+    db.rollback()
+    assert report["folders"]["drifted"] == report["users"]["drifted"] == 0
+
+
+def test_move_folder_carries_its_subtree(client, auth, upload, db):
+    a = _folder(client, auth, "a")
+    b = _folder(client, auth, "b", a)
+    c = _folder(client, auth, "c", b)
+    target = _folder(client, auth, "target")
+    upload("deep.txt", content=b"123456", folder_id=c)
+
+    below = _etag(client, auth, c)
+    r = client.patch(f"/folders/{b}", headers=auth, json={"parent_id": target})
+    assert r.status_code == 200
+    assert r.json()["parent_id"] == target and r.json()["total_bytes"] == 6
+
+    db.expire_all()
+    assert db.get(Folder, c).parent_id == b
+    assert (db.get(Folder, a).total_bytes, db.get(Folder, target).total_bytes) == (0, 6)
+    # Its breadcrumbs changed
+    assert _etag(client, auth, c) != below
+    _no_drift(db)
+
+    r = client.patch(f"/folders/{b}", headers=auth, json={"parent_id": None})
+    assert r.status_code == 200 and r.json()["parent_id"] is None
+    db.expire_all()
+    assert db.get(Folder, target).total_bytes == 0
+    _no_drift(db)
+
+
+def test_move_folder_into_itself_is_a_conflict(client, auth):
+    a = _folder(client, auth, "a")
+    b = _folder(client, auth, "b", a)
+    c = _folder(client, auth, "c", b)
+
+    for target in (a, c):
+        r = client.patch(f"/folders/{a}", headers=auth, json={"parent_id": target})
+        assert r.status_code == 409
+
+
+def test_move_refuses_missing_items_and_targets(client, auth, other_auth):
+    mine = _folder(client, auth, "mine")
+    theirs = _folder(client, other_auth, "theirs")
+    trashed = _folder(client, auth, "trashed")
+    client.delete(f"/folders/{trashed}", headers=auth)
+
+    assert client.patch(f"/folders/{theirs}", headers=auth, json={"parent_id": None}).status_code == 404
+    assert client.patch(f"/folders/{mine}", headers=auth, json={"parent_id": theirs}).status_code == 404
+    assert client.patch(f"/folders/{mine}", headers=auth, json={"parent_id": trashed}).status_code == 404
+    assert client.patch(f"/folders/{trashed}", headers=auth, json={"name": "x"}).status_code == 404
+
+
+def test_rename_folder_updates_listings(client, auth):
+    a = _folder(client, auth, "a")
+    b = _folder(client, auth, "b", a)
+    root, below = _etag(client, auth, None), _etag(client, auth, b)
+
+    r = client.patch(f"/folders/{a}", headers=auth, json={"name": "renamed"})
+    assert r.status_code == 200 and r.json()["name"] == "renamed"
+    assert r.json()["parent_id"] is None
+    assert _etag(client, auth, None) != root
+    assert _etag(client, auth, b) != below
+
+    assert client.patch(f"/folders/{a}", headers=auth, json={"name": "  "}).status_code == 400
+
+
+def test_move_and_rename_file(client, auth, upload, db):
+    src = _folder(client, auth, "src")
+    dst = _folder(client, auth, "dst")
+    file_id = upload("a.txt", content=b"1234", folder_id=src)
+
+    r = client.patch(f"/files/{file_id}", headers=auth, json={"name": "b.txt", "folder_id": dst})
+    assert r.status_code == 200
+    assert (r.json()["name"], r.json()["folder_id"]) == ("b.txt", dst)
+    db.expire_all()
+    assert (db.get(Folder, src).file_count, db.get(Folder, dst).file_count) == (0, 1)
+    _no_drift(db)
+
+    assert client.patch(f"/files/{file_id}", headers=auth, json={"name": ".."}).status_code == 400
+    assert client.patch(f"/files/{file_id}", headers=auth, json={"folder_id": 999}).status_code == 404
+    assert db.get(File, file_id).name == "b.txt"
+
+
+def test_move_is_constant_query_whatever_the_depth(client, auth):
+    shallow = _folder(client, auth, "shallow")
+    deep = parent = _folder(client, auth, "deep")
+    for i in range(30):
+        parent = _folder(client, auth, f"level{i}", parent)
+    target = _folder(client, auth, "target")
+    statements = []
+
+    def count(*args):
+        statements.append(args)
+
+    def move(folder_id):
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            r = client.patch(f"/folders/{folder_id}", headers=auth, json={"parent_id": target})
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert r.status_code == 200
+        return len(statements)
+
+    assert move(shallow) == move(deep)
@@ -0,0 +1,81 @@
+import pytest
+
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+
+def collect(client, auth, endpoint, **params):
+    """Follow X-Next-Cursor to the end; returns the pages."""
+    pages, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get(endpoint, headers=auth, params=query)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+def test_files_keyset_pages(client, auth, upload):
+    ids = [upload(f"{i}.txt") for i in range(7)]
+
+    pages = collect(client, auth, "/files", limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [f["id"] for page in pages for f in page] == sorted(ids, reverse=True)
+
+
+def test_exact_last_page_has_no_cursor(client, auth, upload):
+    for i in range(4):
+        upload(f"{i}.txt")
+
+    assert [len(page) for page in collect(client, auth, "/files", limit=2)] == [2, 2]
+
+
+def test_trash_keyset_pages(client, auth, upload):
+    ids = [upload(f"{i}.txt") for i in range(5)]
+    for file_id in ids:
+        client.delete(f"/files/{file_id}", headers=auth)
+    client.post("/folders", headers=auth, json={"name": "dir"})
+    folder_id = client.get("/folders", headers=auth).json()[0]["id"]
+    client.delete(f"/folders/{folder_id}", headers=auth)
+
+    pages = collect(client, auth, "/trash", limit=2)
+    items = [(item["type"], item["id"]) for page in pages for item in page]
+
+    assert len(items) == 6
+    assert len(set(items)) == 6
+
+
+def test_search_pages_both_lists(client, auth, upload):
+    for i in range(3):
+        client.post("/folders", headers=auth, json={"name": f"report-{i}"})
+    for i in range(5):
+        upload(f"report-{i}.txt")
+
+    pages = collect(client, auth, "/search", q="report", limit=2)
+
+    assert sum(len(p["folders"]) for p in pages) == 3
+    assert sum(len(p["files"]) for p in pages) == 5
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-base64!",
+        encode_cursor(["x"]),  # wrong type for Folder.id
+        encode_cursor([1, 2]),  # wrong arity
+        encode_cursor([True]),
+    ],
+)
+def test_invalid_folder_cursor(client, auth, cursor):
+    response = client.get("/folders", headers=auth, params={"cursor": cursor})
+
+    assert response.status_code == 400
+
+
+def test_invalid_file_cursor_types(client, auth):
+    # /files orders by (created_at, id): a bare integer is not a timestamp
+    response = client.get("/files", headers=auth, params={"cursor": encode_cursor([1, 2])})
+
+    assert response.status_code == 400
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app.core.pool import TimedQueuePool, pool_stats
+
+
+def test_health_db_reports_both_pools(client, auth):
+    assert client.get("/folders/", headers=auth).status_code == 200
+
+    body = client.get("/health/db").json()
+    for name in ("sync", "async"):
+        stats = body[name]
+        assert stats["in_use"] == 0
+        assert stats["checkouts"] >= 1
+        assert 0 <= stats["saturation"] <= 1
+
+
+def test_invalid_token_never_checks_out_a_connection(client):
+    before = client.get("/health/db").json()["async"]["checkouts"]
+
+    r = client.get("/folders/", headers={"Authorization": "Bearer nope"})
+    assert r.status_code == 401
+
+    assert client.get("/health/db").json()["async"]["checkouts"] == before
+
+
+def test_checkout_timeouts_and_saturation_are_recorded(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with pytest.raises(PoolTimeout):
+                engine.connect()
+
+            stats = pool_stats(engine)
+            assert stats["in_use"] == 1
+            assert stats["timeouts"] == 1
+            assert stats["wait_seconds_max"] >= 0.05
+    finally:
+        engine.dispose()
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core import purge
+from app.core.purge import drain_purge_queue, enqueue_purge_paths, purge_progress
+from app.core.storage import StorageError
+from app.models.storage_purge import StoragePurge
+
+
+class FlakyStorage:
+    """Fails every remove call that includes one of `bad` paths."""
+
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.removed = []
+        self.calls = 0
+
+    def remove_many(self, paths):
+        self.calls += 1
+        if self.bad.intersection(paths):
+            raise StorageError("boom")
+        self.removed.extend(paths)
+
+
+@pytest.fixture
+def queued(db, auth):
+    def queued(*paths):
+        enqueue_purge_paths(db, 1, list(paths))
+        db.commit()
+
+    return queued
+
+
+def test_drain_removes_due_entries(db, queued):
+    queued("1/a", "1/b")
+    storage = FlakyStorage()
+
+    assert drain_purge_queue(storage) == 2
+    assert sorted(storage.removed) == ["1/a", "1/b"]
+    assert db.query(StoragePurge).count() == 0
+    assert drain_purge_queue(storage) == 0
+
+
+def test_bad_path_does_not_hold_back_the_batch(db, queued):
+    queued(*[f"1/{i}" for i in range(16)])
+    storage = FlakyStorage(bad={"1/7"})
+
+    drain_purge_queue(storage)
+
+    assert len(storage.removed) == 15
+    # bisection: one failing call per level instead of one call per path
+    assert storage.calls <= 2 * 5
+
+    [left] = db.query(StoragePurge).all()
+    assert left.storage_path == "1/7"
+    assert left.attempts == 1
+    assert left.last_error == "boom"
+    assert purge_progress(db, 1) == {"pending": 1, "retrying": 1, "failed": 0}
+
+
+def test_retry_backoff_and_give_up(db, queued, monkeypatch):
+    monkeypatch.setattr(purge, "PURGE_MAX_ATTEMPTS", 3)
+    queued("1/bad")
+    storage = FlakyStorage(bad={"1/bad"})
+
+    before = datetime.now(timezone.utc)
+    drain_purge_queue(storage)
+    entry = db.query(StoragePurge).one()
+    delay = entry.next_attempt_at.replace(tzinfo=timezone.utc) - before
+    assert timedelta(seconds=9) < delay <= timedelta(seconds=11)
+
+    # Not due yet
+    assert drain_purge_queue(storage) == 0
+
+    for expected in (2, 3):
+        entry.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+        drain_purge_queue(storage)
+        db.expire_all()
+        entry = db.query(StoragePurge).one()
+        assert entry.attempts == expected
+
+    # Parked: reported as failed and never picked up again
+    assert entry.next_attempt_at is None
+    assert purge_progress(db, 1) == {"pending": 0, "retrying": 0, "failed": 1}
+    assert drain_purge_queue(storage) == 0
@@ -0,0 +1,77 @@
+from sqlalchemy import text
+
+from app.models.file import File
+
+
+def search(client, auth, **params):
+    response = client.get("/search", headers=auth, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def file_names(result):
+    return [f["name"] for f in result["files"]]
+
+
+def test_ranking_exact_then_prefix_then_substring(client, auth, upload):
+    upload("old report.txt")
+    upload("report.txt.bak")
+    upload("report.txt")
+
+    assert file_names(search(client, auth, q="REPORT.txt")) == [
+        "report.txt",
+        "report.txt.bak",
+        "old report.txt",
+    ]
+
+
+def test_prefix_only(client, auth, upload):
+    upload("old report.txt")
+    upload("report.txt")
+
+    assert file_names(search(client, auth, q="rep", prefix=True)) == ["report.txt"]
+
+
+def test_like_wildcards_are_literal(client, auth, upload):
+    upload("100% done.txt")
+    upload("100 done.txt")
+    upload("a_b.txt")
+    upload("axb.txt")
+
+    assert file_names(search(client, auth, q="100%")) == ["100% done.txt"]
+    assert file_names(search(client, auth, q="a_b")) == ["a_b.txt"]
+
+
+def test_file_filters_exclude_folders(client, auth, upload):
+    client.post("/folders", headers=auth, json={"name": "photos"})
+    small = upload("photos-1.txt", content=b"x")
+    upload("photos-2.txt", content=b"x" * 100)
+
+    everything = search(client, auth, q="photos")
+    assert [f["name"] for f in everything["folders"]] == ["photos"]
+
+    filtered = search(client, auth, q="photos", mime_type="text/*", max_size=10)
+    assert filtered["folders"] == []
+    assert [f["id"] for f in filtered["files"]] == [small]
+    assert search(client, auth, q="photos", mime_type="image/png")["files"] == []
+
+
+def test_index_follows_renames_and_deletes(client, auth, upload, db):
+    file_id = upload("draft.txt")
+
+    db.query(File).filter(File.id == file_id).update({"name": "final.txt"})
+    db.commit()
+    assert file_names(search(client, auth, q="draft")) == []
+    assert file_names(search(client, auth, q="final")) == ["final.txt"]
+
+    client.delete(f"/files/{file_id}", headers=auth)
+    client.delete(f"/files/{file_id}/permanent", headers=auth)
+    assert db.execute(text("SELECT count(*) FROM files_fts WHERE name LIKE '%final%'")).scalar() == 0
+
+
+def test_search_uses_trigram_index(db):
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT rowid FROM files_fts WHERE name LIKE '%report%'"
+    )).all()
+
+    assert "VIRTUAL TABLE INDEX" in plan[0][-1]
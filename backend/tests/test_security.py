@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.core.security import HashPool
+from app.models.user import User
+
+
+def test_login_rehashes_passwords_with_an_old_cost_factor(client, db):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("secret123")
+    db.add(User(email="old@example.com", password_hash=old_hash))
+    db.commit()
+
+    r = client.post("/auth/login", json={"email": "old@example.com", "password": "secret123"})
+    assert r.status_code == 200
+
+    db.expire_all()
+    user = db.query(User).filter(User.email == "old@example.com").one()
+    assert user.password_hash.startswith("$2b$04$")
+
+    # Still the same password
+    r = client.post("/auth/login", json={"email": "old@example.com", "password": "secret123"})
+    assert r.status_code == 200
+    r = client.post("/auth/login", json={"email": "old@example.com", "password": "wrong"})
+    assert r.status_code == 401
+
+
+def test_health_auth_reports_the_hash_pool(client, auth):
+    stats = client.get("/health/auth").json()
+    assert stats["completed"] >= 2
+    assert stats["running"] == stats["queued"] == 0
+
+
+def test_hash_pool_rejects_beyond_its_queue():
+    pool = HashPool(workers=1, max_queue=1)
+
+    async def burst():
+        return await asyncio.gather(
+            *(pool.run(time.sleep, 0.5) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        pool.shutdown()
+
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["max_queued"] == 1
+    assert stats["completed"] == 2
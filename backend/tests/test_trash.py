@@ -0,0 +1,135 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.core.migrations import _trash_tombstones
+from app.models.file import File
+from app.models.folder import Folder
+from app.models.link_share import LinkShare
+from app.models.share import Share
+
+
+@pytest.fixture
+def mkdir(client, auth):
+    def mkdir(name, parent_id=None):
+        response = client.post(
+            "/folders", headers=auth, json={"name": name, "parent_id": parent_id}
+        )
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    return mkdir
+
+
+def names(response):
+    return sorted(item["name"] for item in response.json())
+
+
+def test_trashing_a_folder_marks_only_the_root(client, auth, mkdir, upload, db):
+    root = mkdir("root")
+    child = mkdir("child", root)
+    upload("deep.txt", folder_id=child)
+
+    client.delete(f"/folders/{root}", headers=auth)
+
+    assert [f.name for f in db.query(Folder).filter(Folder.is_deleted == True)] == ["root"]
+    assert db.query(File).filter(File.is_deleted == True).count() == 0
+
+    # Everything below the root is hidden through the tree
+    assert client.get("/folders", headers=auth).json() == []
+    assert client.get("/folders", headers=auth, params={"parent_id": child}).json() == []
+    assert client.get("/files", headers=auth, params={"folder_id": child}).json() == []
+    assert client.get("/search", headers=auth, params={"q": "deep"}).json()["files"] == []
+    assert [i["name"] for i in client.get("/trash", headers=auth).json()] == ["root"]
+
+
+def test_nested_trash_then_restore(client, auth, mkdir, upload):
+    root = mkdir("root")
+    child = mkdir("child", root)
+    upload("deep.txt", folder_id=child)
+
+    client.delete(f"/folders/{child}", headers=auth)
+    client.delete(f"/folders/{root}", headers=auth)
+
+    # Only the outermost trashed folder is a top-level trash entry
+    assert [i["name"] for i in client.get("/trash", headers=auth).json()] == ["root"]
+
+    client.post(f"/folders/{root}/restore", headers=auth)
+    assert [i["name"] for i in client.get("/trash", headers=auth).json()] == ["child"]
+
+    client.post(f"/folders/{child}/restore", headers=auth)
+    assert client.get("/trash", headers=auth).json() == []
+    assert names(client.get("/files", headers=auth, params={"folder_id": child})) == ["deep.txt"]
+
+
+def test_individually_trashed_items_survive_parent_restore(client, auth, mkdir, upload):
+    root = mkdir("root")
+    child = mkdir("child", root)
+    kept = upload("kept.txt", folder_id=root)
+    trashed = upload("trashed.txt", folder_id=root)
+
+    client.delete(f"/files/{trashed}", headers=auth)
+    client.delete(f"/folders/{child}", headers=auth)
+    client.delete(f"/folders/{root}", headers=auth)
+    client.post(f"/folders/{root}/restore", headers=auth)
+
+    assert names(client.get("/folders", headers=auth, params={"parent_id": root})) == []
+    assert names(client.get("/files", headers=auth, params={"folder_id": root})) == ["kept.txt"]
+    assert sorted(i["name"] for i in client.get("/trash", headers=auth).json()) == [
+        "child",
+        "trashed.txt",
+    ]
+    assert kept != trashed
+
+
+def test_permanent_delete_removes_subtree_and_shares(
+    client, auth, other_auth, mkdir, upload, db
+):
+    root = mkdir("root")
+    child = mkdir("child", root)
+    upload("deep.txt", folder_id=child)
+    other_id = db.execute(text("SELECT id FROM users WHERE email = 'other@example.com'")).scalar()
+    client.post("/shares", headers=auth, json={"folder_id": child, "user_id": other_id, "role": "viewer"})
+    client.post(f"/public/create/{child}", headers=auth)
+
+    assert names(client.get("/shared", headers=other_auth)) == ["child"]
+
+    client.delete(f"/folders/{root}", headers=auth)
+    # Trashing the parent hides the shared subfolder from its recipient
+    assert client.get("/shared", headers=other_auth).json() == []
+
+    response = client.delete(f"/folders/{root}/permanent", headers=auth)
+    assert response.status_code == 200
+
+    db.expire_all()
+    assert db.query(Folder).count() == 0
+    assert db.query(File).count() == 0
+    assert db.query(Share).count() == 0
+    assert db.query(LinkShare).count() == 0
+
+
+def test_tombstone_migration_clears_cascaded_markers(db):
+    # Trash as written by the old cascading implementation
+    db.execute(text("INSERT INTO users (id, email, password_hash) VALUES (1, 'u@x', 'x')"))
+    db.execute(text("""
+        INSERT INTO folders (id, name, parent_id, owner_id, is_deleted) VALUES
+            (1, 'root', NULL, 1, 1),
+            (2, 'child', 1, 1, 1),
+            (3, 'grandchild', 2, 1, 1),
+            (4, 'alone', NULL, 1, 1),
+            (5, 'live', NULL, 1, 0)
+    """))
+    db.execute(text("""
+        INSERT INTO files (id, name, owner_id, folder_id, is_deleted) VALUES
+            (1, 'in-grandchild', 1, 3, 1),
+            (2, 'in-live', 1, 5, 1)
+    """))
+    db.commit()
+
+    with engine.begin() as conn:
+        _trash_tombstones(conn)
+
+    marked_folders = db.execute(text("SELECT name FROM folders WHERE is_deleted ORDER BY id")).scalars()
+    marked_files = db.execute(text("SELECT name FROM files WHERE is_deleted ORDER BY id")).scalars()
+    assert list(marked_folders) == ["root", "alone"]
+    assert list(marked_files) == ["in-live"]
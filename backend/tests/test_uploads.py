@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core import uploads as uploads_module
+from app.core.uploads import expire_upload_sessions
+from app.models.blob import Blob
+from app.models.file import File
+from app.models.storage_purge import StoragePurge
+from app.models.upload_session import UploadPart, UploadSession
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes: parts of 4096, 4096, 2048
+
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    monkeypatch.setattr(uploads_module, "UPLOAD_MIN_PART_SIZE", 1024)
+
+
+def _start(client, auth, size=len(CONTENT), **extra):
+    r = client.post("/uploads", headers=auth, json={
+        "name": "big.bin", "size": size, "part_size": 4096, **extra,
+    })
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _put(client, auth, upload_id, number, data):
+    return client.put(f"/uploads/{upload_id}/parts/{number}", headers=auth, content=data)
+
+
+def _part(number):
+    return CONTENT[(number - 1) * 4096:number * 4096]
+
+
+def test_parts_in_any_order_and_concurrently(client, auth, db):
+    folder = client.post("/folders", headers=auth, json={"name": "docs"}).json()["id"]
+    upload = _start(client, auth, folder_id=folder, mime_type="application/octet-stream")
+    assert (upload["part_count"], upload["parts"], upload["status"]) == (3, [], "open")
+
+    # Not listed until completed
+    assert client.get("/files", headers=auth, params={"folder_id": folder}).json() == []
+
+    with ThreadPoolExecutor(3) as pool:
+        results = list(pool.map(lambda n: _put(client, auth, upload["id"], n, _part(n)), (3, 1, 2)))
+    assert [r.status_code for r in results] == [200, 200, 200]
+    assert client.get(f"/uploads/{upload['id']}", headers=auth).json()["parts"] == [1, 2, 3]
+
+    r = client.post(f"/uploads/{upload['id']}/complete", headers=auth)
+    assert r.status_code == 200, r.text
+    file_id = r.json()["id"]
+
+    assert client.get(f"/files/{file_id}/download", headers=auth).content == CONTENT
+    listed = client.get("/files", headers=auth, params={"folder_id": folder}).json()
+    assert [(f["id"], f["size"]) for f in listed] == [(file_id, len(CONTENT))]
+
+    # The session and its parts are gone; the parts' objects are queued
+    assert db.query(UploadSession).count() == db.query(UploadPart).count() == 0
+    assert db.query(StoragePurge).count() == 3
+    assert client.get(f"/uploads/{upload['id']}", headers=auth).status_code == 404
+
+
+def test_resume_after_missing_parts(client, auth):
+    upload = _start(client, auth)
+    _put(client, auth, upload["id"], 1, _part(1))
+
+    r = client.post(f"/uploads/{upload['id']}/complete", headers=auth)
+    assert r.status_code == 409
+    assert r.json()["detail"] == "Missing parts: 2, 3"
+
+    # Still open: the rest can be sent, and a part sent again replaces the first copy
+    _put(client, auth, upload["id"], 2, _part(2))
+    _put(client, auth, upload["id"], 3, _part(3))
+    _put(client, auth, upload["id"], 1, _part(1))
+    file_id = client.post(f"/uploads/{upload['id']}/complete", headers=auth).json()["id"]
+    assert client.get(f"/files/{file_id}/download", headers=auth).content == CONTENT
+
+
+def test_part_sizes_are_enforced(client, auth):
+    upload = _start(client, auth)
+    assert _put(client, auth, upload["id"], 1, _part(1)[:-1]).status_code == 400
+    assert _put(client, auth, upload["id"], 3, _part(2)).status_code == 400
+    assert _put(client, auth, upload["id"], 4, b"x").status_code == 400
+    assert client.get(f"/uploads/{upload['id']}", headers=auth).json()["parts"] == []
+
+
+def test_completed_content_is_deduplicated(client, auth, upload, db):
+    upload("same.bin", content=CONTENT)
+    session = _start(client, auth)
+    for n in (1, 2, 3):
+        _put(client, auth, session["id"], n, _part(n))
+    file_id = client.post(f"/uploads/{session['id']}/complete", headers=auth).json()["id"]
+
+    blob = db.query(Blob).one()
+    assert blob.refcount == 2
+    assert db.get(File, file_id).blob_id == blob.id
+
+
+def test_sessions_are_private(client, auth, other_auth):
+    upload = _start(client, auth)
+    assert client.get(f"/uploads/{upload['id']}", headers=other_auth).status_code == 404
+    assert _put(client, other_auth, upload["id"], 1, _part(1)).status_code == 404
+    assert client.post(f"/uploads/{upload['id']}/complete", headers=other_auth).status_code == 404
+
+
+def test_abort_and_expiry_discard_everything(client, auth, db):
+    aborted = _start(client, auth)
+    _put(client, auth, aborted["id"], 1, _part(1))
+    assert client.delete(f"/uploads/{aborted['id']}", headers=auth).status_code == 200
+
+    idle = _start(client, auth)
+    _put(client, auth, idle["id"], 2, _part(2))
+    assert expire_upload_sessions(db) == 0
+    later = datetime.now(timezone.utc) + timedelta(seconds=uploads_module.UPLOAD_SESSION_TTL_SECONDS + 60)
+    assert expire_upload_sessions(db, now=later) == 1
+    db.commit()
+
+    assert db.query(UploadSession).count() == db.query(UploadPart).count() == 0
+    # Pending File rows go with their sessions
+    assert db.query(File).count() == 0
+    paths = set(db.execute(select(StoragePurge.storage_path)).scalars())
+    assert len(paths) == 2 and all(p.startswith("uploads/") for p in paths)
+
+
+def test_permanent_folder_delete_discards_its_uploads(client, auth, db):
+    folder = client.post("/folders", headers=auth, json={"name": "docs"}).json()["id"]
+    upload = _start(client, auth, folder_id=folder)
+    _put(client, auth, upload["id"], 1, _part(1))
+
+    client.delete(f"/folders/{folder}", headers=auth)
+    assert client.delete(f"/folders/{folder}/permanent", headers=auth).status_code == 200
+    assert db.query(UploadSession).count() == 0
+    assert db.query(File).count() == 0
@@ -0,0 +1,110 @@
+from sqlalchemy import update
+
+from app.core.usage import reconcile_usage
+from app.models.folder import Folder
+from app.models.user import User
+from app.models.user_usage import UserUsage
+
+
+def _folder(client, auth, name, parent_id=None):
+    r = client.post("/folders", headers=auth, json={"name": name, "parent_id": parent_id})
+    return r.json()["id"]
+
+
+def _totals(db, *folder_ids):
+    db.expire_all()
+    return [(db.get(Folder, f).total_bytes, db.get(Folder, f).file_count) for f in folder_ids]
+
+
+def _usage(client, auth):
+    return client.get("/usage", headers=auth).json()
+
+
+def test_rollups_follow_uploads_trash_and_restore(client, auth, upload, db):
+    top = _folder(client, auth, "top")
+    mid = _folder(client, auth, "mid", top)
+    leaf = _folder(client, auth, "leaf", mid)
+
+    upload("a.txt", content=b"12345", folder_id=leaf)
+    doomed = upload("b.txt", content=b"123", folder_id=mid)
+    assert _totals(db, top, mid, leaf) == [(8, 2), (8, 2), (5, 1)]
+
+    client.delete(f"/files/{doomed}", headers=auth)
+    assert _totals(db, top, mid, leaf) == [(5, 1), (5, 1), (5, 1)]
+    client.post(f"/files/{doomed}/restore", headers=auth)
+    assert _totals(db, top, mid, leaf) == [(8, 2), (8, 2), (5, 1)]
+
+    # A trashed folder keeps its own totals; its ancestors drop them
+    client.delete(f"/folders/{leaf}", headers=auth)
+    assert _totals(db, top, mid, leaf) == [(3, 1), (3, 1), (5, 1)]
+
+    # Changes inside it stop at the trashed folder
+    upload("c.txt", content=b"1", folder_id=leaf)
+    assert _totals(db, top, mid, leaf) == [(3, 1), (3, 1), (6, 2)]
+
+    client.post(f"/folders/{leaf}/restore", headers=auth)
+    assert _totals(db, top, mid, leaf) == [(9, 3), (9, 3), (6, 2)]
+
+    listed = client.get("/folders", headers=auth, params={"parent_id": top}).json()
+    assert [(f["total_bytes"], f["file_count"]) for f in listed] == [(9, 3)]
+
+
+def test_usage_counts_trash_until_permanent_delete(client, auth, upload):
+    folder = _folder(client, auth, "docs")
+    first = upload("a.txt", content=b"12345", folder_id=folder)
+    upload("b.txt", content=b"12345")
+    assert _usage(client, auth)["total_bytes"] == 10
+
+    client.delete(f"/files/{first}", headers=auth)
+    assert _usage(client, auth) == {"total_bytes": 10, "file_count": 2, "quota_bytes": 15 * 1024 ** 3}
+
+    client.delete(f"/folders/{folder}", headers=auth)
+    client.delete(f"/folders/{folder}/permanent", headers=auth)
+    assert _usage(client, auth)["total_bytes"] == 5
+    assert _usage(client, auth)["file_count"] == 1
+
+
+def test_upload_over_quota_is_refused(client, auth, upload, db):
+    upload("a.txt", content=b"12345")
+    user_id = db.query(User.id).filter(User.email == "owner@example.com").scalar()
+    db.execute(update(UserUsage).where(UserUsage.user_id == user_id).values(quota_bytes=8))
+    db.commit()
+
+    r = client.post("/files/upload", headers=auth, files={"file": ("b.txt", b"1234", "text/plain")})
+    assert r.status_code == 413
+    upload("c.txt", content=b"123")
+
+    assert _usage(client, auth) == {"total_bytes": 8, "file_count": 2, "quota_bytes": 8}
+
+
+def test_reconcile_reports_and_fixes_drift(client, auth, upload, db):
+    folder = _folder(client, auth, "docs")
+    upload("a.txt", content=b"12345", folder_id=folder)
+    assert reconcile_usage(db, fix=False) == {
+        "folders": {"drifted": 0, "bytes": 0},
+        "users": {"drifted": 0, "bytes": 0},
+    }
+
+    db.execute(update(Folder).where(Folder.id == folder).values(total_bytes=100, file_count=7))
+    db.execute(update(UserUsage).values(total_bytes=1))
+    db.commit()
+
+    report = reconcile_usage(db)
+    db.commit()
+    assert report == {
+        "folders": {"drifted": 1, "bytes": 95},
+        "users": {"drifted": 1, "bytes": 4},
+    }
+    assert _totals(db, folder) == [(5, 1)]
+    assert _usage(client, auth)["total_bytes"] == 5
+
+
+def test_rollup_change_refreshes_parent_listing(client, auth, upload):
+    top = _folder(client, auth, "top")
+    child = _folder(client, auth, "child", top)
+    etag = client.get("/folders", headers=auth, params={"parent_id": top}).headers["ETag"]
+
+    upload("a.txt", content=b"1", folder_id=child)
+    r = client.get("/folders", headers=auth, params={"parent_id": top})
+    assert r.headers["ETag"] != etag
+    assert r.json()[0]["total_bytes"] == 1
@@ -0,0 +1,75 @@
+import time
+
+from sqlalchemy import event
+
+from app.core.database import async_engine
+from app.core.user_cache import UserCache, user_cache
+from app.models.user import User
+
+
+class _UserQueries:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            self.count += 1
+
+
+def _count_user_queries():
+    counter = _UserQueries()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    return counter
+
+
+def test_repeated_requests_skip_the_user_lookup(client, auth):
+    counter = _count_user_queries()
+    try:
+        for _ in range(5):
+            assert client.get("/folders/", headers=auth).status_code == 200
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+
+    assert counter.count == 1
+    assert len(user_cache) == 1
+
+
+def test_invalid_tokens_are_not_cached(client):
+    r = client.get("/folders/", headers={"Authorization": "Bearer nope"})
+    assert r.status_code == 401
+    assert len(user_cache) == 0
+
+
+def test_changing_a_user_invalidates_its_tokens(client, auth, db):
+    client.get("/folders/", headers=auth)
+    assert len(user_cache) == 1
+
+    user = db.query(User).filter(User.email == "owner@example.com").one()
+    user.email = "renamed@example.com"
+    db.commit()
+    assert len(user_cache) == 0
+
+    db.delete(user)
+    db.commit()
+    r = client.get("/folders/", headers=auth)
+    assert r.status_code == 401
+
+
+def test_entries_expire_and_evict_least_recently_used():
+    cache = UserCache(ttl=60, max_size=2)
+    alice, bob = User(id=1), User(id=2)
+
+    cache.put("a", alice)
+    cache.put("b", bob)
+    cache.get("a")
+    cache.put("b2", bob)
+    assert cache.get("b") is None
+    assert cache.get("a") is alice
+
+    # Never outlives the token itself
+    cache.put("old", alice, token_exp=time.time() - 1)
+    assert cache.get("old") is None
+
+    cache.invalidate(2)
+    assert cache.get("b2") is None
+    assert len(cache) == 1
@@ -1,37 +1,42 @@
 import { useState } from "react";
+import {
+  RESUMABLE_UPLOAD_THRESHOLD,
+  apiUploadBatch,
+  apiUploadFile,
+  apiUploadResumable,
+} from "../services/api";
+
+// Small files are sent this many per request
+const BATCH_SIZE = 200;
 
 export default function FileUpload({ folderId, onUploaded }) {
   const [uploading, setUploading] = useState(false);
 
   const handleChange = async (e) => {
-    const file = e.target.files[0];
-    if (!file) return;
+    const files = Array.from(e.target.files);
+    if (!files.length) return;
+
+    const folder = folderId || null;
+    const large = files.filter((f) => f.size > RESUMABLE_UPLOAD_THRESHOLD);
+    const small = files.filter((f) => f.size <= RESUMABLE_UPLOAD_THRESHOLD);
 
     try {
       setUploading(true);
 
-      const formData = new FormData();
-      formData.append("file", file);
-
-      const token = localStorage.getItem("token");
-
-      const res = await fetch(
-        `http://127.0.0.1:8000/files/upload${
-          folderId ? `?folder_id=${folderId}` : ""
-        }`,
-        {
-          method: "POST",
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
-          body: formData,
+      const failed = [];
+      if (small.length === 1) {
+        await apiUploadFile(small[0], folder);
+      } else {
+        for (let i = 0; i < small.length; i += BATCH_SIZE) {
+          const results = await apiUploadBatch(small.slice(i, i + BATCH_SIZE), folder);
+          failed.push(...results.filter((r) => r.error).map((r) => r.name));
         }
-      );
-
-      if (!res.ok) {
-        throw new Error("Upload failed");
+      }
+      for (const file of large) {
+        await apiUploadResumable(file, folder);
       }
 
+      if (failed.length) alert(`Some files were not uploaded: ${failed.join(", ")}`);
       onUploaded?.();
     } catch (err) {
       console.error(err);
@@ -46,6 +51,7 @@ export default function FileUpload({ folderId, onUploaded }) {
     <div className="my-4">
       <input
         type="file"
+        multiple
         disabled={uploading}
         onChange={handleChange}
       />
@@ -1,14 +1,12 @@
 import { useEffect, useState } from "react";
 import { useAuth } from "../context/AuthContext";
 import {
-  apiGetFolders,
+  apiBrowse,
   apiCreateFolder,
   apiDeleteFolder,
   apiRestoreFolder,
   apiPermanentDeleteFolder,
-  apiGetFiles,
-  apiGetTrashFiles,
-  apiGetTrashFolders,
+  apiGetTrash,
   apiRestoreFile,
   apiPermanentDeleteFile,
   apiDownloadFileBlob,
@@ -30,24 +28,27 @@ export default function Dashboard() {
   const [loadingFolders, setLoadingFolders] = useState(true);
   const [loadingFiles, setLoadingFiles] = useState(true);
   const [view, setView] = useState("drive");
+  // Continuation tokens of the lists on screen (null: nothing more)
+  const [driveCursor, setDriveCursor] = useState(null);
+  const [trashCursor, setTrashCursor] = useState(null);
 
   // -------------------------
   // Loaders
   // -------------------------
-  const loadFolders = async (parentId = null) => {
+  // One request per folder view: breadcrumbs, subfolders and files
+  const loadDrive = async (folderId = null) => {
+    setView("drive");
     setLoadingFolders(true);
-    try {
-      setFolders(await apiGetFolders(parentId));
-    } finally {
-      setLoadingFolders(false);
-    }
-  };
-
-  const loadFiles = async (folderId = null) => {
     setLoadingFiles(true);
     try {
-      setFiles(await apiGetFiles(folderId));
+      const page = await apiBrowse(folderId);
+      setCurrentFolder(page.folder);
+      setBreadcrumb(page.path);
+      setFolders(page.folders);
+      setFiles(page.files);
+      setDriveCursor(page.nextCursor);
     } finally {
+      setLoadingFolders(false);
       setLoadingFiles(false);
     }
   };
@@ -60,21 +61,32 @@ export default function Dashboard() {
     setLoadingFiles(true);
 
     try {
-      const [trashFolders, trashFiles] = await Promise.all([
-        apiGetTrashFolders(),
-        apiGetTrashFiles(),
-      ]);
-      setFolders(trashFolders);
-      setFiles(trashFiles);
+      const page = await apiGetTrash();
+      setFolders(page.items.filter((item) => item.type === "folder"));
+      setFiles(page.items.filter((item) => item.type === "file"));
+      setTrashCursor(page.nextCursor);
     } finally {
       setLoadingFolders(false);
       setLoadingFiles(false);
     }
   };
 
+  const loadMoreDrive = async () => {
+    const page = await apiBrowse(currentFolder?.id ?? null, driveCursor);
+    setFolders((prev) => [...prev, ...page.folders]);
+    setFiles((prev) => [...prev, ...page.files]);
+    setDriveCursor(page.nextCursor);
+  };
+
+  const loadMoreTrash = async () => {
+    const page = await apiGetTrash(trashCursor);
+    setFolders((prev) => [...prev, ...page.items.filter((item) => item.type === "folder")]);
+    setFiles((prev) => [...prev, ...page.items.filter((item) => item.type === "file")]);
+    setTrashCursor(page.nextCursor);
+  };
+
   useEffect(() => {
-    loadFolders(null);
-    loadFiles(null);
+    loadDrive(null);
   }, []);
 
   // -------------------------
@@ -82,21 +94,17 @@ export default function Dashboard() {
   // -------------------------
   const handleCreateFolder = async (name) => {
     await apiCreateFolder(name, currentFolder?.id || null);
-    loadFolders(currentFolder?.id || null);
+    loadDrive(currentFolder?.id || null);
   };
 
   const handleOpenFolder = (folder) => {
-    setCurrentFolder(folder);
-    setBreadcrumb((prev) => [...prev, folder]);
-    loadFolders(folder.id);
-    loadFiles(folder.id);
+    loadDrive(folder.id);
   };
 
   const handleDeleteFolder = async (folder) => {
     if (!window.confirm(`Delete folder "${folder.name}"?`)) return;
     await apiDeleteFolder(folder.id);
-    loadFolders(currentFolder?.id || null);
-    loadFiles(currentFolder?.id || null);
+    loadDrive(currentFolder?.id || null);
   };
 
   const handleRestoreFolder = async (folder) => {
@@ -135,7 +143,7 @@ export default function Dashboard() {
   const handleDelete = async (file) => {
     if (!window.confirm(`Delete "${file.name}"?`)) return;
     await apiDeleteFile(file.id);
-    loadFiles(currentFolder?.id || null);
+    loadDrive(currentFolder?.id || null);
   };
 
   const handleRestore = async (file) => {
@@ -170,11 +178,7 @@ export default function Dashboard() {
         <h2 className="text-xl font-bold mb-6">CloudVault</h2>
 
         <nav className="space-y-2 text-sm">
-          <div className="cursor-pointer" onClick={() => {
-            setView("drive");
-            loadFolders(null);
-            loadFiles(null);
-          }}>
+          <div className="cursor-pointer" onClick={() => loadDrive(null)}>
             My Drive
           </div>
 
@@ -194,10 +198,27 @@ export default function Dashboard() {
       <main className="flex-1 p-6 overflow-auto">
         {view === "drive" && (
           <>
+            <div className="mb-4 text-sm text-gray-600">
+              <span className="cursor-pointer hover:underline" onClick={() => loadDrive(null)}>
+                My Drive
+              </span>
+              {breadcrumb.map((crumb) => (
+                <span key={crumb.id}>
+                  {" / "}
+                  <span
+                    className="cursor-pointer hover:underline"
+                    onClick={() => loadDrive(crumb.id)}
+                  >
+                    {crumb.name}
+                  </span>
+                </span>
+              ))}
+            </div>
+
             <CreateFolder onCreate={handleCreateFolder} />
             <FileUpload
               folderId={currentFolder?.id || null}
-              onUploaded={() => loadFiles(currentFolder?.id || null)}
+              onUploaded={() => loadDrive(currentFolder?.id || null)}
             />
 
             {!loadingFolders && (
@@ -226,6 +247,24 @@ export default function Dashboard() {
         {!loadingFiles && (
           <FileList files={filesWithActions} isTrash={view === "trash"} />
         )}
+
+        {view === "drive" && !loadingFiles && driveCursor && (
+          <button
+            onClick={loadMoreDrive}
+            className="mt-4 text-sm text-blue-600 hover:underline"
+          >
+            Load more
+          </button>
+        )}
+
+        {view === "trash" && trashCursor && (
+          <button
+            onClick={loadMoreTrash}
+            className="mt-4 text-sm text-blue-600 hover:underline"
+          >
+            Load more
+          </button>
+        )}
       </main>
     </div>
   );
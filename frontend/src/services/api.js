@@ -44,12 +44,51 @@ export async function fetchWithAuth(endpoint, options = {}) {
   return response.json();
 }
 
+// --------------------
+// PAGINATED LISTS (one page per call)
+// --------------------
+// Resolves to { items, nextCursor }; nextCursor (from the X-Next-Cursor
+// header) is null on the last page and is passed back to load the next.
+export async function fetchPageWithAuth(endpoint, cursor = null) {
+  const token = getToken();
+  if (!token) throw new Error("No auth token found");
+
+  const sep = endpoint.includes("?") ? "&" : "?";
+  const url = cursor
+    ? `${endpoint}${sep}cursor=${encodeURIComponent(cursor)}`
+    : endpoint;
+
+  const response = await fetch(`${API_BASE_URL}${url}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+
+  if (!response.ok) {
+    const text = await response.text();
+    throw new Error(text || "API request failed");
+  }
+
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get("X-Next-Cursor"),
+  };
+}
+
+// --------------------
+// BROWSE (path, subfolders and files of a folder in one request)
+// --------------------
+// Resolves to { folder, path, folders, files, nextCursor }
+export async function apiBrowse(folderId = null, cursor = null) {
+  const endpoint = folderId === null ? "/browse" : `/browse/${folderId}`;
+  const page = await fetchPageWithAuth(endpoint, cursor);
+  return { ...page.items, nextCursor: page.nextCursor };
+}
+
 // --------------------
 // FOLDERS ✅ RESTORED
 // --------------------
-export function apiGetFolders(parentId = null) {
+export function apiGetFolders(parentId = null, cursor = null) {
   const query = parentId === null ? "" : `?parent_id=${parentId}`;
-  return fetchWithAuth(`/folders${query}`);
+  return fetchPageWithAuth(`/folders${query}`, cursor);
 }
 
 export function apiCreateFolder(name, parent_id = null) {
@@ -60,12 +99,36 @@ export function apiCreateFolder(name, parent_id = null) {
   });
 }
 
+// Rename and / or move: only the fields given are changed
+// (parent_id: null moves the folder to the root)
+export function apiUpdateFolder(folderId, changes) {
+  return fetchWithAuth(`/folders/${folderId}`, {
+    method: "PATCH",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(changes),
+  });
+}
+
+// Copies the folder and its content. Small folders are copied right away;
+// for larger ones the returned job is "pending": poll apiGetCopy(job.id)
+export function apiCopyFolder(folderId, changes = {}) {
+  return fetchWithAuth(`/folders/${folderId}/copy`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(changes),
+  });
+}
+
+export function apiGetCopy(jobId) {
+  return fetchWithAuth(`/copies/${jobId}`);
+}
+
 // --------------------
 // FILES
 // --------------------
-export function apiGetFiles(folder_id = null) {
+export function apiGetFiles(folder_id = null, cursor = null) {
   const query = folder_id === null ? "" : `?folder_id=${folder_id}`;
-  return fetchWithAuth(`/files${query}`);
+  return fetchPageWithAuth(`/files${query}`, cursor);
 }
 
 export function apiGetTrashFiles() {
@@ -78,6 +141,24 @@ export function apiRestoreFile(fileId) {
   });
 }
 
+// Rename and / or move: { name, folder_id }
+export function apiUpdateFile(fileId, changes) {
+  return fetchWithAuth(`/files/${fileId}`, {
+    method: "PATCH",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(changes),
+  });
+}
+
+// { target_folder_id, name }; both default to the original's
+export function apiCopyFile(fileId, changes = {}) {
+  return fetchWithAuth(`/files/${fileId}/copy`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(changes),
+  });
+}
+
 export async function apiUploadFile(file, folder_id = null) {
   const formData = new FormData();
   formData.append("file", file);
@@ -97,6 +178,77 @@ export async function apiUploadFile(file, folder_id = null) {
   return res.json();
 }
 
+// Many files in one request; resolves to one result per file, in order:
+// { name, id, size } or { name, error }
+export async function apiUploadBatch(files, folder_id = null) {
+  const formData = new FormData();
+  for (const file of files) formData.append("files", file);
+
+  const query = folder_id === null ? "" : `?folder_id=${folder_id}`;
+  return fetchWithAuth(`/files/upload/batch${query}`, {
+    method: "POST",
+    body: formData,
+  });
+}
+
+// --------------------
+// RESUMABLE UPLOAD (large files, parts sent in parallel)
+// --------------------
+// Files above this size go through an upload session
+export const RESUMABLE_UPLOAD_THRESHOLD = 64 * 1024 * 1024;
+
+const UPLOAD_PARALLEL_PARTS = 4;
+const UPLOAD_PART_ATTEMPTS = 3;
+
+async function putPart(uploadId, number, blob) {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await fetchWithAuth(`/uploads/${uploadId}/parts/${number}`, {
+        method: "PUT",
+        body: blob,
+      });
+    } catch (err) {
+      if (attempt >= UPLOAD_PART_ATTEMPTS) throw err;
+    }
+  }
+}
+
+// Pass the id of an earlier, interrupted session to resume it: parts the
+// server already has are skipped. onProgress receives a 0..1 fraction.
+export async function apiUploadResumable(file, folder_id = null, { uploadId = null, onProgress } = {}) {
+  const session = uploadId
+    ? await fetchWithAuth(`/uploads/${uploadId}`)
+    : await fetchWithAuth("/uploads", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          name: file.name,
+          size: file.size,
+          folder_id,
+          mime_type: file.type || null,
+        }),
+      });
+
+  const done = new Set(session.parts);
+  const pending = [];
+  for (let n = 1; n <= session.part_count; n++) {
+    if (!done.has(n)) pending.push(n);
+  }
+
+  const worker = async () => {
+    while (pending.length) {
+      const n = pending.shift();
+      const start = (n - 1) * session.part_size;
+      await putPart(session.id, n, file.slice(start, start + session.part_size));
+      done.add(n);
+      onProgress?.(done.size / session.part_count);
+    }
+  };
+  await Promise.all(Array.from({ length: UPLOAD_PARALLEL_PARTS }, worker));
+
+  return fetchWithAuth(`/uploads/${session.id}/complete`, { method: "POST" });
+}
+
 // --------------------
 // DOWNLOAD / PREVIEW
 // --------------------
@@ -157,6 +309,13 @@ export function apiGetTrashFolders() {
   return fetchWithAuth("/folders/trash");
 }
 
+// --------------------
+// TRASH (folders + files, one request per page)
+// --------------------
+export function apiGetTrash(cursor = null) {
+  return fetchPageWithAuth("/trash", cursor);
+}
+
 // --------------------
 // Permanent Delete Folder
 // --------------------